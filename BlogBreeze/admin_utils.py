@@ -0,0 +1,65 @@
+"""
+Admin helpers for tables too large to count or scan on every changelist load.
+
+``LargeTableAdminMixin`` swaps in ``EstimatedCountPaginator`` and turns off
+the admin's second, unfiltered count. On PostgreSQL the paginator asks the
+planner for the row estimate (``EXPLAIN``) and only runs an exact
+``COUNT(*)`` when the estimate is small, so paging through a few hundred
+thousand rows costs an index scan per page instead of a full count. Page
+numbers near the end of a large result may therefore be approximate.
+"""
+import json
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+EXACT_COUNT_THRESHOLD = 10000
+
+
+def estimated_count(queryset):
+    """
+    Return the planner's row estimate for ``queryset`` on PostgreSQL, or None
+    on databases without a usable estimate.
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses the planner's estimate instead of ``COUNT(*)`` for
+    results larger than EXACT_COUNT_THRESHOLD rows.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate > EXACT_COUNT_THRESHOLD:
+            return estimate
+        return super().count
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin mixin for large tables: estimated pagination, no full result
+    count, and ``changelist_defer`` columns (e.g. rich text bodies) left out of
+    changelist queries. Combine with ``list_select_related`` for the
+    ``list_display`` relations and ``autocomplete_fields``/``raw_id_fields``
+    for foreign keys to large tables.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    changelist_defer = ()
+
+    def get_changelist(self, request, **kwargs):
+        defer = self.changelist_defer
+
+        class DeferringChangeList(ChangeList):
+            def get_queryset(self, request, exclude_parameters=None):
+                return super().get_queryset(request, exclude_parameters).defer(*defer)
+
+        return DeferringChangeList if defer else ChangeList
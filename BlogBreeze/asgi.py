@@ -2,6 +2,11 @@
 ASGI config for BlogBreeze project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Under ASGI the read-heavy blog routes are served by the async views in
+``blog/async_views.py`` unless ``BLOG_ASYNC_VIEWS`` is explicitly set to False.
+
+Run it with:
+    gunicorn BlogBreeze.asgi:application -k uvicorn.workers.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +17,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BlogBreeze.settings')
+os.environ.setdefault('BLOG_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,59 @@
+"""
+Database cache backend with atomic increments.
+
+Django's ``DatabaseCache`` increments by reading the value and writing the
+sum back, so two processes incrementing the same key at once can both write
+the same total and lose a count. This backend's ``incr`` makes the write a
+compare-and-swap instead: the UPDATE only matches while the row still holds
+the value that was read, and is retried with the fresh value when another
+process got there first. Each statement runs on its own, so no transaction
+(and on SQLite no write lock) is held between the read and the write.
+"""
+import base64
+import pickle
+
+from asgiref.sync import sync_to_async
+from django.core.cache.backends.db import DatabaseCache as BaseDatabaseCache
+from django.db import connections, router
+from django.utils.timezone import now as tz_now
+
+
+class DatabaseCache(BaseDatabaseCache):
+    """
+    ``DatabaseCache`` whose ``incr`` and ``decr`` are atomic.
+    """
+
+    def incr(self, key, delta=1, version=None):
+        cache_key = self.make_and_validate_key(key, version=version)
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        now = connection.ops.adapt_datetimefield_value(tz_now().replace(microsecond=0, tzinfo=None))
+
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute(
+                    'SELECT %s FROM %s WHERE %s = %%s AND %s > %%s'
+                    % (quote_name('value'), table, quote_name('cache_key'), quote_name('expires')),
+                    [cache_key, now],
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    raise ValueError(f"Key '{key}' not found")
+                encoded = connection.ops.process_clob(row[0])
+                value = pickle.loads(base64.b64decode(encoded.encode())) + delta
+                cursor.execute(
+                    'UPDATE %s SET %s = %%s WHERE %s = %%s AND %s = %%s'
+                    % (table, quote_name('value'), quote_name('cache_key'), quote_name('value')),
+                    [
+                        base64.b64encode(pickle.dumps(value, self.pickle_protocol)).decode('latin1'),
+                        cache_key,
+                        encoded,
+                    ],
+                )
+                if cursor.rowcount:
+                    return value
+
+    async def aincr(self, key, delta=1, version=None):
+        return await sync_to_async(self.incr)(key, delta, version)
@@ -0,0 +1,114 @@
+"""
+Change tracking for model saves, shared by the blog and accounts apps.
+
+``ChangeTrackingMixin`` remembers the column values an instance was loaded
+with. Saving an existing instance then writes only the columns that changed
+(plus ``auto_now`` timestamps) and does nothing at all, including firing
+``pre_save``/``post_save`` signals, when nothing changed.
+"""
+
+
+class ChangeTrackingMixin:
+    """
+    Model mixin that turns ``save()`` into an ``update_fields`` save of the
+    changed columns. List it before ``models.Model`` in the bases.
+
+    Values are compared with ``!=``, so in-place mutation of a mutable value
+    (e.g. a dict in a JSONField) is not detected; assign a new value instead.
+    Passing ``update_fields`` or ``force_insert`` explicitly bypasses tracking.
+    """
+    _loaded_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or self._loaded_values is None:
+            self._snapshot()
+            return
+        # Loading deferred fields must not hide other unsaved assignments
+        for name in fields:
+            attname = self._meta.get_field(name).attname
+            if attname in self.__dict__:
+                self._loaded_values[attname] = self.__dict__[attname]
+
+    def _snapshot(self):
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def loaded_value(self, attname):
+        """
+        Return the value ``attname`` had when the instance was loaded or last
+        saved, or None for unsaved instances.
+        """
+        return (self._loaded_values or {}).get(attname)
+
+    def get_changed_fields(self):
+        """
+        Return the names of concrete fields whose value differs from the snapshot.
+        Fields assigned on a deferred-loading instance count as changed.
+        """
+        if self._loaded_values is None:
+            return [field.name for field in self._meta.concrete_fields if not field.primary_key]
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            value = self.__dict__[field.attname]
+            if (
+                field.attname not in self._loaded_values
+                or value != self._loaded_values[field.attname]
+                # A newly assigned file may reuse the stored file name
+                or getattr(value, '_committed', True) is False
+            ):
+                changed.append(field.name)
+        return changed
+
+    def is_tracked_save(self, args, kwargs):
+        """
+        Return whether ``save(*args, **kwargs)`` writes only changed columns.
+        """
+        return not (
+            self._state.adding
+            or self._loaded_values is None
+            or kwargs.get('force_insert')
+            or args
+        )
+
+    def is_noop_save(self, args, kwargs):
+        """
+        Return whether ``save(*args, **kwargs)`` would do nothing, so callers
+        can skip work around it such as opening a transaction.
+        """
+        return (
+            self.is_tracked_save(args, kwargs)
+            and kwargs.get('update_fields') is None
+            and not self.get_changed_fields()
+        )
+
+    def save(self, *args, **kwargs):
+        if not self.is_tracked_save(args, kwargs):
+            super().save(*args, **kwargs)
+            self._snapshot()
+            return
+        if kwargs.get('update_fields') is None:
+            changed = self.get_changed_fields()
+            if not changed:
+                return
+            touched = [
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False) and field.name not in changed
+            ]
+            kwargs['update_fields'] = changed + touched
+        super().save(*args, **kwargs)
+        # Columns left out of update_fields keep their loaded values
+        saved = {self._meta.get_field(name).attname for name in kwargs['update_fields']}
+        for attname in saved & self.__dict__.keys():
+            self._loaded_values[attname] = self.__dict__[attname]
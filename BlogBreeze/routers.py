@@ -0,0 +1,145 @@
+"""
+Read-replica routing.
+
+``ReplicaRoutingMiddleware`` marks GET/HEAD requests handled by the public blog
+views (``REPLICA_VIEW_MODULES``) as replica-safe, and ``ReplicaRouter`` then
+sends their reads to a healthy replica from ``DATABASE_REPLICAS``. Everything
+else reads from ``default``: writes, admin and account pages, management
+commands, background workers, and any query made inside a transaction.
+
+Any non-GET request (comment, post edit, login, ...) sets a short-lived cookie
+that pins the client to the primary for ``REPLICA_PIN_SECONDS``, so readers
+see their own writes even while the replicas catch up.
+"""
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = 'db_pin_primary'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+_health = {}
+
+
+def replica_lag(alias):
+    """
+    Return the replica's replication lag in seconds (0 when not measurable).
+    """
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.execute('SELECT 1')
+            return 0
+        cursor.execute(
+            'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+            'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+        )
+        return cursor.fetchone()[0] or 0
+
+
+def is_healthy(alias):
+    """
+    Return whether ``alias`` is reachable and not lagging, re-checking at most
+    once per ``REPLICA_HEALTH_CHECK_INTERVAL`` seconds per process.
+    """
+    now = time.monotonic()
+    healthy, checked_at = _health.get(alias, (True, None))
+    if checked_at is not None and now - checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+        return healthy
+    # Record the check first so concurrent requests do not all probe
+    _health[alias] = (healthy, now)
+    try:
+        lag = replica_lag(alias)
+        healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            logger.warning(f'Replica {alias} is {lag:.1f}s behind, reading from primary')
+    except DatabaseError as e:
+        healthy = False
+        logger.warning(f'Replica {alias} is unavailable: {e}')
+    _health[alias] = (healthy, now)
+    return healthy
+
+
+class ReplicaRouter:
+    """
+    Route replica-safe reads to a random healthy replica; everything else,
+    including all writes and migrations, goes to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        # The database cache holds rate limit counters and invalidation versions
+        if model._meta.app_label == 'django_cache':
+            return DEFAULT_DB_ALIAS
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if is_healthy(alias)]
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Enable replica reads for safe requests to the blog views and pin clients
+    to the primary for a short time after they write.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _replica_reads.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        token = _replica_reads.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return self.process_response(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD') or PIN_COOKIE in request.COOKIES:
+            return None
+        view = getattr(view_func, 'view_class', view_func)
+        if view.__module__ in settings.REPLICA_VIEW_MODULES:
+            _replica_reads.set(True)
+        return None
+
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
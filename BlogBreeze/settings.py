@@ -42,15 +42,17 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    # Third-party apps (cloudinary_storage must be before staticfiles)
-    'cloudinary_storage',
     'django.contrib.staticfiles',
-    'cloudinary',
+    # Third-party apps. cloudinary and cloudinary_storage are not installed: as
+    # apps they only add unused template tags, which every worker would load
+    # along with the Cloudinary SDK, and a collectstatic override for Cloudinary
+    # static hosting. Their storage backend is used below by dotted path.
     'ckeditor',
     'ckeditor_uploader',
     # Local apps
     'blog.apps.BlogConfig',
     'accounts',
+    'taskqueue.apps.TaskQueueConfig',
 ]
 
 MIDDLEWARE = [
@@ -60,6 +62,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.RoleMiddleware',  # Sets request.role from the profile loaded with the user
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,11 +87,34 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'BlogBreeze.wsgi.application'
+ASGI_APPLICATION = 'BlogBreeze.asgi.application'
+
+# Serve the read-heavy blog routes with async views (enabled by default under ASGI)
+BLOG_ASYNC_VIEWS = os.environ.get('BLOG_ASYNC_VIEWS', 'False') == 'True'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLITE_TUNED=True makes SQLite suitable for small production deployments:
+# WAL lets readers run alongside a writer, write transactions take the write
+# lock up front (BEGIN IMMEDIATE) instead of failing on lock upgrade, and
+# writers wait up to 20 seconds for the lock. See `sqlite_maintenance` and
+# `benchmark_sqlite`.
+SQLITE_TUNED = os.environ.get('SQLITE_TUNED') == 'True'
+SQLITE_TUNED_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA busy_timeout=20000;'
+        'PRAGMA mmap_size=268435456;'  # 256 MB
+        'PRAGMA cache_size=-65536;'  # 64 MB
+        'PRAGMA temp_store=MEMORY;'
+    ),
+}
+
 # Use PostgreSQL in production, SQLite in development
 if os.environ.get('DATABASE_URL'):
     # Render.com provides DATABASE_URL
@@ -118,11 +144,97 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    if SQLITE_TUNED:
+        DATABASES['default']['OPTIONS'] = SQLITE_TUNED_OPTIONS
+        DATABASES['default']['CONN_MAX_AGE'] = 600
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replicas (comma-separated database URLs). Public blog pages read from a
+# healthy replica; see BlogBreeze/routers.py. Locally, point this at a second
+# SQLite file (sqlite:///replica.sqlite3) and refresh it with
+# `python manage.py sync_sqlite_replicas`.
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    import dj_database_url
+    alias = f'replica{index}'
+    DATABASES[alias] = dj_database_url.parse(url.strip(), conn_max_age=600)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['BlogBreeze.routers.ReplicaRouter']
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.sessions.middleware.SessionMiddleware'),
+        'BlogBreeze.routers.ReplicaRoutingMiddleware',
+    )
+
+# PostgreSQL connection management, applied to the primary and any replicas.
+# DB_POOL=True uses a psycopg 3 connection pool per process (connections are
+# checked before use and recycled when idle or old); otherwise each thread
+# keeps one persistent connection that is health-checked before reuse.
+# DB_TRANSACTION_POOLER=True makes connections safe behind PgBouncer in
+# transaction mode: no server-side cursors and no prepared statements. Keep
+# the database role's TimeZone at UTC so Django never issues SET TIME ZONE.
+DB_POOL = os.environ.get('DB_POOL') == 'True'
+DB_TRANSACTION_POOLER = os.environ.get('DB_TRANSACTION_POOLER') == 'True'
+
+for database in DATABASES.values():
+    if database['ENGINE'] != 'django.db.backends.postgresql':
+        continue
+    options = database.setdefault('OPTIONS', {})
+    database['CONN_HEALTH_CHECKS'] = True  # Also makes the pool check connections on checkout
+    if DB_POOL:
+        database['CONN_MAX_AGE'] = 0  # The pool keeps connections open
+        options['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),  # Max wait for a free connection
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+            'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),
+        }
+    else:
+        database['CONN_MAX_AGE'] = int(os.environ.get('CONN_MAX_AGE', 600))
+    if DB_TRANSACTION_POOLER:
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+        options['prepare_threshold'] = None
+
+REPLICA_VIEW_MODULES = ['blog.views', 'blog.async_views', 'blog.feeds']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+REPLICA_HEALTH_CHECK_INTERVAL = 15
+REPLICA_MAX_LAG_SECONDS = 30
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+
+# Shared by every worker: Redis when REDIS_URL is set (requires the redis
+# package), otherwise a table in the primary database with atomic increments
+# (see BlogBreeze/cache.py). Create the table with `python manage.py createcachetable`.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'BlogBreeze.cache.DatabaseCache',
+            'LOCATION': 'blog_cache',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
 
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Load the session user together with its profile (see accounts/backends.py)
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.ProfileModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -192,6 +304,113 @@ LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'blog:post_list'
 LOGOUT_REDIRECT_URL = 'blog:post_list'
 
+# Background task queue (see taskqueue/ and `python manage.py runworker`)
+TASKQUEUE_POLL_INTERVAL = 1.0
+TASKQUEUE_LOCK_TIMEOUT = 600  # seconds without a heartbeat before a running task is considered abandoned
+TASKQUEUE_HEARTBEAT_INTERVAL = 60  # seconds between lock refreshes for running tasks
+TASKQUEUE_RETRY_BACKOFF = 5  # seconds, doubled on every failed attempt
+TASKQUEUE_RETRY_BACKOFF_MAX = 3600
+
+# Post lifecycle outbox (see blog/outbox.py and `python manage.py dispatch_outbox`)
+BLOG_OUTBOX_SINKS = [
+    'blog.outbox.WebhookSink',
+    'blog.outbox.SearchIndexSink',
+    'blog.outbox.NotificationSink',
+]
+BLOG_OUTBOX_WEBHOOK_URLS = [url for url in os.environ.get('BLOG_OUTBOX_WEBHOOK_URLS', '').split(',') if url]
+BLOG_SEARCH_INDEX_URL = os.environ.get('BLOG_SEARCH_INDEX_URL')
+BLOG_OUTBOX_TIMEOUT = 10
+BLOG_OUTBOX_CLAIM_TIMEOUT = 300  # seconds before events claimed by a dispatcher are due again
+BLOG_OUTBOX_MAX_ATTEMPTS = 10
+
+# Email
+EMAIL_HOST = os.environ.get('EMAIL_HOST', '')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_BACKEND = os.environ.get(
+    'EMAIL_BACKEND',
+    'django.core.mail.backends.smtp.EmailBackend' if EMAIL_HOST else 'django.core.mail.backends.console.EmailBackend'
+)
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Modern Blog <noreply@example.com>')
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
+
+# Subscriber notifications (see blog/notifications.py)
+BLOG_NOTIFICATION_BATCH_SIZE = 100  # messages per send_messages() call on one SMTP connection
+BLOG_NOTIFICATION_RATE_LIMIT = 20  # messages per second
+
+# Page views and popularity (see blog/pageviews.py and `python manage.py compute_popularity`)
+BLOG_VIEW_FLUSH_INTERVAL = 30  # seconds between bulk writes of buffered view counts
+BLOG_POPULAR_WINDOW_DAYS = 14
+BLOG_POPULAR_HALF_LIFE_DAYS = 3
+BLOG_POPULAR_LIMIT = 50
+
+# Static snapshots of the public pages (see blog/snapshots.py and
+# `python manage.py export_static_site`). STATIC_SNAPSHOT_SERVE=True serves
+# them to anonymous readers right after WhiteNoise, before sessions and the
+# database; STATIC_SNAPSHOT_AUTO_EXPORT=True re-exports changed pages from the
+# task queue whenever posts are published, updated or withdrawn.
+STATIC_SNAPSHOT_ROOT = os.environ.get('STATIC_SNAPSHOT_ROOT', str(BASE_DIR / 'snapshot'))
+STATIC_SNAPSHOT_SERVE = os.environ.get('STATIC_SNAPSHOT_SERVE') == 'True'
+STATIC_SNAPSHOT_AUTO_EXPORT = os.environ.get('STATIC_SNAPSHOT_AUTO_EXPORT') == 'True'
+STATIC_SNAPSHOT_MAX_AGE = int(os.environ.get('STATIC_SNAPSHOT_MAX_AGE', 60))  # Cache-Control for snapshot responses
+
+if STATIC_SNAPSHOT_SERVE:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('whitenoise.middleware.WhiteNoiseMiddleware') + 1,
+        'blog.snapshots.StaticSnapshotMiddleware',
+    )
+if STATIC_SNAPSHOT_AUTO_EXPORT:
+    BLOG_OUTBOX_SINKS.append('blog.outbox.SnapshotSink')
+
+# Faceted tag browsing (see blog/facets.py): how often each process applies new
+# outbox events to its bitmaps, and rebuilds them from scratch
+FACET_SYNC_INTERVAL = float(os.environ.get('FACET_SYNC_INTERVAL', 2))  # seconds
+FACET_REBUILD_INTERVAL = int(os.environ.get('FACET_REBUILD_INTERVAL', 3600))  # seconds
+
+# Read-only JSON API (see blog/api.py)
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100  # largest ?limit= accepted
+API_CACHE_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE', 60))  # Cache-Control for API responses
+
+# Threaded comments (see blog/threads.py): top-level threads per page on post detail pages
+COMMENT_THREADS_PER_PAGE = int(os.environ.get('COMMENT_THREADS_PER_PAGE', 20))
+
+# Compressed post bodies (see blog/compression.py and `python manage.py compress_post_content`).
+# POST_CONTENT_CODEC is 'zlib' or 'zstd' (requires the zstandard package).
+# The database cannot search compressed bodies, so compression requires
+# SEARCH_POST_CONTENT=False (search then matches titles and descriptions).
+POST_CONTENT_COMPRESSION = os.environ.get('POST_CONTENT_COMPRESSION') == 'True'
+POST_CONTENT_CODEC = os.environ.get('POST_CONTENT_CODEC', 'zlib')
+SEARCH_POST_CONTENT = os.environ.get('SEARCH_POST_CONTENT', 'True') == 'True'
+
+# Cache warm-up after deploys (see blog/warmup.py and `python manage.py warm_caches`).
+# WARMUP_ON_WORKER_START=True warms each gunicorn worker before it accepts
+# requests (see gunicorn.conf.py), for at most WARMUP_WORKER_BUDGET seconds.
+WARMUP_LISTING_PAGES = int(os.environ.get('WARMUP_LISTING_PAGES', 3))
+WARMUP_POPULAR_POSTS = int(os.environ.get('WARMUP_POPULAR_POSTS', 10))
+WARMUP_BUDGET = float(os.environ.get('WARMUP_BUDGET', 30))  # seconds
+WARMUP_CONCURRENCY = int(os.environ.get('WARMUP_CONCURRENCY', 4))
+WARMUP_ON_WORKER_START = os.environ.get('WARMUP_ON_WORKER_START') == 'True'
+WARMUP_WORKER_BUDGET = float(os.environ.get('WARMUP_WORKER_BUDGET', 10))  # seconds
+
+# Rate limiting (see blog/ratelimit.py): '<requests>/<period>' per client, the
+# period in seconds or s, m, h, d units ('10/5m'). Counters are kept in the
+# cache. With the database cache every counted request writes a row, so search
+# (a read) gets a looser default there. Every rule a view uses must be listed;
+# set a rule to None to turn it off.
+# RATELIMIT_PROXY_COUNT is the number of proxies in front of the app that
+# append to X-Forwarded-For (1 on Render); 0 uses REMOTE_ADDR.
+RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'True') == 'True'
+RATELIMIT_RATES = {
+    'login': os.environ.get('RATELIMIT_LOGIN', '10/5m'),
+    'register': os.environ.get('RATELIMIT_REGISTER', '5/h'),
+    'comment': os.environ.get('RATELIMIT_COMMENT', '10/m'),
+    'search': os.environ.get('RATELIMIT_SEARCH', '30/m' if REDIS_URL else '120/m'),
+}
+RATELIMIT_PROXY_COUNT = int(os.environ.get('RATELIMIT_PROXY_COUNT', 0))
+
 # CKEditor Configuration
 CKEDITOR_UPLOAD_PATH = 'uploads/'
 CKEDITOR_IMAGE_BACKEND = 'pillow'
@@ -0,0 +1,137 @@
+import asyncio
+from unittest import mock
+
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, override_settings
+
+from accounts.views import AuthorDashboardView
+from blog import async_views, views
+from blog.models import Post
+from .routers import PIN_COOKIE, ReplicaRouter, ReplicaRoutingMiddleware, _health, _replica_reads, is_healthy
+
+router = ReplicaRouter()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], REPLICA_PIN_SECONDS=10, REPLICA_HEALTH_CHECK_INTERVAL=15)
+class ReplicaRouterTests(SimpleTestCase):
+    """
+    Safe requests to the blog views read from a healthy replica; writes,
+    pinned clients and everything else use the primary.
+    """
+
+    def setUp(self):
+        _health.clear()
+        self.addCleanup(_health.clear)
+        patcher = mock.patch('BlogBreeze.routers.replica_lag', return_value=0)
+        self.replica_lag = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def handle(self, request, view):
+        """
+        Run ``request`` through the middleware the way Django's handler does,
+        returning the response and the databases the view would use.
+        """
+        used = {}
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            used['read'] = router.db_for_read(Post)
+            used['write'] = router.db_for_write(Post)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        return middleware(request), used
+
+    def test_blog_reads_go_to_the_replica(self):
+        response, used = self.handle(RequestFactory().get('/'), views.PostListView.as_view())
+
+        self.assertEqual(used, {'read': 'replica1', 'write': 'default'})
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_other_views_read_from_the_primary(self):
+        _, used = self.handle(RequestFactory().get('/accounts/dashboard/'), AuthorDashboardView.as_view())
+
+        self.assertEqual(used['read'], 'default')
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response, used = self.handle(RequestFactory().post('/'), views.PostDetailView.as_view())
+
+        self.assertEqual(used, {'read': 'default', 'write': 'default'})
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+        self.assertTrue(response.cookies[PIN_COOKIE]['httponly'])
+
+    def test_pinned_client_reads_from_the_primary(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+
+        _, used = self.handle(request, views.PostListView.as_view())
+
+        self.assertEqual(used['read'], 'default')
+
+    def test_expired_pin_reads_from_the_replica_again(self):
+        # The browser drops the cookie after REPLICA_PIN_SECONDS
+        response, _ = self.handle(RequestFactory().post('/'), views.PostDetailView.as_view())
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+
+        _, used = self.handle(RequestFactory().get('/'), views.PostListView.as_view())
+
+        self.assertEqual(used['read'], 'replica1')
+
+    def test_replica_reads_end_with_the_request(self):
+        self.handle(RequestFactory().get('/'), views.PostListView.as_view())
+
+        self.assertFalse(_replica_reads.get())
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_concurrent_requests_do_not_share_routing(self):
+        seen = {}
+
+        async def get_response(request):
+            middleware.process_view(request, request.view, (), {})
+            # Let the other request run between marking and reading
+            await asyncio.sleep(0)
+            seen[request.path] = router.db_for_read(Post)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        blog_request = AsyncRequestFactory().get('/blog/')
+        blog_request.view = async_views.PostListView.as_view()
+        account_request = AsyncRequestFactory().get('/account/')
+        account_request.view = AuthorDashboardView.as_view()
+
+        async def run():
+            await asyncio.gather(middleware(blog_request), middleware(account_request))
+
+        asyncio.run(run())
+
+        self.assertEqual(seen, {'/blog/': 'replica1', '/account/': 'default'})
+
+    def test_lagging_replica_is_skipped(self):
+        self.replica_lag.return_value = 60
+
+        with self.assertLogs('BlogBreeze.routers', 'WARNING'):
+            _, used = self.handle(RequestFactory().get('/'), views.PostListView.as_view())
+
+        self.assertEqual(used['read'], 'default')
+
+    def test_unavailable_replica_is_skipped(self):
+        self.replica_lag.side_effect = DatabaseError('connection refused')
+
+        with self.assertLogs('BlogBreeze.routers', 'WARNING'):
+            self.assertFalse(is_healthy('replica1'))
+
+    def test_health_is_checked_once_per_interval(self):
+        is_healthy('replica1')
+        is_healthy('replica1')
+
+        self.assertEqual(self.replica_lag.call_count, 1)
+
+        with mock.patch('BlogBreeze.routers.time.monotonic', return_value=_health['replica1'][1] + 16):
+            is_healthy('replica1')
+
+        self.assertEqual(self.replica_lag.call_count, 2)
+
+    def test_migrations_only_run_on_the_primary(self):
+        self.assertTrue(router.allow_migrate('default', 'blog'))
+        self.assertFalse(router.allow_migrate('replica1', 'blog'))
@@ -15,13 +15,45 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.contrib.admin.views.decorators import staff_member_required
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from django.utils.module_loading import import_string
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt
+from . import views
+
+
+def lazy_view(dotted_path):
+    """
+    Return a view that imports the view at ``dotted_path`` when first called,
+    so its module's dependencies are not loaded with the URLconf.
+    """
+    view = None
+
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path)
+        return view(request, *args, **kwargs)
+
+    return dispatch
+
+
+# The routes of ckeditor_uploader.urls. Its views import Pillow, requests and
+# the Cloudinary storage backend, which only the editor's uploads need, so they
+# are imported on the first upload rather than on every worker's first request.
+ckeditor_urlpatterns = [
+    re_path(r'^upload/', csrf_exempt(staff_member_required(lazy_view('ckeditor_uploader.views.upload'))), name='ckeditor_upload'),
+    re_path(r'^browse/', never_cache(staff_member_required(lazy_view('ckeditor_uploader.views.browse'))), name='ckeditor_browse'),
+]
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('ckeditor/', include('ckeditor_uploader.urls')),
+    path('ops/db-pool/', views.database_pool_stats, name='database_pool_stats'),
+    path('ckeditor/', include(ckeditor_urlpatterns)),
+    path('api/', include('blog.api_urls')),
     path('', include('blog.urls')),
     path('accounts/', include('accounts.urls')),
 ]
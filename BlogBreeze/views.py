@@ -0,0 +1,46 @@
+"""
+Operational endpoints for staff.
+"""
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import JsonResponse
+
+
+def pool_stats(alias):
+    """
+    Return connection pool statistics for ``alias`` with derived wait time and
+    saturation, or None when the alias does not use a pool.
+    """
+    pool = getattr(connections[alias], 'pool', None)
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    requests = stats.get('requests_num', 0)
+    in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+    return {
+        **stats,
+        'connections_in_use': in_use,
+        'saturation': round(in_use / stats['pool_max'], 3) if stats.get('pool_max') else None,
+        'avg_wait_ms': round(stats.get('requests_wait_ms', 0) / requests, 2) if requests else 0,
+    }
+
+
+@staff_member_required
+def database_pool_stats(request):
+    """
+    JSON snapshot of this worker process's database connection pools.
+    Counters are cumulative since the process started.
+    """
+    databases = {}
+    for alias in settings.DATABASES:
+        database = settings.DATABASES[alias]
+        databases[alias] = {
+            'vendor': connections[alias].vendor,
+            'pooled': bool(database.get('OPTIONS', {}).get('pool')),
+            'conn_max_age': database.get('CONN_MAX_AGE'),
+            'health_checks': database.get('CONN_HEALTH_CHECKS', False),
+            'server_side_cursors': not database.get('DISABLE_SERVER_SIDE_CURSORS', False),
+            'pool': pool_stats(alias),
+        }
+    return JsonResponse({'databases': databases})
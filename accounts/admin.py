@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from BlogBreeze.admin_utils import LargeTableAdminMixin
 from .models import UserProfile
 
 
@@ -14,11 +15,21 @@ class UserProfileInline(admin.StackedInline):
     fields = ('role', 'bio', 'avatar')
 
 
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     """
     Extended User admin with inline UserProfile.
+    Searches match a username prefix (indexed) or an exact email address
+    instead of substring scans over names and emails.
     """
     inlines = (UserProfileInline,)
+    list_display = ('username', 'email', 'role', 'is_staff', 'date_joined')
+    list_select_related = ('profile',)
+    search_fields = ('username__startswith', 'email__exact')
+    search_help_text = 'Search by the start of the username or by exact email address.'
+    
+    def role(self, obj):
+        """Display the profile role without a query per row."""
+        return obj.profile.get_role_display() if hasattr(obj, 'profile') else '-'
 
 
 # Unregister the default User admin and register our custom one
@@ -27,10 +38,12 @@ admin.site.register(User, UserAdmin)
 
 # Also register UserProfile separately for direct access
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('user', 'role', 'bio_preview')
     list_filter = ('role',)
-    search_fields = ('user__username', 'user__email', 'bio')
+    list_select_related = ('user',)
+    search_fields = ('user__username__startswith',)
+    autocomplete_fields = ('user',)
     
     def bio_preview(self, obj):
         """Display first 50 characters of bio."""
@@ -0,0 +1,48 @@
+"""
+Middleware exposing the current user's role as ``request.role``.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.models import User
+
+from .models import get_role
+
+PROFILE_BACKEND = 'accounts.backends.ProfileModelBackend'
+LEGACY_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class RoleMiddleware:
+    """
+    Set ``request.role`` to the user's ``Role`` (or None) for every request.
+    
+    Must come after AuthenticationMiddleware. Users are loaded through
+    ProfileModelBackend, so resolving the role costs no query beyond the
+    session user lookup that authentication already makes. Sessions created
+    before that backend was configured are moved over to it instead of being
+    logged out.
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.session.get(BACKEND_SESSION_KEY) == LEGACY_BACKEND:
+            request.session[BACKEND_SESSION_KEY] = PROFILE_BACKEND
+        request.role = get_role(request.user)
+        return self.get_response(request)
+    
+    async def __acall__(self, request):
+        if await request.session.aget(BACKEND_SESSION_KEY) == LEGACY_BACKEND:
+            await request.session.aset(BACKEND_SESSION_KEY, PROFILE_BACKEND)
+        user = await request.auser()
+        if user.is_authenticated and not User.profile.is_cached(user):
+            request.role = await sync_to_async(get_role)(user)
+        else:
+            request.role = get_role(user)
+        return await self.get_response(request)
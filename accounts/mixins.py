@@ -6,6 +6,7 @@ from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
 from django.contrib import messages
 from functools import wraps
+from .models import Role
 
 
 class RoleRequiredMixin(LoginRequiredMixin):
@@ -28,13 +29,13 @@ class RoleRequiredMixin(LoginRequiredMixin):
         if not request.user.is_authenticated:
             return self.handle_no_permission()
         
-        # Check if user has a profile
-        if not hasattr(request.user, 'profile'):
+        # Check if user has a profile (request.role is set by RoleMiddleware)
+        user_role = request.role
+        if user_role is None:
             messages.error(request, 'Your account does not have a valid profile.')
             raise PermissionDenied('User profile not found')
         
         # Check if user has one of the required roles
-        user_role = request.user.profile.role
         if user_role not in self.required_roles:
             messages.error(
                 request,
@@ -66,18 +67,18 @@ class AuthorRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
         """
         # Get the post object
         post = self.get_object()
-        user = self.request.user
         
         # Check if user has a profile
-        if not hasattr(user, 'profile'):
+        role = self.request.role
+        if role is None:
             return False
         
         # Allow if user is the author
-        if post.author == user:
+        if post.author_id == self.request.user.id:
             return True
         
         # Allow if user has admin role
-        if user.profile.role == 'admin':
+        if role == Role.ADMIN:
             return True
         
         return False
@@ -118,13 +119,13 @@ def role_required(roles):
                 messages.error(request, 'You must be logged in to access this page.')
                 raise PermissionDenied('Authentication required')
             
-            # Check if user has a profile
-            if not hasattr(request.user, 'profile'):
+            # Check if user has a profile (request.role is set by RoleMiddleware)
+            user_role = request.role
+            if user_role is None:
                 messages.error(request, 'Your account does not have a valid profile.')
                 raise PermissionDenied('User profile not found')
             
             # Check if user has one of the required roles
-            user_role = request.user.profile.role
             if user_role not in roles:
                 messages.error(
                     request,
@@ -167,7 +168,7 @@ def author_required(view_func):
             raise PermissionDenied('Authentication required')
         
         # Check if user has a profile
-        if not hasattr(request.user, 'profile'):
+        if request.role is None:
             messages.error(request, 'Your account does not have a valid profile.')
             raise PermissionDenied('User profile not found')
         
@@ -2,21 +2,27 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from BlogBreeze.models_utils import ChangeTrackingMixin
 
 
-class UserProfile(models.Model):
+class Role(models.TextChoices):
+    """
+    User roles. Compares equal to the plain strings stored in UserProfile.role.
+    """
+    ADMIN = 'admin', 'Admin'
+    AUTHOR = 'author', 'Author'
+    READER = 'reader', 'Reader'
+
+
+class UserProfile(ChangeTrackingMixin, models.Model):
     """
     Extended user profile with role-based permissions and additional information.
     Automatically created when a User is registered.
     """
-    ROLE_CHOICES = [
-        ('admin', 'Admin'),
-        ('author', 'Author'),
-        ('reader', 'Reader'),
-    ]
+    ROLE_CHOICES = Role.choices
     
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
-    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='reader')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default=Role.READER)
     bio = models.TextField(blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
     
@@ -41,6 +47,32 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, **kwargs):
     """
     Signal handler to save UserProfile when User is saved.
+    
+    Only a profile already loaded on the instance can carry unsaved changes,
+    so nothing is queried otherwise, and the profile itself skips the write
+    when none of its fields changed. Login's ``last_login`` update is ignored.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    if not User.profile.is_cached(instance):
+        return
+    try:
+        profile = instance.profile
+    except UserProfile.DoesNotExist:
+        return
+    profile.save()
+
+
+def get_role(user):
+    """
+    Return the user's Role, or None for anonymous users and users without a
+    profile. Makes no query when the profile was loaded with the user, as
+    ``accounts.backends.ProfileModelBackend`` does.
     """
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+    if not user.is_authenticated:
+        return None
+    try:
+        return Role(user.profile.role)
+    except UserProfile.DoesNotExist:
+        return None
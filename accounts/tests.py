@@ -1,3 +1,102 @@
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from blog.models import Post
+from .middleware import LEGACY_BACKEND, PROFILE_BACKEND
+from .models import Role, UserProfile
+
+
+class RoleAccessTests(TestCase):
+    """
+    Each role gets the protected views it is allowed and a 403 for the others.
+    """
+
+    def setUp(self):
+        self.reader = self.create_user('reader', Role.READER)
+        self.author = self.create_user('author', Role.AUTHOR)
+        self.other_author = self.create_user('other', Role.AUTHOR)
+        self.admin = self.create_user('admin', Role.ADMIN)
+        self.post = Post.objects.create(title='Owned', content='Body', author=self.author, status='published')
+
+    def create_user(self, username, role):
+        user = User.objects.create_user(username, f'{username}@example.com', 'password')
+        UserProfile.objects.filter(user=user).update(role=role)
+        return user
+
+    def assertStatuses(self, url, expected):
+        for user, status in expected.items():
+            with self.subTest(url=url, user=user.username):
+                self.client.force_login(user)
+                self.assertEqual(self.client.get(url).status_code, status)
+
+    def test_dashboard(self):
+        self.assertStatuses(reverse('accounts:dashboard'), {
+            self.reader: 403, self.author: 200, self.admin: 200,
+        })
+
+    def test_create_post(self):
+        self.assertStatuses(reverse('blog:post_create'), {
+            self.reader: 403, self.author: 200, self.admin: 200,
+        })
+
+    def test_edit_post(self):
+        self.assertStatuses(reverse('blog:post_update', kwargs={'slug': self.post.slug}), {
+            self.reader: 403, self.other_author: 403, self.author: 200, self.admin: 200,
+        })
+
+    def test_delete_post(self):
+        self.assertStatuses(reverse('blog:post_delete', kwargs={'slug': self.post.slug}), {
+            self.reader: 403, self.other_author: 403, self.author: 200, self.admin: 200,
+        })
+
+    def test_reader_cannot_delete_by_posting(self):
+        self.client.force_login(self.reader)
+
+        response = self.client.post(reverse('blog:post_delete', kwargs={'slug': self.post.slug}))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_user_without_profile_is_forbidden(self):
+        UserProfile.objects.filter(user=self.author).delete()
+
+        self.assertStatuses(reverse('accounts:dashboard'), {self.author: 403})
+
+    def test_anonymous_users_are_sent_to_login(self):
+        for url in (reverse('accounts:dashboard'), reverse('blog:post_create')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+
+                self.assertRedirects(response, f'{reverse("accounts:login")}?next={url}', fetch_redirect_response=False)
+
+
+class RoleMiddlewareTests(TestCase):
+    """
+    ``request.role`` is resolved once per request from the session user.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('author', 'author@example.com', 'password')
+        UserProfile.objects.filter(user=self.user).update(role=Role.AUTHOR)
+
+    def test_role_is_set_on_the_request(self):
+        self.client.force_login(self.user, backend=PROFILE_BACKEND)
+
+        response = self.client.get(reverse('blog:post_list'))
+
+        self.assertEqual(response.wsgi_request.role, Role.AUTHOR)
+
+    def test_anonymous_role_is_none(self):
+        response = self.client.get(reverse('blog:post_list'))
+
+        self.assertIsNone(response.wsgi_request.role)
+
+    def test_legacy_sessions_move_to_the_profile_backend(self):
+        self.client.force_login(self.user, backend=LEGACY_BACKEND)
+
+        response = self.client.get(reverse('accounts:dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.session[BACKEND_SESSION_KEY], PROFILE_BACKEND)
@@ -8,12 +8,15 @@ from django.db.models import Q
 from .forms import UserRegistrationForm
 from .mixins import RoleRequiredMixin
 from blog.models import Post
+from blog.ratelimit import RateLimitMixin
+from blog.stats import get_author_stats
 
 
-class UserRegistrationView(CreateView):
+class UserRegistrationView(RateLimitMixin, CreateView):
     """
     View for user registration with automatic Reader role assignment.
     """
+    ratelimit_scope = 'register'
     form_class = UserRegistrationForm
     template_name = 'accounts/register.html'
     success_url = reverse_lazy('accounts:login')
@@ -40,10 +43,11 @@ class UserRegistrationView(CreateView):
         return super().form_invalid(form)
 
 
-class UserLoginView(LoginView):
+class UserLoginView(RateLimitMixin, LoginView):
     """
     Custom login view using Django's built-in LoginView.
     """
+    ratelimit_scope = 'login'
     template_name = 'accounts/login.html'
     redirect_authenticated_user = True
     
@@ -78,7 +82,8 @@ def user_logout_view(request):
 class AuthorDashboardView(RoleRequiredMixin, ListView):
     """
     Dashboard view for authors and admins to manage their posts.
-    Displays all posts created by the current user with statistics.
+    Displays all posts created by the current user with statistics read from
+    the materialized AuthorDailyStats rows.
     """
     model = Post
     template_name = 'accounts/dashboard.html'
@@ -105,12 +110,14 @@ class AuthorDashboardView(RoleRequiredMixin, ListView):
         """
         context = super().get_context_data(**kwargs)
         
-        # Get all user posts for statistics
-        user_posts = Post.objects.filter(author=self.request.user)
-        
-        # Calculate draft and published counts
-        context['draft_count'] = user_posts.filter(status='draft').count()
-        context['published_count'] = user_posts.filter(status='published').count()
-        context['total_count'] = user_posts.count()
+        # Totals and the 30-day series come from the materialized daily stats
+        stats = get_author_stats(self.request.user.id, days=30)
+        totals = stats['totals']
+        context['draft_count'] = totals['drafts']
+        context['published_count'] = totals['published']
+        context['total_count'] = totals['posts']
+        context['comment_count'] = totals['comments']
+        context['view_count'] = totals['views']
+        context['daily_stats'] = stats['series']
         
         return context
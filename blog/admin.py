@@ -1,12 +1,55 @@
 from django.contrib import admin
-from .models import Category, Tag, Post, Comment
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+from accounts.models import Role
+from BlogBreeze.admin_utils import LargeTableAdminMixin
+from .models import Category, Tag, Post, Comment, OutboxEvent, Subscription, SlugHistory
+
+
+class AuthorListFilter(admin.SimpleListFilter):
+    """
+    Filter posts by author, listing only users with the author or admin role
+    instead of every registered user.
+    """
+    title = 'author'
+    parameter_name = 'author'
+    
+    def lookups(self, request, model_admin):
+        return User.objects.filter(
+            profile__role__in=[Role.AUTHOR, Role.ADMIN]
+        ).order_by('username').values_list('id', 'username')
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(author_id=self.value())
+        return queryset
+
+
+def slug_or_username_search(queryset, search_term, slug_field, user_field):
+    """
+    Filter ``queryset`` to rows whose ``slug_field`` starts with the slugified
+    search term or whose ``user_field`` is the user with that exact username.
+    Both conditions can use an index, unlike ``icontains`` on titles or content.
+    """
+    search_term = search_term.strip()
+    if not search_term:
+        return queryset
+    condition = Q(**{f'{slug_field}__startswith': slugify(search_term)})
+    user_id = User.objects.filter(username=search_term).values_list('id', flat=True).first()
+    if user_id is not None:
+        condition |= Q(**{user_field: user_id})
+    return queryset.filter(condition)
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug', 'created_at']
+    list_display = ['name', 'slug', 'parent', 'created_at']
+    list_select_related = ['parent']
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ['name', 'description']
+    autocomplete_fields = ['parent']
 
 
 @admin.register(Tag)
@@ -17,15 +60,20 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['title', 'author', 'category', 'status', 'created_at', 'updated_at']
-    list_filter = ['status', 'category', 'created_at', 'author']
-    search_fields = ['title', 'content']
+    list_filter = ['status', 'category', 'created_at', AuthorListFilter]
+    list_select_related = ['author', 'category']
+    changelist_defer = ['content']
+    search_fields = ['slug']
+    search_help_text = 'Search by the start of the title or by exact author username.'
     prepopulated_fields = {'slug': ('title',)}
-    filter_horizontal = ['tags']
-    date_hierarchy = 'created_at'
+    autocomplete_fields = ['author', 'category', 'tags']
     ordering = ['-created_at']
     
+    def get_search_results(self, request, queryset, search_term):
+        return slug_or_username_search(queryset, search_term, 'slug', 'author_id'), False
+    
     fieldsets = (
         ('Basic Information', {
             'fields': ('title', 'slug', 'author', 'category')
@@ -40,23 +88,66 @@ class PostAdmin(admin.ModelAdmin):
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ['user', 'post', 'content_preview', 'is_approved', 'created_at']
     list_filter = ['is_approved', 'created_at']
-    search_fields = ['user__username', 'post__title', 'content']
+    list_select_related = ['user', 'post']
+    # Only the post title is displayed; skip its body and description
+    changelist_defer = ['post__content', 'post__description']
+    search_fields = ['post__slug']
+    search_help_text = 'Search by the start of the post title or by exact commenter username.'
+    autocomplete_fields = ['post', 'user']
+    # Paths are fixed when a comment is created, so replies cannot be moved
+    readonly_fields = ['parent', 'depth', 'child_count']
     actions = ['approve_comments', 'unapprove_comments']
-    date_hierarchy = 'created_at'
+    
+    def get_search_results(self, request, queryset, search_term):
+        return slug_or_username_search(queryset, search_term, 'post__slug', 'user_id'), False
     
     def content_preview(self, obj):
         return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
     content_preview.short_description = 'Content'
     
     def approve_comments(self, request, queryset):
-        queryset.update(is_approved=True)
-        self.message_user(request, f'{queryset.count()} comments approved.')
+        # One UPDATE; its rowcount is the number of comments that changed
+        updated = queryset.filter(is_approved=False).update(is_approved=True)
+        self.message_user(request, f'{updated} comments approved.')
     approve_comments.short_description = 'Approve selected comments'
     
     def unapprove_comments(self, request, queryset):
-        queryset.update(is_approved=False)
-        self.message_user(request, f'{queryset.count()} comments unapproved.')
+        updated = queryset.filter(is_approved=True).update(is_approved=False)
+        self.message_user(request, f'{updated} comments unapproved.')
     unapprove_comments.short_description = 'Unapprove selected comments'
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['id', 'event_type', 'post_id', 'status', 'attempts', 'next_attempt_at', 'created_at']
+    list_filter = ['status', 'event_type']
+    readonly_fields = ['event_type', 'post_id', 'payload', 'delivered_sinks', 'created_at', 'delivered_at']
+    actions = ['retry_events']
+    
+    def retry_events(self, request, queryset):
+        updated = queryset.exclude(status=OutboxEvent.STATUS_DELIVERED).update(
+            status=OutboxEvent.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+        )
+        self.message_user(request, f'{updated} events queued for redelivery.')
+    retry_events.short_description = 'Retry delivery of selected events'
+
+
+@admin.register(Subscription)
+class SubscriptionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['user', 'author', 'category', 'tag', 'delivery', 'created_at']
+    list_filter = ['delivery']
+    list_select_related = ['user', 'author', 'category', 'tag']
+    raw_id_fields = ['user', 'author']
+    search_fields = ['user__username__startswith']
+
+
+@admin.register(SlugHistory)
+class SlugHistoryAdmin(admin.ModelAdmin):
+    list_display = ['old_slug', 'current_slug', 'kind', 'created_at']
+    list_filter = ['kind']
+    search_fields = ['old_slug', 'current_slug']
@@ -0,0 +1,342 @@
+"""
+Read-only JSON API for published posts, their comments, categories and tags.
+
+Rows are read with ``values()`` and serialized as they are, without building
+model instances. ``?fields=title,slug,content`` selects the fields returned
+(and fetched: bodies are only read when ``content`` is asked for). Lists use
+cursor pagination: ``next`` links carry the sort key of the last row, so every
+page is an index range scan however deep the reader goes. Responses have an
+ETag and answer ``If-None-Match`` with 304 Not Modified.
+
+Bodies are encoded with orjson when it is installed, and the standard library
+``json`` module otherwise.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, set_response_etag
+from django.utils.dateparse import parse_datetime
+from django.views import View
+
+from .compression import decompress_text
+from .models import Category, Comment, Post, Tag
+from .transfer import ContentEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data):
+    """
+    Encode ``data`` as JSON bytes. Both encoders write datetimes in ISO 8601.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, cls=ContentEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def json_response(request, data, status=200):
+    """
+    Return ``data`` as JSON. Successful responses get an ETag, public caching
+    for API_CACHE_MAX_AGE seconds and a 304 when the client's copy is current.
+    """
+    response = HttpResponse(dumps(data), content_type='application/json', status=status)
+    if status != 200:
+        return response
+    set_response_etag(response)
+    patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE)
+    return get_conditional_response(request, etag=response['ETag'], response=response)
+
+
+class APIError(Exception):
+    """
+    Error reported to the client as ``{"error": message}``.
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(dumps(values)).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    """
+    Return the sort key values encoded in ``cursor``, or raise APIError.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if len(values) != len(keys):
+            raise ValueError
+        values = [parse_datetime(value) if key.endswith('_at') else int(value) for key, value in zip(keys, values)]
+        # parse_datetime returns None for strings that are not datetimes
+        if None in values:
+            raise ValueError
+        return values
+    except (ValueError, TypeError):
+        raise APIError('Invalid cursor.')
+
+
+def keyset_filter(keys, values, descending):
+    """
+    Return a Q matching rows after ``values`` in the ``keys`` ordering, e.g.
+    ``created_at < t OR (created_at = t AND id < i)`` for a descending order.
+    """
+    lookup = 'lt' if descending else 'gt'
+    condition, equal = Q(), {}
+    for key, value in zip(keys, values):
+        condition |= Q(**equal, **{f'{key}__{lookup}': value})
+        equal[key] = value
+    return condition
+
+
+class APIView(View):
+    """
+    Base class for API endpoints: JSON errors and ``?fields=`` parsing.
+
+    Attributes:
+        fields: API field name -> ``values()`` lookup
+        computed_fields: API field name -> lookups it is built from
+        default_fields: Fields returned without ``?fields=``
+    """
+    http_method_names = ['get', 'head', 'options']
+    fields = {}
+    computed_fields = {}
+    default_fields = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except APIError as error:
+            return json_response(request, {'error': str(error)}, status=error.status)
+        except Http404:
+            return json_response(request, {'error': 'Not found.'}, status=404)
+
+    def get_fields(self):
+        """
+        Return the requested API field names, or raise APIError for unknown ones.
+        """
+        requested = self.request.GET.get('fields')
+        if not requested:
+            return list(self.default_fields)
+        names = list(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields and name not in self.computed_fields]
+        if unknown:
+            raise APIError(f'Unknown fields: {", ".join(unknown)}.')
+        return names
+
+    def get_lookups(self, names, required=()):
+        """
+        Return the ``values()`` lookups needed for ``names``, plus ``required``.
+        """
+        lookups = list(required)
+        for name in names:
+            for lookup in self.computed_fields.get(name, [self.fields.get(name)]):
+                if lookup and lookup not in lookups:
+                    lookups.append(lookup)
+        return lookups
+
+    def serialize(self, rows, names):
+        """
+        Return the output dicts for ``rows`` with the ``names`` fields.
+        """
+        computed = {name: self.compute(name, rows) for name in names if name in self.computed_fields}
+        return [
+            {
+                name: computed[name][index] if name in computed else row[self.fields[name]]
+                for name in names
+            }
+            for index, row in enumerate(rows)
+        ]
+
+    def compute(self, name, rows):
+        """
+        Return the values of computed field ``name`` for ``rows``, in order.
+        """
+        raise NotImplementedError
+
+
+class APIListView(APIView):
+    """
+    Cursor-paginated list endpoint.
+
+    Attributes:
+        ordering: Unique sort key lookups, e.g. ``('created_at', 'id')``
+        descending: Whether the list is newest/largest first
+    """
+    ordering = ('id',)
+    descending = False
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_limit(self):
+        try:
+            limit = int(self.request.GET.get('limit', settings.API_PAGE_SIZE))
+        except ValueError:
+            raise APIError('Invalid limit.')
+        return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+    def get(self, request, *args, **kwargs):
+        names = self.get_fields()
+        limit = self.get_limit()
+        queryset = self.get_queryset()
+        cursor = request.GET.get('cursor')
+        if cursor:
+            queryset = queryset.filter(keyset_filter(self.ordering, decode_cursor(cursor, self.ordering), self.descending))
+        order = [f'-{key}' if self.descending else key for key in self.ordering]
+        rows = list(queryset.order_by(*order).values(*self.get_lookups(names, self.ordering))[:limit + 1])
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            params = request.GET.copy()
+            params['cursor'] = encode_cursor([rows[-1][key] for key in self.ordering])
+            next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+        return json_response(request, {'results': self.serialize(rows, names), 'next': next_url})
+
+
+class PostFieldsMixin:
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+        'content': 'content',
+        'author': 'author__username',
+        'category': 'category__slug',
+        'featured_image': 'featured_image',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    computed_fields = {
+        'tags': ['id'],
+        'url': ['slug'],
+        'featured_image': ['featured_image'],
+        'content': ['content'],
+    }
+    default_fields = (
+        'id', 'title', 'slug', 'description', 'author', 'category', 'tags', 'created_at', 'updated_at', 'url',
+    )
+
+    def compute(self, name, rows):
+        if name == 'tags':
+            tags = {}
+            for post_id, slug in Post.tags.through.objects.filter(
+                post_id__in=[row['id'] for row in rows]
+            ).order_by('tag__name').values_list('post_id', 'tag__slug'):
+                tags.setdefault(post_id, []).append(slug)
+            return [tags.get(row['id'], []) for row in rows]
+        if name == 'url':
+            return [self.request.build_absolute_uri(reverse('blog:post_detail', args=[row['slug']])) for row in rows]
+        if name == 'content':
+            return [decompress_text(row['content']) for row in rows]
+        storage = Post._meta.get_field('featured_image').storage
+        return [storage.url(row['featured_image']) if row['featured_image'] else None for row in rows]
+
+
+class PostListAPIView(PostFieldsMixin, APIListView):
+    """
+    ``GET /api/posts/``: published posts, newest first. Filter with
+    ``?category=<slug>`` (including its subcategories), ``?tag=<slug>`` and
+    ``?author=<username>``.
+    """
+    ordering = ('created_at', 'id')
+    descending = True
+
+    def get_queryset(self):
+        queryset = Post.objects.filter(status='published')
+        for param, lookup in (
+            ('category', 'category__ancestor_links__ancestor__slug'),
+            ('tag', 'tags__slug'),
+            ('author', 'author__username'),
+        ):
+            if self.request.GET.get(param):
+                queryset = queryset.filter(**{lookup: self.request.GET[param]})
+        return queryset
+
+
+class PostDetailAPIView(PostFieldsMixin, APIView):
+    """
+    ``GET /api/posts/<slug>/``: one published post, including its content.
+    """
+    default_fields = PostFieldsMixin.default_fields + ('content',)
+
+    def get(self, request, slug):
+        names = self.get_fields()
+        rows = list(Post.objects.filter(status='published', slug=slug).values(*self.get_lookups(names, ['id'])))
+        if not rows:
+            raise Http404
+        return json_response(request, self.serialize(rows, names)[0])
+
+
+class CommentListAPIView(APIListView):
+    """
+    ``GET /api/posts/<slug>/comments/``: approved comments on a published post,
+    oldest first. ``parent`` is the ID of the comment replied to (null for
+    top-level comments).
+    """
+    fields = {
+        'id': 'id',
+        'user': 'user__username',
+        'content': 'content',
+        'parent': 'parent_id',
+        'depth': 'depth',
+        'reply_count': 'child_count',
+        'created_at': 'created_at',
+    }
+    default_fields = ('id', 'user', 'content', 'parent', 'depth', 'reply_count', 'created_at')
+    ordering = ('created_at', 'id')
+
+    def get_queryset(self):
+        post = get_object_or_404(Post.objects.only('id'), status='published', slug=self.kwargs['slug'])
+        return Comment.objects.filter(post=post, is_approved=True)
+
+
+class CategoryListAPIView(APIListView):
+    """
+    ``GET /api/categories/``: all categories. ``parent`` is the slug of the
+    enclosing category (null for top-level ones).
+    """
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+        'description': 'description',
+        'parent': 'parent__slug',
+    }
+    computed_fields = {'url': ['slug']}
+    default_fields = ('id', 'name', 'slug', 'description', 'parent', 'url')
+
+    def get_queryset(self):
+        return Category.objects.all()
+
+    def compute(self, name, rows):
+        return [self.request.build_absolute_uri(reverse('blog:category_posts', args=[row['slug']])) for row in rows]
+
+
+class TagListAPIView(APIListView):
+    """
+    ``GET /api/tags/``: all tags.
+    """
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+    }
+    computed_fields = {'url': ['slug']}
+    default_fields = ('id', 'name', 'slug', 'url')
+
+    def get_queryset(self):
+        return Tag.objects.all()
+
+    def compute(self, name, rows):
+        return [self.request.build_absolute_uri(reverse('blog:tag_posts', args=[row['slug']])) for row in rows]
@@ -0,0 +1,12 @@
+from django.urls import path
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', api.PostListAPIView.as_view(), name='post_list'),
+    path('posts/<slug:slug>/', api.PostDetailAPIView.as_view(), name='post_detail'),
+    path('posts/<slug:slug>/comments/', api.CommentListAPIView.as_view(), name='comment_list'),
+    path('categories/', api.CategoryListAPIView.as_view(), name='category_list'),
+    path('tags/', api.TagListAPIView.as_view(), name='tag_list'),
+]
@@ -7,7 +7,8 @@ class BlogConfig(AppConfig):
     
     def ready(self):
         """
-        Import signal handlers when the app is ready.
-        This ensures signals are registered when Django starts.
+        Import signal handlers and system checks when the app is ready.
+        This ensures they are registered when Django starts.
         """
+        import blog.checks  # noqa: F401
         import blog.signals  # noqa: F401
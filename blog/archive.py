@@ -0,0 +1,135 @@
+"""
+Date-based archive of published posts.
+
+MonthlyArchive holds the number of published posts per month and is kept
+current by the post signals: publishing adds one to the post's month,
+unpublishing or deleting a published post takes one away. The archive sidebar
+and the archive pages' pagination read these rows instead of counting posts,
+and the pages themselves fetch posts with a ``created_at`` range on the
+``(status, created_at)`` index.
+
+Months follow the site time zone (``TIME_ZONE``). The migration that creates
+the table fills it from the existing posts; rebuild it with
+``python manage.py rebuild_archive`` after bulk changes that skip signals.
+"""
+import logging
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import MonthlyArchive, Post
+
+logger = logging.getLogger(__name__)
+
+
+def month_range(year, month=None):
+    """
+    Return the aware ``(start, end)`` datetimes of a month, or of a whole year
+    when ``month`` is None. ``end`` is exclusive.
+    """
+    start = timezone.make_aware(datetime(year, month or 1, 1))
+    if month is None or month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1))
+    return start, end
+
+
+def record_published(created_at, delta):
+    """
+    Add ``delta`` (1 or -1) to the published count of ``created_at``'s month.
+    """
+    local = timezone.localtime(created_at)
+    rows = MonthlyArchive.objects.filter(year=local.year, month=local.month)
+    if delta < 0:
+        if not rows.filter(published_count__gte=-delta).update(published_count=F('published_count') + delta):
+            logger.warning(
+                f'Archive month {local.year}-{local.month:02} has no published post to remove; '
+                'run rebuild_archive to reconcile the counts'
+            )
+        return
+    if rows.update(published_count=F('published_count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            MonthlyArchive.objects.create(year=local.year, month=local.month, published_count=delta)
+    except IntegrityError:
+        # Another request created the row first
+        rows.update(published_count=F('published_count') + delta)
+
+
+def get_archive_count(year, month=None):
+    """
+    Return the number of published posts in a month or year.
+    """
+    rows = MonthlyArchive.objects.filter(year=year)
+    if month is not None:
+        rows = rows.filter(month=month)
+    return rows.aggregate(total=Sum('published_count'))['total'] or 0
+
+
+def get_archive_years():
+    """
+    Return ``[{'year', 'count', 'months': [MonthlyArchive, ...]}, ...]``,
+    newest first, for the months that have published posts.
+    """
+    years = []
+    for row in MonthlyArchive.objects.filter(published_count__gt=0):
+        if not years or years[-1]['year'] != row.year:
+            years.append({'year': row.year, 'count': 0, 'months': []})
+        years[-1]['count'] += row.published_count
+        years[-1]['months'].append(row)
+    return years
+
+
+def rebuild_archive():
+    """
+    Recompute MonthlyArchive from the published posts. Returns the number of
+    month rows written.
+    """
+    rows = [
+        MonthlyArchive(year=month.year, month=month.month, published_count=count)
+        for month, count in (
+            Post.objects.filter(status='published')
+            .annotate(month=TruncMonth('created_at'))
+            .values('month')
+            .annotate(count=Count('id'))
+            .values_list('month', 'count')
+            .order_by()
+        )
+    ]
+    with transaction.atomic():
+        MonthlyArchive.objects.all().delete()
+        MonthlyArchive.objects.bulk_create(rows)
+    return len(rows)
+
+
+class ArchivePostList:
+    """
+    Published posts of a month or year, newest first, for Paginator. The count
+    comes from MonthlyArchive; a slice first reads the page's IDs from the
+    ``(status, created_at, id)`` index, then loads just those posts.
+    """
+
+    def __init__(self, year, month=None):
+        self.year, self.month = year, month
+        start, end = month_range(year, month)
+        self.ids = Post.objects.filter(
+            status='published', created_at__gte=start, created_at__lt=end
+        ).order_by('-created_at', '-id').values_list('id', flat=True)
+
+    def count(self):
+        return get_archive_count(self.year, self.month)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        ids = list(self.ids[index])
+        posts = Post.objects.select_related('author', 'category').prefetch_related('tags').in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
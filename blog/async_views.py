@@ -0,0 +1,255 @@
+"""
+Async variants of the read-heavy blog views.
+
+These views are served instead of their sync counterparts in ``blog/views.py``
+when ``BLOG_ASYNC_VIEWS`` is enabled, which is the default under the ASGI entry
+point (``BlogBreeze/asgi.py``). Database work goes through Django's async ORM
+so a slow query suspends the request instead of blocking a whole worker, and
+independent queries (comments and related posts) are awaited concurrently.
+
+Querysets and template context come from the builders in ``blog/views.py``
+(``post_queryset``, ``category_context`` and friends); only the calls that
+load data differ. Templates are still rendered in a worker thread because the
+shared templates touch sync-only objects such as ``request.user`` and the
+session.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.urls import reverse
+from django.views import View
+
+from .categories import aget_subtree_post_counts, build_tree, get_ancestors, posts_under
+from .models import Post, Category, Tag
+from .pageviews import record_view
+from .ratelimit import RateLimitMixin
+from .slugs import afind_current_slug
+from .threads import PAGE_PARAM, thread_comments, thread_paths
+from . import views
+
+
+async def redirect_old_slug(request, kind, kwargs):
+    """
+    Return a permanent redirect from a renamed object's old slug, or raise Http404.
+    """
+    current_slug = await afind_current_slug(kind, kwargs['slug'])
+    if current_slug is None:
+        raise Http404('No object found matching the query')
+    url = reverse(request.resolver_match.view_name, kwargs={**kwargs, 'slug': current_slug})
+    if request.GET:
+        url = f'{url}?{request.GET.urlencode()}'
+    return redirect(url, permanent=True)
+
+
+async def fetch_list(queryset):
+    """
+    Evaluate a queryset (including its prefetches) without blocking the event loop.
+    """
+    return [obj async for obj in queryset]
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator whose total count has already been fetched with ``acount()``.
+    Prevents the sync ``count()`` query from running inside the event loop.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.__dict__['count'] = count
+
+
+class AsyncPostListMixin:
+    """
+    Shared pagination and rendering for async post listings.
+    Mirrors the context produced by Django's ListView so the same templates work.
+    """
+    template_name = None
+    paginate_by = 10
+    page_kwarg = 'page'
+    slug_kind = None
+
+    async def get_queryset(self):
+        raise NotImplementedError
+
+    async def get_context_data(self, **kwargs):
+        return kwargs
+
+    async def paginate_queryset(self, queryset):
+        """
+        Return the pagination context for ``queryset`` using async queries only.
+        """
+        count = await queryset.acount()
+        paginator = CountedPaginator(queryset, self.paginate_by, count)
+        page_number = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1
+        if page_number == 'last':
+            page_number = paginator.num_pages
+        try:
+            page = paginator.page(page_number)
+        except (InvalidPage, ValueError):
+            raise Http404('Invalid page.')
+        page.object_list = await fetch_list(page.object_list)
+        return {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'posts': page.object_list,
+        }
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            queryset = await self.get_queryset()
+        except Http404:
+            if self.slug_kind is None:
+                raise
+            return await redirect_old_slug(request, self.slug_kind, kwargs)
+        context = await self.paginate_queryset(queryset)
+        context = await self.get_context_data(**context)
+        return await sync_to_async(render)(request, self.template_name, context)
+
+
+class PostListView(AsyncPostListMixin, View):
+    """
+    Async version of ``blog.views.PostListView``.
+    """
+    template_name = 'blog/post_list.html'
+
+    async def get_queryset(self):
+        return views.post_queryset(self.request)
+
+    async def get_context_data(self, **kwargs):
+        kwargs.update(views.hero_context(kwargs['posts']))
+        return kwargs
+
+
+class CategoryPostListView(AsyncPostListMixin, View):
+    """
+    Async version of ``blog.views.CategoryPostListView``.
+    """
+    template_name = 'blog/category_posts.html'
+    slug_kind = 'category'
+
+    async def get_queryset(self):
+        self.category = await aget_object_or_404(Category, slug=self.kwargs['slug'])
+        return views.post_queryset(self.request, posts_under(self.category))
+
+    async def get_context_data(self, **kwargs):
+        ancestors, subcategories, counts = await asyncio.gather(
+            fetch_list(get_ancestors(self.category)),
+            fetch_list(self.category.children.order_by('name')),
+            aget_subtree_post_counts(),
+        )
+        kwargs.update(views.category_context(self.category, ancestors, subcategories, counts))
+        return kwargs
+
+
+class TagPostListView(AsyncPostListMixin, View):
+    """
+    Async version of ``blog.views.TagPostListView``.
+    """
+    template_name = 'blog/tag_posts.html'
+    slug_kind = 'tag'
+
+    async def get(self, request, *args, **kwargs):
+        # Faceted filtering works on in-memory bitmaps, so the sync view is used
+        if any(name in request.GET for name in views.FACET_PARAMS):
+            facet_view = sync_to_async(views.FacetPostListView.as_view())
+            return await facet_view(request, tags=kwargs['slug'], page=kwargs.get('page'))
+        return await super().get(request, *args, **kwargs)
+
+    async def get_queryset(self):
+        self.tag = await aget_object_or_404(Tag, slug=self.kwargs['slug'])
+        return views.post_queryset(self.request, Post.objects.filter(tags=self.tag))
+
+    async def get_context_data(self, **kwargs):
+        kwargs['tag'] = self.tag
+        return kwargs
+
+
+class SearchView(RateLimitMixin, AsyncPostListMixin, View):
+    """
+    Async version of ``blog.views.SearchView``.
+    """
+    template_name = 'blog/search_results.html'
+    ratelimit_scope = 'search'
+    ratelimit_methods = ('GET', 'HEAD')
+
+    async def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        queryset = Post.objects.filter(views.search_filter(self.query)) if self.query else None
+        return views.post_queryset(self.request, queryset)
+
+    async def get_context_data(self, **kwargs):
+        kwargs.update(views.search_context(self.query))
+        return kwargs
+
+
+class CategoryListView(View):
+    """
+    Async version of ``blog.views.CategoryListView``.
+    """
+    template_name = 'blog/category_list.html'
+
+    async def get(self, request, *args, **kwargs):
+        categories, counts = await asyncio.gather(
+            fetch_list(Category.objects.all().order_by('name')),
+            aget_subtree_post_counts(),
+        )
+        context = {
+            'categories': categories,
+            'object_list': categories,
+            'category_tree': build_tree(categories, counts),
+        }
+        return await sync_to_async(render)(request, self.template_name, context)
+
+
+class PostDetailView(View):
+    """
+    Async version of ``blog.views.PostDetailView``.
+    Comments and related posts are fetched concurrently once the post is loaded.
+    Comment submissions are delegated to the sync view.
+    """
+    template_name = 'blog/post_detail.html'
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            post = await Post.objects.select_related('author', 'category').prefetch_related(
+                'tags'
+            ).aget(slug=self.kwargs['slug'])
+        except Post.DoesNotExist:
+            return await redirect_old_slug(request, 'post', self.kwargs)
+
+        (comment_page, comments), comment_count, related = await asyncio.gather(
+            self.get_comment_page(post),
+            post.comments.filter(is_approved=True).acount(),
+            fetch_list(views.related_posts(post)),
+        )
+
+        if post.status == 'published':
+            record_view(post.id)
+
+        # Splitting the body is CPU work and decompressing it can query for its
+        # dictionary, so neither runs in the event loop
+        minutes = await sync_to_async(views.read_time)(post)
+        context = {'post': post, 'object': post}
+        context.update(views.post_detail_context(comment_page, comments, comment_count, minutes, related))
+        return await sync_to_async(render)(request, self.template_name, context)
+
+    async def get_comment_page(self, post):
+        """
+        Return the requested page of threads and all comments in them, as
+        ``blog.threads.get_comment_page`` does.
+        """
+        paths = thread_paths(post)
+        paginator = CountedPaginator(paths, settings.COMMENT_THREADS_PER_PAGE, await paths.acount())
+        page = paginator.get_page(self.request.GET.get(PAGE_PARAM))
+        page.object_list = await fetch_list(page.object_list)
+        return page, await fetch_list(thread_comments(post, page.object_list))
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(views.PostDetailView.as_view())(request, *args, **kwargs)
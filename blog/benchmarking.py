@@ -0,0 +1,144 @@
+"""
+Small helpers shared by the benchmark management commands.
+"""
+import socket
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def percentile(values, pct):
+    """
+    Return the ``pct`` percentile of ``values`` (nearest-rank).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """
+    Build a result dict from per-request latencies (seconds) and wall time.
+    """
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def format_summary(label, result):
+    """
+    Render a result dict from ``summarize`` as a single report line.
+    """
+    return (
+        f'{label:<24} {result["throughput"]:>9.1f} req/s  '
+        f'p50 {result["p50_ms"]:>7.1f} ms  p95 {result["p95_ms"]:>7.1f} ms  '
+        f'p99 {result["p99_ms"]:>7.1f} ms  errors {result["errors"]}'
+    )
+
+
+def run_concurrently(func, jobs, concurrency):
+    """
+    Call ``func(job)`` for every job on a thread pool and time each call.
+    ``func`` returns True on success. Returns a ``summarize`` result.
+    """
+    latencies = []
+    errors = 0
+
+    def timed(job):
+        started = time.perf_counter()
+        ok = func(job)
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ok, latency in pool.map(timed, jobs):
+            latencies.append(latency)
+            if not ok:
+                errors += 1
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def fetch(url, timeout=30):
+    """
+    GET ``url`` and return True for a 2xx/3xx response.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            return response.status < 400
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def wait_for_port(host, port, timeout=30):
+    """
+    Block until a TCP server accepts connections on ``host:port``.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def stop_process(process, timeout=10):
+    """
+    Terminate a server subprocess, killing it if it does not exit in time.
+    """
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def child_pids(pid):
+    """
+    Return the PIDs of the direct children of process ``pid`` (Linux only).
+    """
+    children = []
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            # The command name in parentheses may contain spaces
+            fields = stat.read_text().rpartition(')')[2].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(stat.parent.name))
+    return sorted(children)
+
+
+def process_memory(pid):
+    """
+    Return the memory of process ``pid`` in KiB (Linux only): ``rss``, ``pss``
+    (shared pages divided among the processes sharing them) and ``uss``
+    (pages private to the process).
+    """
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                values[key] = int(value.split()[0])
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'uss': values['Private_Clean'] + values['Private_Dirty'],
+    }
@@ -0,0 +1,153 @@
+"""
+Category hierarchy.
+
+Categories nest through ``Category.parent``. ``CategoryClosure`` stores every
+ancestor/descendant pair, each category being its own ancestor at depth 0,
+so "all posts under X" is one join through an indexed column
+(``posts_under``) instead of a recursive walk, and ancestors for breadcrumbs
+are one query too. The category signal handlers keep the closure rows in
+step whenever a category is created, moved or deleted.
+
+Published post counts per subtree are computed with one grouped query and
+cached under a version number, which is bumped when the hierarchy changes and
+when posts are published, updated, withdrawn or deleted. Without a shared
+cache backend other processes see new counts once COUNTS_TIMEOUT has passed.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Category, CategoryClosure, Post
+
+COUNTS_VERSION_KEY = 'blog:category-counts:version'
+COUNTS_TIMEOUT = 60 * 10
+
+
+def place_category(category, created=False):
+    """
+    Bring the closure rows of ``category`` and its subtree in line with its
+    parent, after the category was created or moved. Raises ValueError if the
+    parent is the category itself or one of its descendants.
+    """
+    if created:
+        CategoryClosure.objects.create(ancestor=category, descendant=category, depth=0)
+    subtree = list(CategoryClosure.objects.filter(ancestor=category).values_list('descendant_id', 'depth'))
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+    if category.parent_id in subtree_ids:
+        raise ValueError('A category cannot be placed under itself or one of its subcategories.')
+    # Unlink the subtree from its old ancestors, then link it to the new ones
+    CategoryClosure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+    if category.parent_id is not None:
+        ancestors = CategoryClosure.objects.filter(descendant_id=category.parent_id).values_list('ancestor_id', 'depth')
+        CategoryClosure.objects.bulk_create([
+            CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=above + below + 1)
+            for ancestor_id, above in ancestors
+            for descendant_id, below in subtree
+        ])
+
+
+def detach_category(category):
+    """
+    Unlink the subcategories of ``category`` from its ancestors before it is
+    deleted; its children become top-level categories. The category's own
+    closure rows are removed by the cascade.
+    """
+    CategoryClosure.objects.filter(
+        ancestor_id__in=CategoryClosure.objects.filter(descendant=category, depth__gt=0).values('ancestor_id'),
+        descendant_id__in=CategoryClosure.objects.filter(ancestor=category, depth__gt=0).values('descendant_id'),
+    ).delete()
+
+
+def rebuild_closure():
+    """
+    Recreate every closure row from the parent links, for categories inserted
+    without signals (``bulk_create`` during imports).
+    """
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    links = []
+    for category_id in parents:
+        ancestor_id, depth = category_id, 0
+        while ancestor_id is not None and depth <= len(parents):
+            links.append(CategoryClosure(ancestor_id=ancestor_id, descendant_id=category_id, depth=depth))
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    CategoryClosure.objects.all().delete()
+    CategoryClosure.objects.bulk_create(links, batch_size=1000)
+    invalidate_category_counts()
+
+
+def posts_under(category):
+    """
+    Return the posts in ``category`` and all its subcategories.
+    """
+    return Post.objects.filter(category__ancestor_links__ancestor=category)
+
+
+def get_ancestors(category):
+    """
+    Return a queryset of the categories above ``category``, outermost first.
+    """
+    return Category.objects.filter(
+        descendant_links__descendant=category, descendant_links__depth__gt=0
+    ).order_by('-descendant_links__depth')
+
+
+def invalidate_category_counts():
+    """
+    Invalidate the cached subtree post counts by moving to a new version.
+    """
+    try:
+        cache.incr(COUNTS_VERSION_KEY)
+    except ValueError:
+        cache.set(COUNTS_VERSION_KEY, 1, None)
+
+
+def counts_query():
+    return CategoryClosure.objects.filter(descendant__posts__status='published').values('ancestor_id').annotate(
+        count=Count('descendant__posts')
+    ).values_list('ancestor_id', 'count')
+
+
+def get_subtree_post_counts():
+    """
+    Return ``{category_id: published posts in the category and its subcategories}``.
+    Categories without published posts are left out.
+    """
+    key = f'blog:category-counts:{cache.get(COUNTS_VERSION_KEY, 0)}'
+    counts = cache.get(key)
+    if counts is None:
+        counts = dict(counts_query())
+        cache.set(key, counts, COUNTS_TIMEOUT)
+    return counts
+
+
+async def aget_subtree_post_counts():
+    """
+    Async version of ``get_subtree_post_counts``.
+    """
+    key = f'blog:category-counts:{await cache.aget(COUNTS_VERSION_KEY, 0)}'
+    counts = await cache.aget(key)
+    if counts is None:
+        counts = {category_id: count async for category_id, count in counts_query()}
+        await cache.aset(key, counts, COUNTS_TIMEOUT)
+    return counts
+
+
+def build_tree(categories, counts):
+    """
+    Arrange ``categories`` (all of them, in display order) into a tree and
+    return the top-level ones. Each category gets ``subcategories``, ``level``
+    and ``post_count`` (published posts in its subtree) attributes.
+    """
+    by_id = {category.id: category for category in categories}
+    roots = []
+    for category in categories:
+        category.subcategories = []
+        category.post_count = counts.get(category.id, 0)
+    for category in categories:
+        parent = by_id.get(category.parent_id)
+        (parent.subcategories if parent else roots).append(category)
+    stack = [(root, 0) for root in roots]
+    while stack:
+        category, level = stack.pop()
+        category.level = level
+        stack.extend((child, level + 1) for child in category.subcategories)
+    return roots
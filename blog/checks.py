@@ -0,0 +1,23 @@
+"""
+System checks for settings that cannot work together.
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def check_content_search(app_configs, **kwargs):
+    """
+    Compressed post bodies are opaque to the database, so a search of post
+    content would silently miss every compressed post.
+    """
+    if settings.POST_CONTENT_COMPRESSION and settings.SEARCH_POST_CONTENT:
+        return [
+            Error(
+                'POST_CONTENT_COMPRESSION cannot be used with SEARCH_POST_CONTENT: '
+                'the database cannot search compressed post bodies.',
+                hint='Set SEARCH_POST_CONTENT=False to search titles and descriptions only.',
+                id='blog.E001',
+            )
+        ]
+    return []
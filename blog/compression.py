@@ -0,0 +1,141 @@
+"""
+Compressed storage for post bodies.
+
+``CompressedRichTextField`` is a drop-in ``RichTextField`` (same column type,
+same CKEditor widget) that, with ``POST_CONTENT_COMPRESSION=True``, stores
+long values compressed and base64 encoded behind a marker character. Values
+read from the database stay compressed until the attribute is first accessed,
+so fetching posts whose bodies are never rendered costs no decompression.
+
+Compressed and plain rows can coexist: plain values are returned as they are,
+so compression can be switched on (or off) at any time and existing rows
+converted with ``python manage.py compress_post_content``.
+
+Codecs (``POST_CONTENT_CODEC``):
+
+- ``zlib``: standard library, always available.
+- ``zstd``: requires the ``zstandard`` package. Uses the newest dictionary
+  trained with ``compress_post_content --train-dictionary``, which makes
+  short bodies compress much better. Dictionaries are stored in the database
+  and never deleted, since rows keep referring to the one they were written with.
+
+``values()`` and ``values_list()`` return the stored form; pass it through
+``decompress_text``. Database text lookups (``icontains``) do not see inside
+compressed bodies, so the ``blog.E001`` system check requires
+``SEARCH_POST_CONTENT=False`` alongside compression.
+"""
+import base64
+import functools
+import zlib
+
+from django.conf import settings
+from django.db.models.query_utils import DeferredAttribute
+from ckeditor.fields import RichTextField
+
+MARKER = '\x02'
+# Shorter values gain too little to be worth compressing
+MIN_LENGTH = 256
+
+
+def is_compressed(value):
+    return isinstance(value, str) and value.startswith(MARKER)
+
+
+@functools.cache
+def get_dictionary(dict_id):
+    """
+    Return the zstd dictionary ``dict_id``. Dictionaries never change, so they
+    are cached for the life of the process.
+    """
+    import zstandard
+    from .models import CompressionDictionary
+    data = CompressionDictionary.objects.values_list('data', flat=True).get(dict_id=dict_id)
+    return zstandard.ZstdCompressionDict(bytes(data))
+
+
+@functools.cache
+def newest_dictionary_id():
+    """
+    Return the ID of the newest trained dictionary, or None. Cached for the
+    life of the process; restart after training a new dictionary.
+    """
+    from .models import CompressionDictionary
+    return CompressionDictionary.objects.order_by('-created_at', '-id').values_list('dict_id', flat=True).first()
+
+
+def compress_text(text, codec=None):
+    """
+    Return the stored form of ``text``: compressed with ``codec`` (default
+    POST_CONTENT_CODEC), or ``text`` itself when compression does not pay off.
+    """
+    if not isinstance(text, str) or is_compressed(text) or len(text) < MIN_LENGTH:
+        return text
+    codec = codec or settings.POST_CONTENT_CODEC
+    data = text.encode()
+    if codec == 'zstd':
+        import zstandard
+        dict_id = newest_dictionary_id()
+        compressor = zstandard.ZstdCompressor(
+            level=19, dict_data=get_dictionary(dict_id) if dict_id else None, write_dict_id=False
+        )
+        tag, payload = f's{dict_id or ""}', compressor.compress(data)
+    elif codec == 'zlib':
+        tag, payload = 'z', zlib.compress(data, 9)
+    else:
+        raise ValueError(f'Unknown compression codec {codec!r}')
+    stored = f'{MARKER}{tag}:{base64.b64encode(payload).decode()}'
+    return stored if len(stored) < len(text) else text
+
+
+def decompress_text(value):
+    """
+    Return the text of a stored value; plain values are returned unchanged.
+    """
+    if not is_compressed(value):
+        return value
+    tag, _, payload = value[1:].partition(':')
+    payload = base64.b64decode(payload)
+    if tag == 'z':
+        return zlib.decompress(payload).decode()
+    if tag.startswith('s'):
+        import zstandard
+        dict_data = get_dictionary(int(tag[1:])) if tag[1:] else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(payload).decode()
+    raise ValueError(f'Unknown compressed value tag {tag!r}')
+
+
+class CompressedTextAttribute(DeferredAttribute):
+    """
+    Attribute that decompresses the stored value on first access and keeps
+    the text on the instance. Defines ``__set__`` so that, unlike Django's
+    DeferredAttribute, it is consulted even once the value is loaded.
+    """
+
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if instance is None or not is_compressed(value):
+            return value
+        text = decompress_text(value)
+        attname = self.field.attname
+        instance.__dict__[attname] = text
+        # Keep ChangeTrackingMixin from seeing the decompression as an edit
+        loaded = getattr(instance, '_loaded_values', None)
+        if loaded is not None and loaded.get(attname) is value:
+            loaded[attname] = text
+        return text
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedRichTextField(RichTextField):
+    """
+    RichTextField stored compressed when POST_CONTENT_COMPRESSION is enabled.
+    """
+    descriptor_class = CompressedTextAttribute
+
+    def get_db_prep_save(self, value, connection):
+        # Only saved values are compressed; lookups such as icontains are not
+        if settings.POST_CONTENT_COMPRESSION:
+            value = compress_text(value)
+        return super().get_db_prep_save(value, connection)
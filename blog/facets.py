@@ -0,0 +1,420 @@
+"""
+Faceted browsing over published posts.
+
+``facet_index`` keeps, in each process, a compressed bitmap of published post
+IDs per tag, category, author and month. Selections such as "tagged python
+and django, in development" are bitmap intersections (and unions for several
+values of one facet), and the counts shown next to every facet value are the
+sizes of further intersections, so none of it needs a join per facet. Only
+the posts on the requested page are loaded with the ORM.
+
+A category matches the posts in all its subcategories too: selected
+categories are expanded through the closure table before intersecting, and
+category counts are rolled up to every ancestor. Published posts are kept
+sorted newest first as the index changes, so a large selection is read off
+that order instead of being sorted on every request.
+
+The index is built with two queries on first use and then kept current
+incrementally by re-reading the posts named in new OutboxEvent rows, which
+every publish, update, unpublish and delete writes in the post's transaction.
+Recent events are re-scanned because IDs can commit out of order, and a full
+rebuild every ``FACET_REBUILD_INTERVAL`` seconds catches changes that never
+went through a post save (e.g. a deleted category).
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.http import Http404
+from django.utils import timezone
+
+from .models import Category, CategoryClosure, OutboxEvent, Post, Tag
+
+# Chunks with more values than this are stored as bitsets
+SPARSE_MAX = 4096
+# Recent outbox IDs re-checked on every sync, in case they committed late
+EVENT_RESCAN = 1000
+MONTH_RE = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+FACET_PARAMS = ('category', 'author', 'month')
+
+
+def bits_to_set(bits):
+    values = set()
+    while bits:
+        lowest = bits & -bits
+        values.add(lowest.bit_length() - 1)
+        bits ^= lowest
+    return values
+
+
+def set_to_bits(values):
+    bits = 0
+    for value in values:
+        bits |= 1 << value
+    return bits
+
+
+def compact(chunk):
+    """
+    Return ``chunk`` in its preferred representation, or None when empty.
+    """
+    if isinstance(chunk, int):
+        if chunk.bit_count() <= SPARSE_MAX:
+            return bits_to_set(chunk) or None
+        return chunk
+    if len(chunk) > SPARSE_MAX:
+        return set_to_bits(chunk)
+    return chunk or None
+
+
+class Bitmap:
+    """
+    Set of non-negative integers stored roaring-style: values are grouped in
+    chunks of 65536 by their high bits, and each chunk holds its low 16 bits
+    either as a set (sparse) or as an int bitset (dense). Intersections and
+    unions work chunk by chunk and never touch chunks present on one side only.
+    """
+    __slots__ = ('chunks',)
+
+    def __init__(self, values=()):
+        self.chunks = {}
+        for value in values:
+            self.add(value)
+
+    def add(self, value):
+        high, low = value >> 16, value & 0xFFFF
+        chunk = self.chunks.get(high)
+        if chunk is None:
+            self.chunks[high] = {low}
+        elif isinstance(chunk, set):
+            chunk.add(low)
+            if len(chunk) > SPARSE_MAX:
+                self.chunks[high] = set_to_bits(chunk)
+        else:
+            self.chunks[high] = chunk | (1 << low)
+
+    def discard(self, value):
+        high, low = value >> 16, value & 0xFFFF
+        chunk = self.chunks.get(high)
+        if chunk is None:
+            return
+        if isinstance(chunk, set):
+            chunk.discard(low)
+            chunk = chunk or None
+        else:
+            chunk = compact(chunk & ~(1 << low))
+        if chunk is None:
+            del self.chunks[high]
+        else:
+            self.chunks[high] = chunk
+
+    def __and__(self, other):
+        result = Bitmap()
+        small, large = sorted((self, other), key=lambda bitmap: len(bitmap.chunks))
+        for high, chunk in small.chunks.items():
+            other_chunk = large.chunks.get(high)
+            if other_chunk is None:
+                continue
+            if isinstance(chunk, int) and isinstance(other_chunk, int):
+                chunk = compact(chunk & other_chunk)
+            elif isinstance(chunk, set) and isinstance(other_chunk, set):
+                chunk = chunk & other_chunk or None
+            else:
+                values, bits = (chunk, other_chunk) if isinstance(chunk, set) else (other_chunk, chunk)
+                chunk = {value for value in values if bits >> value & 1} or None
+            if chunk is not None:
+                result.chunks[high] = chunk
+        return result
+
+    def __or__(self, other):
+        result = Bitmap()
+        for high in self.chunks.keys() | other.chunks.keys():
+            chunk, other_chunk = self.chunks.get(high), other.chunks.get(high)
+            if chunk is None or other_chunk is None:
+                chunk = chunk if other_chunk is None else other_chunk
+                result.chunks[high] = set(chunk) if isinstance(chunk, set) else chunk
+            elif isinstance(chunk, set) and isinstance(other_chunk, set):
+                result.chunks[high] = compact(chunk | other_chunk)
+            else:
+                bits = lambda c: c if isinstance(c, int) else set_to_bits(c)  # noqa: E731
+                result.chunks[high] = bits(chunk) | bits(other_chunk)
+        return result
+
+    def __len__(self):
+        return sum(len(chunk) if isinstance(chunk, set) else chunk.bit_count() for chunk in self.chunks.values())
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+    def __contains__(self, value):
+        chunk = self.chunks.get(value >> 16)
+        if chunk is None:
+            return False
+        low = value & 0xFFFF
+        return low in chunk if isinstance(chunk, set) else bool(chunk >> low & 1)
+
+    def __iter__(self):
+        for high in sorted(self.chunks):
+            chunk = self.chunks[high]
+            lows = sorted(chunk) if isinstance(chunk, set) else sorted(bits_to_set(chunk))
+            for low in lows:
+                yield high << 16 | low
+
+
+def month_key(created_at):
+    return timezone.localtime(created_at).strftime('%Y-%m')
+
+
+class FacetIndex:
+    """
+    Per-process facet bitmaps over published posts, keyed by
+    ``('tag', tag_id)``, ``('category', category_id)``, ``('author', user_id)``
+    and ``('month', 'YYYY-MM')``.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.bitmaps = defaultdict(Bitmap)
+        self.published = Bitmap()
+        # post_id -> (sort key, facet keys)
+        self.posts = {}
+        # Sort keys of all published posts, oldest first
+        self.order = []
+        self.built_at = None
+        self.checked_at = 0
+        self.last_event_id = 0
+        self.applied_events = set()
+
+    def facet_keys(self, category_id, author_id, created_at, tag_ids):
+        keys = [('author', author_id), ('month', month_key(created_at))]
+        if category_id is not None:
+            keys.append(('category', category_id))
+        keys.extend(('tag', tag_id) for tag_id in tag_ids)
+        return tuple(keys)
+
+    def load(self, post_ids=None):
+        """
+        Return ``{post_id: (sort key, facet keys)}`` for published posts,
+        optionally limited to ``post_ids``.
+        """
+        posts = Post.objects.filter(status='published')
+        through = Post.tags.through.objects.filter(post__status='published')
+        if post_ids is not None:
+            posts = posts.filter(id__in=post_ids)
+            through = through.filter(post_id__in=post_ids)
+        tags = defaultdict(list)
+        for post_id, tag_id in through.values_list('post_id', 'tag_id'):
+            tags[post_id].append(tag_id)
+        return {
+            post_id: ((created_at, post_id), self.facet_keys(category_id, author_id, created_at, tags[post_id]))
+            for post_id, category_id, author_id, created_at in posts.order_by().values_list(
+                'id', 'category_id', 'author_id', 'created_at'
+            )
+        }
+
+    def build(self):
+        """
+        Rebuild every bitmap from the database.
+        """
+        # Events from here on are applied again after the build; that is harmless
+        last_event_id = OutboxEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        posts = self.load()
+        bitmaps = defaultdict(Bitmap)
+        for post_id, (_, keys) in posts.items():
+            for key in keys:
+                bitmaps[key].add(post_id)
+        order = sorted(sort_key for sort_key, _ in posts.values())
+        with self.lock:
+            self.posts = posts
+            self.order = order
+            self.bitmaps = bitmaps
+            self.published = Bitmap(posts)
+            self.last_event_id = max(0, last_event_id - EVENT_RESCAN)
+            self.applied_events = set()
+            self.built_at = self.checked_at = time.monotonic()
+
+    def refresh(self, post_ids):
+        """
+        Re-read ``post_ids`` from the database and move them between bitmaps.
+        """
+        current = self.load(post_ids)
+        with self.lock:
+            for post_id in post_ids:
+                old_sort_key, old_keys = self.posts.pop(post_id, (None, ()))
+                if old_sort_key is not None:
+                    del self.order[bisect_left(self.order, old_sort_key)]
+                for key in old_keys:
+                    self.bitmaps[key].discard(post_id)
+                    if not self.bitmaps[key]:
+                        del self.bitmaps[key]
+                self.published.discard(post_id)
+                if post_id in current:
+                    self.posts[post_id] = current[post_id]
+                    insort(self.order, current[post_id][0])
+                    for key in current[post_id][1]:
+                        self.bitmaps[key].add(post_id)
+                    self.published.add(post_id)
+
+    def ensure_current(self):
+        """
+        Build the index on first use and apply new outbox events, at most once
+        per ``FACET_SYNC_INTERVAL`` seconds. Readers never wait for another
+        thread's sync.
+        """
+        now = time.monotonic()
+        if self.built_at is not None and now - self.checked_at < settings.FACET_SYNC_INTERVAL:
+            return
+        if not self.sync_lock.acquire(blocking=self.built_at is None):
+            return
+        try:
+            if self.built_at is None or now - self.built_at > settings.FACET_REBUILD_INTERVAL:
+                self.build()
+                return
+            self.checked_at = now
+            events = list(
+                OutboxEvent.objects.filter(id__gt=self.last_event_id - EVENT_RESCAN)
+                .order_by().values_list('id', 'post_id')
+            )
+            new = [(event_id, post_id) for event_id, post_id in events if event_id not in self.applied_events]
+            if new:
+                self.refresh({post_id for _, post_id in new})
+            self.applied_events = {event_id for event_id, _ in events}
+            self.last_event_id = max([self.last_event_id, *self.applied_events])
+        finally:
+            self.sync_lock.release()
+
+    def select(self, groups):
+        """
+        Return the bitmap of posts matching every group, where a group is a list
+        of facet keys any of which may match.
+        """
+        selection = self.published
+        for group in groups:
+            union = Bitmap()
+            for key in group:
+                union = union | self.bitmaps.get(key, Bitmap())
+            selection = selection & union
+        return selection
+
+    def counts(self, selection, kind):
+        """
+        Return ``{key: count}`` of the ``kind`` facet values within ``selection``.
+        """
+        keys = [key for key in self.bitmaps if key[0] == kind]
+        if len(selection) < len(keys):
+            # Few matching posts: tally their facet values directly
+            counter = Counter(
+                key[1] for post_id in selection for key in self.posts[post_id][1] if key[0] == kind
+            )
+            return dict(counter)
+        counts = {}
+        for key in keys:
+            count = len(selection & self.bitmaps[key])
+            if count:
+                counts[key[1]] = count
+        return counts
+
+    def ordered_ids(self, selection):
+        """
+        Return the IDs in ``selection``, newest post first. A small selection
+        is sorted; a large one is filtered from the maintained order.
+        """
+        size = len(selection)
+        if size * size.bit_length() < len(self.order):
+            return sorted(selection, key=lambda post_id: self.posts[post_id][0], reverse=True)
+        return [post_id for _, post_id in reversed(self.order) if post_id in selection]
+
+    def query(self, groups, kinds):
+        """
+        Return ``(ordered post IDs, {kind: counts})`` for a selection.
+        """
+        self.ensure_current()
+        with self.lock:
+            selection = self.select(groups)
+            return self.ordered_ids(selection), {kind: self.counts(selection, kind) for kind in kinds}
+
+
+facet_index = FacetIndex()
+
+
+class FacetSelection:
+    """
+    Facet values requested in a URL such as ``/tag/python+django/?category=development``:
+    every tag must match; several comma-separated categories, authors or
+    months match any of them. Raises Http404 for unknown values.
+    """
+
+    def __init__(self, tag_slugs, params):
+        tag_slugs = [slug for slug in tag_slugs.split('+') if slug]
+        self.tags = list(Tag.objects.filter(slug__in=tag_slugs))
+        if len(self.tags) != len(set(tag_slugs)):
+            raise Http404('Unknown tag.')
+        self.tags.sort(key=lambda tag: tag_slugs.index(tag.slug))
+        values = {name: [value for value in params.get(name, '').split(',') if value] for name in FACET_PARAMS}
+        self.categories = list(Category.objects.filter(slug__in=values['category']))
+        self.authors = list(User.objects.filter(username__in=values['author']))
+        self.months = [month for month in values['month'] if MONTH_RE.match(month)]
+        if (
+            len(self.categories) != len(set(values['category']))
+            or len(self.authors) != len(set(values['author']))
+            or len(self.months) != len(values['month'])
+        ):
+            raise Http404('Unknown filter.')
+
+    def groups(self):
+        groups = [[('tag', tag.id)] for tag in self.tags]
+        subtree_ids = []
+        if self.categories:
+            subtree_ids = list(
+                CategoryClosure.objects.filter(ancestor__in=self.categories)
+                .values_list('descendant_id', flat=True).distinct()
+            )
+        for kind, values in (
+            ('category', subtree_ids),
+            ('author', [author.id for author in self.authors]),
+            ('month', self.months),
+        ):
+            if values:
+                groups.append([(kind, value) for value in values])
+        return groups
+
+
+def roll_up_category_counts(counts):
+    """
+    Return per-category ``counts`` with each category's count added to all
+    its ancestors, so every category counts the posts in its subtree.
+    """
+    totals = Counter()
+    for ancestor_id, descendant_id in CategoryClosure.objects.filter(
+        descendant_id__in=list(counts)
+    ).values_list('ancestor_id', 'descendant_id'):
+        totals[ancestor_id] += counts[descendant_id]
+    return dict(totals)
+
+
+class FacetPostList:
+    """
+    Sequence of the posts with ``post_ids``, in that order, for Paginator:
+    counting needs no query and a slice loads only the posts on that page.
+    """
+
+    def __init__(self, post_ids):
+        self.post_ids = post_ids
+
+    def count(self):
+        return len(self.post_ids)
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        ids = self.post_ids[index]
+        posts = Post.objects.select_related('author', 'category').prefetch_related('tags').in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
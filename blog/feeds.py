@@ -0,0 +1,67 @@
+"""
+RSS feed of the latest published posts.
+
+Rendered feeds are cached under a version number that the post signal handlers
+bump once a post is published, updated, withdrawn or deleted, in the process
+that made the change, like the category counts in ``blog.categories``.
+"""
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.urls import reverse
+from .models import Post
+
+FEED_VERSION_KEY = 'blog:feed:version'
+FEED_CACHE_TIMEOUT = 60 * 60
+
+
+def invalidate_feed_cache():
+    """
+    Invalidate every cached feed response by moving to a new version.
+    """
+    try:
+        cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.set(FEED_VERSION_KEY, 1, None)
+
+
+class LatestPostsFeed(Feed):
+    """
+    RSS feed of the 20 most recent published posts.
+    """
+    title = 'Modern Blog'
+    description = 'Latest posts from Modern Blog'
+
+    def __call__(self, request, *args, **kwargs):
+        version = cache.get(FEED_VERSION_KEY, 0)
+        key = f'blog:feed:latest:{version}:{request.get_host()}'
+        response = cache.get(key)
+        if response is None:
+            response = super().__call__(request, *args, **kwargs)
+            cache.set(key, response, FEED_CACHE_TIMEOUT)
+        return response
+
+    def link(self):
+        return reverse('blog:post_list')
+
+    def items(self):
+        return Post.objects.filter(status='published').select_related('author').only(
+            'title', 'slug', 'description', 'created_at', 'updated_at', 'author__username'
+        ).order_by('-created_at')[:20]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.description
+
+    def item_link(self, item):
+        return reverse('blog:post_detail', kwargs={'slug': item.slug})
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
@@ -1,5 +1,5 @@
 from django import forms
-from django.utils.text import slugify
+from django.db import transaction
 from ckeditor.widgets import CKEditorWidget
 from .models import Post, Comment
 
@@ -104,36 +104,42 @@ class PostForm(forms.ModelForm):
         return category
     
     def save(self, commit=True):
-        """Override save to auto-generate slug from title"""
+        """
+        Save the post. New posts get a unique slug from the title when saved;
+        existing posts keep their slug so published URLs stay stable.
+        """
         instance = super().save(commit=False)
         
-        # Auto-generate slug from title if not already set or if title changed
-        if not instance.slug or (instance.pk and instance.title):
-            base_slug = slugify(instance.title)
-            slug = base_slug
-            counter = 1
-            
-            # Ensure slug uniqueness
-            while Post.objects.filter(slug=slug).exclude(pk=instance.pk).exists():
-                slug = f'{base_slug}-{counter}'
-                counter += 1
-            
-            instance.slug = slug
-        
         if commit:
-            instance.save()
-            # Save many-to-many relationships
-            self.save_m2m()
+            # The post and its tags are committed together, with one outbox event
+            with transaction.atomic():
+                instance.save()
+                # Save many-to-many relationships
+                self.save_m2m()
         
         return instance
 
 
 class CommentForm(forms.ModelForm):
-    """Form for creating comments on blog posts"""
+    """
+    Form for creating comments on blog posts. ``parent`` is the comment being
+    replied to (empty for a new thread); pass ``post`` so only comments on
+    that post are accepted.
+    """
+    parent = forms.ModelChoiceField(
+        queryset=Comment.objects.none(), required=False, widget=forms.HiddenInput
+    )
+    
+    def __init__(self, *args, post=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if post is not None:
+            self.fields['parent'].queryset = Comment.objects.filter(post=post, is_approved=True).only(
+                'id', 'post_id', 'parent_id', 'path', 'depth'
+            )
     
     class Meta:
         model = Comment
-        fields = ['content']
+        fields = ['content', 'parent']
         widgets = {
             'content': forms.Textarea(attrs={
                 'class': 'form-control',
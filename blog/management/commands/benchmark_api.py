@@ -0,0 +1,67 @@
+"""
+Management command to compare the JSON API with the HTML post list.
+Usage: python manage.py benchmark_api --requests 500 [--limit 10]
+
+Requests the home page (rendering post_list.html) and the equivalent
+/api/posts/ pages in-process through the full middleware stack, one at a time,
+and reports throughput, latency and response size. The API is measured with
+its default fields, with post bodies (?fields=...,content) and with the
+standard library encoder instead of orjson. Run create_dummy_data first.
+"""
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from blog import api
+from blog.benchmarking import format_summary, summarize
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the JSON post API against rendering the HTML post list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per case')
+        parser.add_argument('--limit', type=int, default=10, help='Posts per API page (the HTML list shows 10)')
+
+    def handle(self, *args, **options):
+        if not Post.objects.filter(status='published').exists():
+            raise CommandError('No published posts found. Run create_dummy_data first.')
+        site = urlsplit(settings.SITE_URL)
+        client = Client(HTTP_HOST=site.netloc)
+        secure = site.scheme == 'https'
+        api_url = f'/api/posts/?limit={options["limit"]}'
+        cases = [
+            ('html post_list', '/', api.orjson),
+            ('api default fields', api_url, api.orjson),
+            ('api with content', f'{api_url}&fields={",".join(api.PostListAPIView.default_fields)},content', api.orjson),
+        ]
+        if api.orjson is not None:
+            cases.append(('api stdlib json', api_url, None))
+
+        encoder = api.orjson
+        results = []
+        try:
+            for label, url, json_module in cases:
+                api.orjson = json_module
+                # Warm up caches, connections and templates
+                for _ in range(10):
+                    client.get(url, secure=secure)
+                latencies, errors, size = [], 0, 0
+                started = time.perf_counter()
+                for _ in range(options['requests']):
+                    request_started = time.perf_counter()
+                    response = client.get(url, secure=secure)
+                    latencies.append(time.perf_counter() - request_started)
+                    errors += response.status_code != 200
+                    size = len(response.content)
+                results.append((label, summarize(latencies, time.perf_counter() - started, errors), size))
+        finally:
+            api.orjson = encoder
+
+        self.stdout.write(f'{options["requests"]} sequential requests per case, encoder: {"orjson" if encoder else "json"}')
+        for label, result, size in results:
+            self.stdout.write(self.style.SUCCESS(f'{format_summary(label, result)}  {size / 1024:>6.1f} KiB'))
@@ -0,0 +1,89 @@
+"""
+Management command to compare the WSGI and ASGI deployments under concurrency.
+Usage: python manage.py benchmark_deployments --requests 500 --concurrency 50
+
+Each deployment is started with gunicorn on a local port (sync workers for
+WSGI, uvicorn workers with the async views for ASGI) and the same set of read
+URLs is requested from a thread pool. Run create_dummy_data first.
+"""
+import itertools
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmarking import fetch, format_summary, run_concurrently, stop_process, wait_for_port
+
+
+DEPLOYMENTS = {
+    'wsgi': {
+        'args': ['BlogBreeze.wsgi:application'],
+        'env': {'BLOG_ASYNC_VIEWS': 'False'},
+    },
+    'asgi': {
+        'args': ['BlogBreeze.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+        'env': {'BLOG_ASYNC_VIEWS': 'True'},
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks the WSGI and ASGI deployments under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per deployment')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent clients')
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers per deployment')
+        parser.add_argument('--port', type=int, default=8765, help='Local port to bind servers on')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='URL path to request (repeatable). Defaults to the main read routes.'
+        )
+        parser.add_argument(
+            '--deployment', choices=sorted(DEPLOYMENTS), action='append', dest='deployments',
+            help='Only benchmark the given deployment (repeatable)'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/', '/search/?q=design', '/categories/']
+        deployments = options['deployments'] or ['wsgi', 'asgi']
+        port = options['port']
+
+        results = []
+        for name in deployments:
+            self.stdout.write(f'Starting {name} deployment on port {port}...')
+            process = self.start_server(name, port, options['workers'])
+            try:
+                if not wait_for_port('127.0.0.1', port):
+                    raise CommandError(f'{name} server did not start on port {port}')
+                base_url = f'http://127.0.0.1:{port}'
+                # Warm up each worker before measuring
+                for path in paths * options['workers']:
+                    fetch(base_url + path)
+                urls = itertools.islice(itertools.cycle(base_url + p for p in paths), options['requests'])
+                result = run_concurrently(fetch, list(urls), options['concurrency'])
+                results.append((name, result))
+            finally:
+                stop_process(process)
+
+        self.stdout.write('')
+        self.stdout.write(
+            f'{options["requests"]} requests, concurrency {options["concurrency"]}, '
+            f'{options["workers"]} workers, paths: {", ".join(paths)}'
+        )
+        for name, result in results:
+            self.stdout.write(self.style.SUCCESS(format_summary(name, result)))
+
+    def start_server(self, name, port, workers):
+        deployment = DEPLOYMENTS[name]
+        # One client making every request would soon be rate limited on search
+        env = {**os.environ, **deployment['env'], 'RATELIMIT_ENABLED': 'False'}
+        command = [
+            sys.executable, '-m', 'gunicorn', *deployment['args'],
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(workers),
+            '--log-level', 'warning',
+        ]
+        return subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
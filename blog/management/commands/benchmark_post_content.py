@@ -0,0 +1,89 @@
+"""
+Management command to measure what compressing post bodies saves and costs.
+Usage: python manage.py benchmark_post_content [--posts 50] [--requests 200]
+
+Reports the stored size of the newest published bodies as plain text and with
+every available codec, then times fetching those rows and rendering their
+detail pages with the bodies stored plain and compressed. The rows are
+rewritten inside a transaction that is rolled back, so the database is left
+unchanged. Run create_dummy_data first.
+"""
+import itertools
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+
+from blog.benchmarking import format_summary, summarize
+from blog.compression import compress_text, decompress_text, newest_dictionary_id
+from blog.models import Post
+from blog.pageviews import disable_view_recording
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks stored size and detail page latency of compressed post bodies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=50, help='Newest published posts to measure')
+        parser.add_argument('--requests', type=int, default=200, help='Detail page requests per storage format')
+
+    def handle(self, *args, **options):
+        posts = list(
+            Post.objects.filter(status='published').order_by('-created_at').values_list('id', 'slug', 'content')[
+                :options['posts']
+            ]
+        )
+        if not posts:
+            raise CommandError('No published posts found. Run create_dummy_data first.')
+        bodies = {post_id: decompress_text(stored) for post_id, _, stored in posts}
+
+        codecs = ['zlib']
+        try:
+            import zstandard  # noqa: F401
+            codecs.append('zstd')
+        except ImportError:
+            pass
+        plain = sum(len(text.encode()) for text in bodies.values())
+        self.stdout.write(f'{len(bodies)} posts, {plain / len(bodies) / 1024:.1f} KiB average body')
+        self.stdout.write(f'{"plain":<24} {plain / 1024:>9.1f} KiB')
+        for codec in codecs:
+            size = sum(len(compress_text(text, codec).encode()) for text in bodies.values())
+            label = f'{codec} + dictionary' if codec == 'zstd' and newest_dictionary_id() else codec
+            self.stdout.write(f'{label:<24} {size / 1024:>9.1f} KiB  ({100 * (1 - size / plain):.0f}% smaller)')
+
+        disable_view_recording()
+        site = urlsplit(settings.SITE_URL)
+        client = Client(HTTP_HOST=site.netloc)
+        urls = [f'/post/{slug}/' for _, slug, _ in posts]
+        results = []
+        with transaction.atomic():
+            for label, store in (('plain', lambda text: text), (settings.POST_CONTENT_CODEC, compress_text)):
+                with override_settings(POST_CONTENT_COMPRESSION=False):
+                    for post_id, text in bodies.items():
+                        Post.objects.filter(id=post_id).update(content=store(text))
+                # Fetch full rows and read every body, as listing and detail code does
+                started = time.perf_counter()
+                for _ in range(20):
+                    for post in Post.objects.filter(id__in=bodies):
+                        post.content
+                fetch_ms = (time.perf_counter() - started) / 20 * 1000
+                for url in urls[:10]:
+                    client.get(url, secure=site.scheme == 'https')
+                latencies, errors = [], 0
+                started = time.perf_counter()
+                for url in itertools.islice(itertools.cycle(urls), options['requests']):
+                    request_started = time.perf_counter()
+                    response = client.get(url, secure=site.scheme == 'https')
+                    latencies.append(time.perf_counter() - request_started)
+                    errors += response.status_code != 200
+                results.append((label, fetch_ms, summarize(latencies, time.perf_counter() - started, errors)))
+            transaction.set_rollback(True)
+
+        self.stdout.write('')
+        for label, fetch_ms, result in results:
+            self.stdout.write(self.style.SUCCESS(
+                f'{format_summary(f"detail ({label})", result)}  fetch {len(bodies)} rows {fetch_ms:.2f} ms'
+            ))
@@ -0,0 +1,110 @@
+"""
+Management command to compare stock and tuned SQLite under concurrent load.
+Usage: python manage.py benchmark_sqlite --operations 2000 --concurrency 16 --write-ratio 0.2
+
+The current SQLite database is copied to two temporary files, one opened with
+Django's default settings and one with SQLITE_TUNED_OPTIONS. The same mix of
+post list reads and single-comment write transactions is run against each from
+a thread pool; the original database is not modified. Run create_dummy_data
+first.
+"""
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+
+from blog.benchmarking import format_summary, summarize
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks concurrent reads and writes on stock vs tuned SQLite'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=2000, help='Operations per configuration')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent threads')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of operations that write')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite.')
+        post_ids = list(Post.objects.filter(status='published').values_list('id', flat=True))
+        user_ids = list(User.objects.values_list('id', flat=True))
+        if not post_ids or not user_ids:
+            raise CommandError('No published posts or users found. Run create_dummy_data first.')
+
+        random.seed(0)
+        jobs = [
+            ('write' if random.random() < options['write_ratio'] else 'read', random.choice(post_ids))
+            for _ in range(options['operations'])
+        ]
+        workdir = tempfile.mkdtemp(prefix='sqlite-bench-')
+        try:
+            for label, db_options in (('stock', {}), ('tuned', settings.SQLITE_TUNED_OPTIONS)):
+                path = os.path.join(workdir, f'{label}.sqlite3')
+                self.copy_database(path)
+                alias = f'bench_{label}'
+                connections.settings[alias] = {
+                    **connections[DEFAULT_DB_ALIAS].settings_dict,
+                    'NAME': path,
+                    'OPTIONS': db_options,
+                    'CONN_MAX_AGE': 0,
+                }
+                results = self.run(alias, jobs, user_ids, options['concurrency'])
+                for kind in ('read', 'write'):
+                    self.stdout.write(format_summary(f'{label} {kind}s', results[kind]))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def copy_database(self, path):
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    def run(self, alias, jobs, user_ids, concurrency):
+        latencies = {'read': [], 'write': []}
+        errors = {'read': 0, 'write': 0}
+
+        def operation(job):
+            kind, post_id = job
+            started = time.perf_counter()
+            try:
+                if kind == 'read':
+                    list(
+                        Post.objects.using(alias).filter(status='published')
+                        .select_related('author', 'category').order_by('-created_at')[:10]
+                    )
+                    Comment.objects.using(alias).filter(post_id=post_id).count()
+                else:
+                    # bulk_create skips signal handlers that would write to the real database
+                    with transaction.atomic(using=alias):
+                        Comment.objects.using(alias).bulk_create([
+                            Comment(post_id=post_id, user_id=random.choice(user_ids), content='Benchmark comment'),
+                        ])
+                ok = True
+            except OperationalError:
+                ok = False
+            finally:
+                if alias in connections:
+                    connections[alias].close()
+            return kind, ok, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for kind, ok, latency in pool.map(operation, jobs):
+                latencies[kind].append(latency)
+                errors[kind] += not ok
+        elapsed = time.perf_counter() - started
+        return {kind: summarize(latencies[kind], elapsed, errors[kind]) for kind in latencies}
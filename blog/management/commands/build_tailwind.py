@@ -0,0 +1,51 @@
+"""
+Management command to build the site stylesheet from the templates.
+Usage: python manage.py build_tailwind [--unknown]
+
+Writes the Tailwind CSS for every class used in the templates to
+static/css/tailwind.<hash>.css, plus static/css/tailwind.json naming it, and
+removes older builds. base.html links the built stylesheet when it exists and
+falls back to the Tailwind CDN otherwise. Run it before collectstatic
+(build.sh does) so the stylesheet is collected and served by WhiteNoise.
+
+--unknown lists class names used in templates that produced no CSS: custom
+classes, or Tailwind utilities blog/tailwind.py does not implement yet.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.tailwind import MANIFEST_NAME, build_stylesheet
+
+
+class Command(BaseCommand):
+    help = 'Builds the Tailwind stylesheet used by the templates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--unknown', action='store_true', help='List template class names that produced no CSS'
+        )
+
+    def handle(self, *args, **options):
+        css, classes, unknown = build_stylesheet()
+        digest = hashlib.sha256(css.encode()).hexdigest()[:12]
+        name = f'css/tailwind.{digest}.css'
+
+        directory = Path(settings.STATICFILES_DIRS[0]) / 'css'
+        directory.mkdir(parents=True, exist_ok=True)
+        for old in directory.glob('tailwind.*.css'):
+            if old.name != Path(name).name:
+                old.unlink()
+        (directory / Path(name).name).write_text(css)
+        (directory / Path(MANIFEST_NAME).name).write_text(json.dumps({'css': name}) + '\n')
+
+        if options['unknown']:
+            for class_name in unknown:
+                self.stdout.write(f'  {class_name}')
+            self.stdout.write(f'{len(unknown)} class names produced no CSS')
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {name}: {len(classes)} utilities, {len(css.encode()) / 1024:.1f} KiB'
+        ))
@@ -0,0 +1,99 @@
+"""
+Management command to convert stored post bodies to or from compressed form.
+Usage: python manage.py compress_post_content [--batch-size 200] [--decompress] [--train-dictionary]
+
+With POST_CONTENT_COMPRESSION=True, compresses every existing body with
+POST_CONTENT_CODEC in batches of one transaction each; bodies stored with
+another codec or an older dictionary are recompressed. With --decompress (and
+compression switched off) writes every body back as plain text. Each row is
+only overwritten if it has not changed since it was read, so the command can
+run while authors are editing.
+
+--train-dictionary trains a zstd dictionary from the newest published posts
+before converting. Restart the app processes afterwards so new saves use it.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog import compression
+from blog.compression import compress_text, decompress_text
+from blog.models import CompressionDictionary, Post
+
+
+class Command(BaseCommand):
+    help = 'Compresses (or decompresses) stored post bodies in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Posts per transaction')
+        parser.add_argument('--decompress', action='store_true', help='Store every body as plain text')
+        parser.add_argument(
+            '--train-dictionary', action='store_true',
+            help='Train a new zstd dictionary from published posts first'
+        )
+        parser.add_argument('--samples', type=int, default=2000, help='Posts to train the dictionary on')
+        parser.add_argument('--dictionary-size', type=int, default=112640, help='Dictionary size in bytes')
+
+    def handle(self, *args, **options):
+        if options['decompress'] == settings.POST_CONTENT_COMPRESSION:
+            raise CommandError(
+                'Set POST_CONTENT_COMPRESSION=False to decompress.' if options['decompress']
+                else 'Set POST_CONTENT_COMPRESSION=True to compress.'
+            )
+        if options['train_dictionary']:
+            self.train_dictionary(options['samples'], options['dictionary_size'])
+
+        started = time.perf_counter()
+        last_id, converted, conflicts, before, after = 0, 0, 0, 0, 0
+        while True:
+            rows = list(
+                Post.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'content')[:options['batch_size']]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            with transaction.atomic():
+                for post_id, stored in rows:
+                    text = decompress_text(stored)
+                    target = text if options['decompress'] else compress_text(text)
+                    before += len(stored.encode())
+                    if target == stored:
+                        after += len(stored.encode())
+                        continue
+                    # Skip rows edited since they were read; the edit was saved in the current format
+                    if Post.objects.filter(id=post_id, content=stored).update(content=target):
+                        converted += 1
+                        after += len(target.encode())
+                    else:
+                        conflicts += 1
+                        after += len(stored.encode())
+            self.stdout.write(f'Up to post {last_id}: {converted} converted')
+
+        saved = 100 * (1 - after / before) if before else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Converted {converted} posts ({conflicts} changed concurrently and skipped) '
+            f'in {time.perf_counter() - started:.1f}s. Stored bodies: {before / 1024:.0f} KiB -> '
+            f'{after / 1024:.0f} KiB ({saved:.0f}% smaller).'
+        ))
+
+    def train_dictionary(self, samples, size):
+        try:
+            import zstandard
+        except ImportError:
+            raise CommandError('Training a dictionary requires the zstandard package.')
+        bodies = [
+            decompress_text(stored).encode()
+            for stored in Post.objects.filter(status='published').order_by('-created_at').values_list(
+                'content', flat=True
+            )[:samples]
+        ]
+        if len(bodies) < 10:
+            raise CommandError('At least 10 published posts are needed to train a dictionary.')
+        dictionary = zstandard.train_dictionary(size, bodies)
+        CompressionDictionary.objects.create(
+            dict_id=dictionary.dict_id(), data=dictionary.as_bytes(), sample_count=len(bodies)
+        )
+        compression.newest_dictionary_id.cache_clear()
+        self.stdout.write(f'Trained dictionary {dictionary.dict_id()} from {len(bodies)} posts.')
@@ -0,0 +1,28 @@
+"""
+Management command to rebuild the popular posts ranking.
+Usage: python manage.py compute_popularity [--days 14] [--half-life 3]
+
+Schedule it every few minutes (cron or a scheduler add-on). Listing pages read
+the resulting PopularPost table instead of aggregating view counts per request.
+"""
+from django.core.management.base import BaseCommand
+
+from blog.pageviews import compute_popularity, flush_views
+
+
+class Command(BaseCommand):
+    help = 'Recomputes time-decayed post popularity from daily view rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Number of days of views to consider')
+        parser.add_argument('--half-life', type=float, help='Days after which a view counts half')
+        parser.add_argument('--limit', type=int, help='Number of posts to rank')
+
+    def handle(self, *args, **options):
+        flush_views()
+        ranked = compute_popularity(
+            days=options['days'],
+            half_life=options['half_life'],
+            limit=options['limit'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Ranked {ranked} posts.'))
@@ -0,0 +1,35 @@
+"""
+Management command to deliver pending post lifecycle events.
+Usage: python manage.py dispatch_outbox [--loop] [--interval 5] [--batch-size 100]
+
+Events are normally dispatched by a background task right after the commit
+that recorded them; run this with --loop (or from cron) to sweep retries.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.outbox import dispatch_pending
+
+
+class Command(BaseCommand):
+    help = 'Delivers pending outbox events to webhooks, the search index and other sinks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Events delivered per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep dispatching until interrupted')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between sweeps with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            delivered = dispatch_pending(batch_size=options['batch_size'])
+            elapsed = time.perf_counter() - started
+            if delivered or not options['loop']:
+                rate = delivered / elapsed if elapsed else 0
+                self.stdout.write(self.style.SUCCESS(
+                    f'Delivered {delivered} events in {elapsed:.2f}s ({rate:.0f} events/s)'
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
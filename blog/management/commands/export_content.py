@@ -0,0 +1,26 @@
+"""
+Management command to export posts, comments, categories and tags as NDJSON.
+Usage: python manage.py export_content content.ndjson.gz [--chunk-size 2000]
+
+The file is compressed with gzip when it ends in .gz and with zstd when it
+ends in .zst. Load it with import_content.
+"""
+from django.core.management.base import BaseCommand
+
+from blog.transfer import KINDS, export_content
+
+
+class Command(BaseCommand):
+    help = 'Streams blog content to an NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Output file (.ndjson, .ndjson.gz or .ndjson.zst)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        def progress(counts):
+            self.stdout.write(f'{sum(counts.values())} objects written...')
+
+        counts = export_content(options['path'], chunk_size=options['chunk_size'], progress=progress)
+        summary = ', '.join(f'{counts[kind]} {plural}' for kind, plural in KINDS.items())
+        self.stdout.write(self.style.SUCCESS(f'Exported {summary} to {options["path"]}.'))
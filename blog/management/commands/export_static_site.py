@@ -0,0 +1,36 @@
+"""
+Management command to export the public blog pages as static HTML.
+Usage: python manage.py export_static_site [--output snapshot/] [--workers 4] [--force]
+
+Only pages whose content changed since the last export are rendered; pass
+--force after changing templates or code. Run it from cron (or set
+STATIC_SNAPSHOT_AUTO_EXPORT=True) and serve the output directory with
+STATIC_SNAPSHOT_SERVE=True, a web server or a CDN.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.snapshots import export_site
+
+
+class Command(BaseCommand):
+    help = 'Renders the public post, category, tag and feed pages to static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.STATIC_SNAPSHOT_ROOT, help='Directory to write the pages to')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Rendering processes')
+        parser.add_argument('--force', action='store_true', help='Render every page, even if unchanged')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = export_site(options['output'], workers=options['workers'], force=options['force'])
+        for url, status in result['failed']:
+            self.stderr.write(f'{url}: HTTP {status}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {result["rendered"]} pages, {result["unchanged"]} unchanged, '
+            f'{result["removed"]} removed, {len(result["failed"])} failed '
+            f'in {time.perf_counter() - started:.1f}s.'
+        ))
@@ -0,0 +1,41 @@
+"""
+Management command to bulk import a file written by export_content.
+Usage: python manage.py import_content content.ndjson.gz [--batch-size 1000] [--checkpoint FILE]
+
+Progress is checkpointed after every committed batch (by default to
+<file>.checkpoint); running the command again with the same checkpoint
+resumes after the last committed line. Delete the checkpoint to import the
+file again. Users are not imported: rows whose author or commenter does not
+exist here are skipped.
+"""
+from django.core.management.base import BaseCommand
+
+from blog.transfer import KINDS, import_content
+
+
+class Command(BaseCommand):
+    help = 'Bulk imports blog content from an NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file (.ndjson, .ndjson.gz or .ndjson.zst)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert and transaction')
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <path>.checkpoint)')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint'] or f'{options["path"]}.checkpoint'
+
+        def progress(line, importer):
+            created = ', '.join(f'{importer.created[kind]} {plural}' for kind, plural in KINDS.items() if importer.created[kind])
+            self.stdout.write(f'Line {line} committed ({created or "nothing new"})')
+
+        importer = import_content(
+            options['path'],
+            batch_size=options['batch_size'],
+            checkpoint=checkpoint,
+            progress=progress,
+        )
+        created = ', '.join(f'{importer.created[kind]} {plural}' for kind, plural in KINDS.items())
+        skipped = ', '.join(f'{importer.skipped[kind]} {plural}' for kind, plural in KINDS.items() if importer.skipped[kind])
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created}.' + (f' Skipped existing or unresolved: {skipped}.' if skipped else '')
+        ))
@@ -0,0 +1,71 @@
+"""
+Management command to run a local HTTP endpoint that accepts outbox deliveries.
+Usage: python manage.py outbox_stub_receiver --port 8099
+
+Point BLOG_OUTBOX_WEBHOOK_URLS (and optionally BLOG_SEARCH_INDEX_URL) at
+http://127.0.0.1:8099/ and run dispatch_outbox to measure delivery throughput.
+Use --fail-rate to exercise the retry path.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Runs a stub HTTP receiver that counts delivered outbox events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 503')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds to sleep per request')
+
+    def handle(self, *args, **options):
+        stats = {'requests': 0, 'events': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                time.sleep(options['latency'])
+                if random.random() < options['fail_rate']:
+                    with lock:
+                        stats['failed'] += 1
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                received = len(body.get('events', [])) + len(body.get('upsert', [])) + len(body.get('delete', []))
+                with lock:
+                    stats['requests'] += 1
+                    stats['events'] += received
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.stdout.write(f'Listening on http://127.0.0.1:{options["port"]}/ (Ctrl+C to stop)')
+
+        started = time.monotonic()
+        last_events = 0
+        try:
+            while True:
+                time.sleep(1)
+                with lock:
+                    snapshot = dict(stats)
+                if snapshot['events'] != last_events:
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(
+                        f'{snapshot["events"]} events in {snapshot["requests"]} requests '
+                        f'({snapshot["events"] - last_events} events/s, {snapshot["failed"]} rejected, '
+                        f'{elapsed:.0f}s elapsed)'
+                    )
+                    last_events = snapshot['events']
+        except KeyboardInterrupt:
+            server.shutdown()
+            self.stdout.write(self.style.SUCCESS(f'Received {stats["events"]} events in total.'))
@@ -0,0 +1,147 @@
+"""
+Management command to profile worker startup.
+Usage: python manage.py profile_startup [--path /] [--top 15] [--modules] [--gunicorn] [--workers 2]
+
+Loads the WSGI application in a fresh interpreter run with ``-X importtime``
+and serves one request to --path, as a gunicorn worker does. Reports the time
+and peak memory of both steps and the import time spent in each top-level
+package (each module with --modules): loading the application imports the
+settings, installed apps and models; the first request also imports the
+URLconf, the views and everything they import.
+
+--gunicorn also starts gunicorn with preload_app off and on (see
+gunicorn.conf.py) and reports the time from start to the first response and,
+after warming every worker, the memory of each worker: RSS, PSS (shared pages
+divided among the processes sharing them) and USS (private pages). Linux only.
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmarking import child_pids, fetch, process_memory, stop_process
+
+MARKER = '--- first request ---'
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+# Runs in the profiled interpreter; prints its measurements as JSON
+PROBE = '''
+import io, json, resource, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+from BlogBreeze.wsgi import application
+loaded = time.perf_counter()
+loaded_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+sys.stderr.write(%(marker)r + "\\n")
+
+environ = {"PATH_INFO": %(path)r, "HTTP_HOST": %(host)r, "wsgi.input": io.BytesIO()}
+setup_testing_defaults(environ)
+statuses = []
+response = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+b"".join(response)
+response.close()
+print(json.dumps({
+    "load": loaded - started,
+    "request": time.perf_counter() - loaded,
+    "status": statuses[0],
+    "loaded_rss": loaded_rss,
+    "request_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Profiles the import time, load time and memory of a worker starting up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help='URL path of the first request')
+        parser.add_argument('--top', type=int, default=15, help='Packages (or modules) to list per step')
+        parser.add_argument('--modules', action='store_true', help='List modules instead of top-level packages')
+        parser.add_argument('--gunicorn', action='store_true', help='Also measure gunicorn with and without preload')
+        parser.add_argument('--workers', type=int, default=2, help='Gunicorn workers')
+        parser.add_argument('--port', type=int, default=8765, help='Local port to bind gunicorn on')
+
+    def handle(self, *args, **options):
+        self.profile_imports(options)
+        if options['gunicorn']:
+            for preload in (False, True):
+                self.profile_gunicorn(preload, options)
+
+    def profile_imports(self, options):
+        probe = PROBE % {'marker': MARKER, 'path': options['path'], 'host': urlsplit(settings.SITE_URL).netloc}
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', probe],
+            cwd=settings.BASE_DIR, env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'BlogBreeze.settings'},
+            capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(f'Profiling failed:\n{result.stderr[-2000:]}')
+        measured = json.loads(result.stdout.strip().splitlines()[-1])
+
+        loading, _, first_request = result.stderr.partition(MARKER)
+        for title, lines in (('Loading the application', loading), ('First request', first_request)):
+            imports = self.import_times(lines, options['modules'])
+            self.stdout.write(f'{title}: {sum(imports.values()) / 1000:.1f}ms importing {len(imports)} '
+                              f'{"modules" if options["modules"] else "packages"}')
+            for name, microseconds in imports.most_common(options['top']):
+                self.stdout.write(f'  {microseconds / 1000:8.1f}ms  {name}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Interpreter start to first response {elapsed:.2f}s: application loaded in '
+            f'{measured["load"] * 1000:.0f}ms (peak RSS {measured["loaded_rss"] / 1024:.1f} MiB), '
+            f'first request {options["path"]} ({measured["status"]}) in {measured["request"] * 1000:.0f}ms '
+            f'(peak RSS {measured["request_rss"] / 1024:.1f} MiB)'
+        ))
+
+    def import_times(self, lines, modules):
+        """
+        Return a Counter of import time in microseconds (excluding nested
+        imports) per module, or per top-level package.
+        """
+        imports = Counter()
+        for match in IMPORT_LINE.finditer(lines):
+            name = match.group(4)
+            imports[name if modules else name.partition('.')[0]] += int(match.group(1))
+        return imports
+
+    def profile_gunicorn(self, preload, options):
+        url = f'http://127.0.0.1:{options["port"]}{options["path"]}'
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', 'BlogBreeze.wsgi:application',
+                '--bind', f'127.0.0.1:{options["port"]}',
+                '--workers', str(options['workers']),
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR, env={**os.environ, 'GUNICORN_PRELOAD_APP': str(preload)},
+        )
+        try:
+            while not fetch(url, timeout=10):
+                if process.poll() is not None or time.perf_counter() - started > 60:
+                    raise CommandError(f'gunicorn did not answer {url}')
+                time.sleep(0.02)
+            first_response = time.perf_counter() - started
+            # Every worker renders the page a few times before memory is read
+            for _ in range(options['workers'] * 10):
+                fetch(url)
+            workers = [process_memory(pid) for pid in child_pids(process.pid)]
+        finally:
+            stop_process(process)
+
+        mean = {key: sum(worker[key] for worker in workers) / len(workers) / 1024 for key in ('rss', 'pss', 'uss')}
+        self.stdout.write(self.style.SUCCESS(
+            f'gunicorn, preload_app {"on " if preload else "off"}: first response after {first_response:.2f}s; '
+            f'per worker (mean of {len(workers)}) RSS {mean["rss"]:.1f} MiB, '
+            f'PSS {mean["pss"]:.1f} MiB, USS {mean["uss"]:.1f} MiB'
+        ))
@@ -0,0 +1,19 @@
+"""
+Management command to rebuild the monthly archive counts.
+Usage: python manage.py rebuild_archive
+
+The table is filled when it is created; run this after changing TIME_ZONE,
+after bulk changes that bypass save(), or any time the incrementally
+maintained counts need to be reconciled with the posts.
+"""
+from django.core.management.base import BaseCommand
+
+from blog.archive import rebuild_archive
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the published post count of every archive month'
+
+    def handle(self, *args, **options):
+        rows = rebuild_archive()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} archive months.'))
@@ -0,0 +1,32 @@
+"""
+Management command to rebuild the materialized author statistics.
+Usage: python manage.py rebuild_author_stats [--author USERNAME ...]
+
+The table is filled when it is created; run this any time the incrementally
+maintained rows need to be reconciled with the data.
+"""
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.stats import rebuild_author_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes per-author daily statistics from posts, comments and views'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--author',
+            action='append',
+            dest='authors',
+            help='Only rebuild stats for this username (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        author_ids = None
+        if options['authors']:
+            author_ids = list(User.objects.filter(username__in=options['authors']).values_list('id', flat=True))
+            if len(author_ids) != len(set(options['authors'])):
+                raise CommandError('One or more authors do not exist.')
+        rows = rebuild_author_stats(author_ids)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} daily stats rows.'))
@@ -0,0 +1,18 @@
+"""
+Management command to send digest emails to subscribers.
+Usage: python manage.py send_digests
+
+Schedule it once a day (cron or a scheduler add-on). Each reader with pending
+digest items receives a single email listing the new posts.
+"""
+from django.core.management.base import BaseCommand
+
+from blog.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = 'Sends pending digest emails to subscribers'
+
+    def handle(self, *args, **options):
+        sent = send_digests()
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} digest emails.'))
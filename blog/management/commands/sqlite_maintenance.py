@@ -0,0 +1,58 @@
+"""
+Management command for routine SQLite maintenance.
+Usage: python manage.py sqlite_maintenance [--analyze] [--checkpoint] [--vacuum]
+
+Without options it refreshes query planner statistics and checkpoints the WAL,
+which is cheap enough to run daily. VACUUM rewrites the whole database file
+and blocks writers while it runs, so only use it in a quiet period.
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+class Command(BaseCommand):
+    help = 'Runs ANALYZE, WAL checkpoint and optionally VACUUM on the SQLite database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='Refresh query planner statistics')
+        parser.add_argument('--checkpoint', action='store_true', help='Copy the WAL into the database and truncate it')
+        parser.add_argument('--vacuum', action='store_true', help='Rebuild the database file to reclaim free pages')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite.')
+        steps = [step for step in ('analyze', 'vacuum', 'checkpoint') if options[step]]
+        if not steps:
+            steps = ['analyze', 'checkpoint']
+
+        path = str(connection.settings_dict['NAME'])
+        before = file_size(path) + file_size(f'{path}-wal')
+        with connection.cursor() as cursor:
+            for step in steps:
+                started = time.perf_counter()
+                if step == 'analyze':
+                    cursor.execute('ANALYZE')
+                    cursor.execute('PRAGMA optimize')
+                    detail = ''
+                elif step == 'vacuum':
+                    cursor.execute('VACUUM')
+                    detail = ''
+                else:
+                    cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                    busy, log_frames, checkpointed = cursor.fetchone()
+                    if log_frames == -1:
+                        detail = ' (database is not in WAL mode)'
+                    else:
+                        detail = f' ({checkpointed}/{log_frames} frames{", busy" if busy else ""})'
+                self.stdout.write(f'{step}: {(time.perf_counter() - started) * 1000:.0f} ms{detail}')
+        after = file_size(path) + file_size(f'{path}-wal')
+        self.stdout.write(self.style.SUCCESS(
+            f'Done. Database and WAL: {before / 1024:.0f} KB -> {after / 1024:.0f} KB'
+        ))
@@ -0,0 +1,38 @@
+"""
+Management command to refresh local SQLite read replicas from the primary.
+Usage: python manage.py sync_sqlite_replicas
+
+Only meant for trying out the replica router locally with
+DATABASE_REPLICA_URLS=sqlite:///replica.sqlite3. Real replicas are kept up to
+date by the database server (e.g. PostgreSQL streaming replication).
+"""
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copies the default SQLite database into every SQLite replica'
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The default database is not SQLite.')
+        replicas = [alias for alias in settings.DATABASE_REPLICAS if connections[alias].vendor == 'sqlite']
+        if not replicas:
+            raise CommandError('No SQLite replicas are configured (set DATABASE_REPLICA_URLS).')
+
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        try:
+            for alias in replicas:
+                connections[alias].close()
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'Copied primary to {alias}')
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f'Synced {len(replicas)} replica(s).'))
@@ -0,0 +1,53 @@
+"""
+Management command to warm the caches after a deploy.
+Usage: python manage.py warm_caches [--url http://127.0.0.1:8000] [--budget 30] [--concurrency 4] [--pages 3] [--popular 10]
+
+Requests the home page, the feed, the popular posts, the first listing pages
+and every category and tag page, most visited first, until all are done or the
+time budget is spent. Without --url pages are rendered in this process, which
+fills shared caches; with --url they are requested from the running server,
+which also warms its workers, so it can run as a readiness step right after
+the server starts. Exits with an error if any page fails.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.warmup import warm, warmup_urls
+
+
+class Command(BaseCommand):
+    help = 'Requests the most visited pages so caches are warm before readers arrive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server to warm, instead of this process')
+        parser.add_argument('--budget', type=float, default=settings.WARMUP_BUDGET, help='Seconds to spend at most')
+        parser.add_argument('--concurrency', type=int, default=settings.WARMUP_CONCURRENCY, help='Parallel requests')
+        parser.add_argument('--pages', type=int, default=settings.WARMUP_LISTING_PAGES, help='Post list pages to warm')
+        parser.add_argument('--popular', type=int, default=settings.WARMUP_POPULAR_POSTS, help='Popular posts to warm')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        urls = warmup_urls(options['pages'], options['popular'])
+        results, skipped = warm(
+            urls, budget=options['budget'], concurrency=options['concurrency'], base_url=options['url']
+        )
+
+        failed = [(url, status) for url, status, _ in results if status != 200]
+        for url, status, seconds in results:
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {status or "-"} {seconds * 1000:7.1f}ms {url}')
+        for url, status in failed:
+            self.stderr.write(f'{url}: {f"HTTP {status}" if status else "no response"}')
+        if skipped:
+            self.stdout.write(f'Budget spent, skipped {len(skipped)} pages, starting with {skipped[0]}')
+
+        slowest = max(results, key=lambda result: result[2], default=None)
+        summary = (
+            f'Warmed {len(results) - len(failed)} of {len(urls)} pages in {time.perf_counter() - started:.1f}s'
+            + (f' (slowest {slowest[0]}, {slowest[2] * 1000:.0f}ms)' if slowest else '')
+        )
+        if failed:
+            raise CommandError(f'{summary}; {len(failed)} failed.')
+        self.stdout.write(self.style.SUCCESS(f'{summary}.'))
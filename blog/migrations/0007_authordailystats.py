@@ -0,0 +1,82 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def fill_stats(apps, schema_editor):
+    # Same attribution as blog.stats.rebuild_author_stats, on the historical models
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    PostViewDaily = apps.get_model('blog', 'PostViewDaily')
+    AuthorDailyStats = apps.get_model('blog', 'AuthorDailyStats')
+    rows = {}
+
+    def row(author_id, date):
+        if (author_id, date) not in rows:
+            rows[author_id, date] = AuthorDailyStats(author_id=author_id, date=date)
+        return rows[author_id, date]
+
+    for author_id, date, status, count in (
+        Post.objects.annotate(day=TruncDate('created_at'))
+        .values('author_id', 'day', 'status')
+        .annotate(count=Count('id'))
+        .values_list('author_id', 'day', 'status', 'count')
+        .order_by()
+    ):
+        row(author_id, date).posts_created += count
+        if status == 'published':
+            row(author_id, date).published += count
+
+    for author_id, date, count in (
+        Comment.objects.annotate(day=TruncDate('created_at'))
+        .values('post__author_id', 'day')
+        .annotate(count=Count('id'))
+        .values_list('post__author_id', 'day', 'count')
+        .order_by()
+    ):
+        row(author_id, date).comments += count
+
+    for author_id, date, total in (
+        PostViewDaily.objects.values('post__author_id', 'date')
+        .annotate(total=Sum('views'))
+        .values_list('post__author_id', 'date', 'total')
+        .order_by()
+    ):
+        row(author_id, date).views += total
+
+    AuthorDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_popularpost_postviewdaily'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('posts_created', models.PositiveIntegerField(default=0)),
+                ('posts_deleted', models.PositiveIntegerField(default=0)),
+                ('published', models.PositiveIntegerField(default=0)),
+                ('unpublished', models.PositiveIntegerField(default=0)),
+                ('comments', models.PositiveIntegerField(default=0)),
+                ('comments_deleted', models.PositiveIntegerField(default=0)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Author daily stats',
+                'constraints': [models.UniqueConstraint(fields=('author', 'date'), name='blog_authordailystats_unique')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
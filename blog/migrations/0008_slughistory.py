@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_authordailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('category', 'Category'), ('tag', 'Tag')], max_length=10)),
+                ('old_slug', models.SlugField(max_length=200)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('current_slug', models.SlugField(max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Slug history',
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='blog_slughistory_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'old_slug'), name='blog_slughistory_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def count_published(apps, schema_editor):
+    # Same grouping as blog.archive.rebuild_archive, on the historical models
+    Post = apps.get_model('blog', 'Post')
+    MonthlyArchive = apps.get_model('blog', 'MonthlyArchive')
+    MonthlyArchive.objects.bulk_create(
+        MonthlyArchive(year=month.year, month=month.month, published_count=count)
+        for month, count in (
+            Post.objects.filter(status='published')
+            .annotate(month=TruncMonth('created_at'))
+            .values('month')
+            .annotate(count=Count('id'))
+            .values_list('month', 'count')
+            .order_by()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_slughistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('published_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='blog_post_status_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyarchive',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='blog_monthlyarchive_unique'),
+        ),
+        migrations.RunPython(count_published, migrations.RunPython.noop),
+    ]
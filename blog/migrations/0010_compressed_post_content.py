@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 02:59
+
+import blog.compression
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_monthlyarchive_post_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompressionDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dict_id', models.PositiveBigIntegerField(unique=True)),
+                ('data', models.BinaryField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Compression dictionaries',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='content',
+            field=blog.compression.CompressedRichTextField(),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-19 03:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def add_self_links(apps, schema_editor):
+    # Existing categories are all top-level: each is only its own ancestor
+    Category = apps.get_model('blog', 'Category')
+    CategoryClosure = apps.get_model('blog', 'CategoryClosure')
+    CategoryClosure.objects.bulk_create(
+        CategoryClosure(ancestor_id=pk, descendant_id=pk, depth=0)
+        for pk in Category.objects.values_list('id', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_comment_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='blog.category'),
+        ),
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='blog.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='blog.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='blog_catclosure_desc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='blog_categoryclosure_unique')],
+            },
+        ),
+        migrations.RunPython(add_self_links, migrations.RunPython.noop),
+    ]
@@ -1,14 +1,25 @@
-from django.db import models
+from datetime import date
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.utils.text import slugify
-from ckeditor.fields import RichTextField
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from BlogBreeze.models_utils import ChangeTrackingMixin
+from .compression import CompressedRichTextField
+from .slugs import SlugMixin
 
 
-class Category(models.Model):
-    """Category model for organizing blog posts into broad topics"""
+class Category(SlugMixin, ChangeTrackingMixin, models.Model):
+    """
+    Category model for organizing blog posts into nested topics.
+    The hierarchy is mirrored in ``CategoryClosure`` (see ``blog.categories``).
+    """
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True)
     description = models.TextField(blank=True)
+    parent = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -19,13 +30,36 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+    def clean(self):
+        """
+        Reject a parent that is this category or one of its descendants.
+        """
+        if self.parent_id is not None and self.pk is not None and CategoryClosure.objects.filter(
+            ancestor_id=self.pk, descendant_id=self.parent_id
+        ).exists():
+            raise ValidationError({'parent': 'A category cannot be placed under itself or one of its subcategories.'})
+
+
+class CategoryClosure(models.Model):
+    """
+    One ancestor/descendant pair of the category hierarchy, ``depth`` levels
+    apart. Every category is also paired with itself at depth 0, so the
+    categories under X (X included) are the rows with ``ancestor=X``.
+    """
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='blog_categoryclosure_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='blog_catclosure_desc_idx'),
+        ]
 
 
-class Tag(models.Model):
+class Tag(SlugMixin, ChangeTrackingMixin, models.Model):
     """Tag model for keyword-based organization of posts"""
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True)
@@ -37,14 +71,9 @@ class Tag(models.Model):
     
     def __str__(self):
         return self.name
-    
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
 
 
-class Post(models.Model):
+class Post(SlugMixin, ChangeTrackingMixin, models.Model):
     """Blog post model with rich content and metadata"""
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -58,7 +87,7 @@ class Post(models.Model):
         blank=True,
         help_text="Short description of the post (max 300 characters)"
     )
-    content = RichTextField()
+    content = CompressedRichTextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='posts')
     tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
@@ -67,28 +96,354 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # SlugMixin saves in a transaction, so post-save signal handlers write
+    # outbox events atomically with the post
+    slug_source_field = 'title'
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Published listings and date archives: equality on status, range and order on
+            # created_at. The trailing id lets archive pages find their rows from the index alone.
+            models.Index(fields=['status', '-created_at', '-id'], name='blog_post_status_created_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+    @property
+    def _loaded_status(self):
+        """Status as loaded from the database, used to detect publish transitions"""
+        return self.loaded_value('status')
+    
+    def get_publication_event(self, created=False):
+        """
+        Return the outbox event type for the save that just happened, or None.
+        
+        'publish' for a draft (or new post) becoming published, 'unpublish' for a
+        published post going back to draft and 'update' for edits to a post that
+        stays published. Drafts being edited produce no event.
+        """
+        was_published = not created and self._loaded_status == 'published'
+        if self.status == 'published':
+            return OutboxEvent.EVENT_UPDATE if was_published else OutboxEvent.EVENT_PUBLISH
+        if was_published:
+            return OutboxEvent.EVENT_UNPUBLISH
+        return None
 
 
 class Comment(models.Model):
-    """Comment model for user-generated content on posts"""
+    """
+    Comment model for user-generated content on posts.
+
+    Replies form a tree stored as materialized paths: ``path`` is the
+    zero-padded ID of every ancestor followed by the comment's own, so a
+    post's comments sorted by path list each thread depth first, and any
+    subtree is one range of the (post, path) index (see ``blog.threads``).
+    ``depth`` and ``child_count`` are maintained on save and delete.
+    """
+    PATH_DIGITS = 10
+    # Replies to a comment this deep are attached to its parent instead
+    MAX_DEPTH = 5
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies'
+    )
     content = models.TextField()
     is_approved = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    path = models.CharField(max_length=PATH_DIGITS * (MAX_DEPTH + 1), blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    child_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'path'], name='blog_comment_post_path_idx'),
+            # Top-level comments only, for paginating threads
+            models.Index(
+                fields=['post', 'path'], condition=models.Q(depth=0), name='blog_comment_thread_idx'
+            ),
+        ]
     
     def __str__(self):
         return f'Comment by {self.user.username} on {self.post.title}'
+    
+    def save(self, *args, **kwargs):
+        """
+        Save the comment. A new comment gets its depth and path, and its
+        parent's child count is incremented, in the same transaction. A reply
+        to a comment on another post raises ValueError, since its path would
+        place it in that post's threads.
+        """
+        if not self._state.adding or self.path:
+            return super().save(*args, **kwargs)
+        if self.parent is not None and self.parent.post_id != self.post_id:
+            raise ValueError('A reply must be on the same post as the comment it replies to.')
+        with transaction.atomic(using=kwargs.get('using')):
+            parent = self.parent
+            if parent is not None and parent.depth >= self.MAX_DEPTH:
+                parent = self.parent = parent.parent
+            self.depth = parent.depth + 1 if parent else 0
+            super().save(*args, **kwargs)
+            self.path = f'{parent.path if parent else ""}{self.pk:0{self.PATH_DIGITS}d}'
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+            if parent is not None:
+                Comment.objects.filter(pk=parent.pk).update(child_count=models.F('child_count') + 1)
+
+
+class OutboxEvent(models.Model):
+    """
+    Post lifecycle event written in the same transaction as the post change.
+    Delivered to webhooks, the search index and other sinks by ``blog.outbox``.
+    """
+    EVENT_PUBLISH = 'publish'
+    EVENT_UNPUBLISH = 'unpublish'
+    EVENT_UPDATE = 'update'
+    EVENT_DELETE = 'delete'
+    EVENT_CHOICES = [
+        (EVENT_PUBLISH, 'Publish'),
+        (EVENT_UNPUBLISH, 'Unpublish'),
+        (EVENT_UPDATE, 'Update'),
+        (EVENT_DELETE, 'Delete'),
+    ]
+    STATUS_PENDING = 'pending'
+    STATUS_DELIVERED = 'delivered'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DELIVERED, 'Delivered'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    event_type = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    # Plain ID rather than a foreign key so delete events outlive the post
+    post_id = models.BigIntegerField()
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    delivered_sinks = models.JSONField(default=list, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='blog_outbox_pending_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.get_event_type_display()} post {self.post_id} ({self.get_status_display()})'
+
+
+class Subscription(models.Model):
+    """
+    A reader's subscription to new posts by an author, in a category or with a tag.
+    Exactly one of author, category and tag is set.
+    """
+    DELIVERY_INSTANT = 'instant'
+    DELIVERY_DIGEST = 'digest'
+    DELIVERY_CHOICES = [
+        (DELIVERY_INSTANT, 'Instant'),
+        (DELIVERY_DIGEST, 'Daily digest'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='subscriptions')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='subscribers')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='subscriptions')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, null=True, blank=True, related_name='subscriptions')
+    delivery = models.CharField(max_length=10, choices=DELIVERY_CHOICES, default=DELIVERY_INSTANT)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(author__isnull=False, category__isnull=True, tag__isnull=True)
+                    | models.Q(author__isnull=True, category__isnull=False, tag__isnull=True)
+                    | models.Q(author__isnull=True, category__isnull=True, tag__isnull=False)
+                ),
+                name='blog_subscription_single_target',
+            ),
+            models.UniqueConstraint(fields=['user', 'author'], name='blog_subscription_unique_author'),
+            models.UniqueConstraint(fields=['user', 'category'], name='blog_subscription_unique_category'),
+            models.UniqueConstraint(fields=['user', 'tag'], name='blog_subscription_unique_tag'),
+        ]
+    
+    def __str__(self):
+        target = self.author or self.category or self.tag
+        return f'{self.user} → {target} ({self.get_delivery_display()})'
+
+
+class PostNotification(models.Model):
+    """
+    Marks a post whose subscriber fan-out has run, so redelivered publish
+    events or re-publishing never email subscribers twice.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, related_name='notification')
+    instant_recipients = models.PositiveIntegerField(default=0)
+    digest_recipients = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f'Notifications for {self.post_id}'
+
+
+class DigestItem(models.Model):
+    """
+    A post waiting to be included in a subscriber's next digest email.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='digest_items')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['user', 'created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='blog_digestitem_unique'),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id} for {self.user_id}'
+
+
+class PostViewDaily(models.Model):
+    """
+    Per-post, per-day view count. Written in bulk by ``blog.pageviews``
+    from buffered counters rather than once per page view.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'date'], name='blog_postviewdaily_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='blog_postviewdaily_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id} on {self.date}: {self.views}'
+
+
+class PopularPost(models.Model):
+    """
+    Precomputed time-decayed popularity ranking, rebuilt by ``compute_popularity``.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='popularity')
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['-score'], name='blog_popularpost_score_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.1f}'
+
+
+class AuthorDailyStats(models.Model):
+    """
+    Materialized per-author, per-day activity counters, maintained incrementally
+    by ``blog.stats`` and rebuilt with ``python manage.py rebuild_author_stats``.
+    Lifetime totals are the sums of these rows.
+    """
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    posts_created = models.PositiveIntegerField(default=0)
+    posts_deleted = models.PositiveIntegerField(default=0)
+    published = models.PositiveIntegerField(default=0)
+    unpublished = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    comments_deleted = models.PositiveIntegerField(default=0)
+    views = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'Author daily stats'
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'date'], name='blog_authordailystats_unique'),
+        ]
+    
+    def __str__(self):
+        return f'{self.author_id} on {self.date}'
+
+
+class SlugHistory(models.Model):
+    """
+    Previous slug of a post, category or tag, kept so old URLs redirect to the
+    current one with a single indexed lookup.
+    """
+    KIND_CHOICES = [
+        ('post', 'Post'),
+        ('category', 'Category'),
+        ('tag', 'Tag'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    old_slug = models.SlugField(max_length=200)
+    object_id = models.PositiveBigIntegerField()
+    current_slug = models.SlugField(max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'Slug history'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'old_slug'], name='blog_slughistory_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'object_id'], name='blog_slughistory_object_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.kind} {self.old_slug} -> {self.current_slug}'
+
+
+class MonthlyArchive(models.Model):
+    """
+    Number of published posts created in a month (site time zone), maintained
+    by ``blog.archive`` on publish, unpublish and delete so archive navigation
+    and pagination never count posts.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    published_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-year', '-month']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='blog_monthlyarchive_unique'),
+        ]
+    
+    def __str__(self):
+        return f'{self.year}-{self.month:02d}: {self.published_count}'
+    
+    @property
+    def start_date(self):
+        """First day of the month, for display"""
+        return date(self.year, self.month, 1)
+
+
+class CompressionDictionary(models.Model):
+    """
+    Trained zstd dictionary for compressed post bodies (see ``blog.compression``).
+    Bodies name the dictionary they were compressed with, so rows are kept.
+    """
+    dict_id = models.PositiveBigIntegerField(unique=True)
+    data = models.BinaryField()
+    sample_count = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name_plural = 'Compression dictionaries'
+    
+    def __str__(self):
+        return f'Dictionary {self.dict_id} ({len(self.data)} bytes)'
+
@@ -0,0 +1,177 @@
+"""
+Subscriber notification fan-out for newly published posts.
+
+Recipients are resolved with one set-based query over every subscription that
+matches the post's author, category or tags; a reader subscribed through
+several of them is collapsed into a single row, and instant delivery wins over
+digest delivery. Instant emails are sent in batches over one reused SMTP
+connection with a rate limit, and digest readers get a DigestItem row that
+``send_digests`` turns into one email per reader.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Case, IntegerField, Max, Q, Value, When
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import DigestItem, Post, PostNotification, Subscription
+
+logger = logging.getLogger(__name__)
+
+
+def get_recipients(post, tag_ids):
+    """
+    Return ``(user_id, email, instant)`` rows for every subscriber of ``post``,
+    deduplicated across overlapping subscriptions. The author is excluded.
+    """
+    matches = Q(author_id=post.author_id) | Q(tag_id__in=tag_ids)
+    if post.category_id:
+        matches |= Q(category_id=post.category_id)
+    return (
+        Subscription.objects.filter(matches, user__is_active=True)
+        .exclude(user_id=post.author_id)
+        .exclude(user__email='')
+        .values('user_id', 'user__email')
+        .annotate(instant=Max(Case(
+            When(delivery=Subscription.DELIVERY_INSTANT, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )))
+        .order_by('user_id')
+        .values_list('user_id', 'user__email', 'instant')
+    )
+
+
+class BatchSender:
+    """
+    Sends messages in fixed-size batches over a single open email connection,
+    pausing as needed to stay under ``rate`` messages per second.
+    """
+
+    def __init__(self, batch_size=None, rate=None, connection=None):
+        self.batch_size = batch_size or settings.BLOG_NOTIFICATION_BATCH_SIZE
+        self.rate = rate or settings.BLOG_NOTIFICATION_RATE_LIMIT
+        self.connection = connection or get_connection()
+        self.pending = []
+        self.sent = 0
+        self.started = None
+
+    def __enter__(self):
+        self.connection.open()
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.flush()
+        self.connection.close()
+
+    def add(self, message):
+        self.pending.append(message)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        # Sleep until this batch fits within the configured rate
+        earliest = self.started + (self.sent + len(self.pending)) / self.rate
+        delay = earliest - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.sent += self.connection.send_messages(self.pending) or 0
+        self.pending = []
+
+
+def post_url(slug):
+    """
+    Absolute URL of a post for use in emails.
+    """
+    return settings.SITE_URL.rstrip('/') + reverse('blog:post_detail', kwargs={'slug': slug})
+
+
+def fan_out_post(post_id):
+    """
+    Notify every subscriber of a newly published post at most once.
+    Returns the PostNotification record, or None if the post was already handled.
+    """
+    post = Post.objects.select_related('author', 'category').filter(pk=post_id, status='published').first()
+    if post is None:
+        return None
+    notification, created = PostNotification.objects.get_or_create(post=post)
+    if not created:
+        return None
+
+    tag_ids = list(post.tags.values_list('id', flat=True))
+    subject = f'New post: {post.title}'
+    body = render_to_string('blog/emails/new_post.txt', {'post': post, 'post_url': post_url(post.slug)})
+
+    digest_user_ids = []
+    with BatchSender() as sender:
+        for user_id, email, instant in get_recipients(post, tag_ids).iterator(chunk_size=2000):
+            if instant:
+                sender.add(EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [email]))
+            else:
+                digest_user_ids.append(user_id)
+
+    DigestItem.objects.bulk_create(
+        [DigestItem(user_id=user_id, post=post) for user_id in digest_user_ids],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    notification.instant_recipients = sender.sent
+    notification.digest_recipients = len(digest_user_ids)
+    notification.completed_at = timezone.now()
+    notification.save(update_fields=['instant_recipients', 'digest_recipients', 'completed_at'])
+    logger.info(
+        f'Notified subscribers of post {post.id}: {sender.sent} emails, '
+        f'{len(digest_user_ids)} queued for digest'
+    )
+    return notification
+
+
+def send_digests():
+    """
+    Send one digest email per reader with pending DigestItems, then clear them.
+    Items for posts that were unpublished in the meantime are dropped.
+    Returns the number of digests sent.
+    """
+    items = DigestItem.objects.order_by('user_id', 'created_at').values_list(
+        'id', 'user_id', 'user__email', 'post__title', 'post__slug', 'post__status'
+    )
+    digests = 0
+    handled_ids = []
+
+    def send_digest(email, entries, sender):
+        body = render_to_string('blog/emails/digest.txt', {
+            'posts': [{'title': title, 'url': post_url(slug)} for title, slug in entries],
+        })
+        sender.add(EmailMessage(
+            f'{len(entries)} new post{"s" if len(entries) != 1 else ""} for you',
+            body,
+            settings.DEFAULT_FROM_EMAIL,
+            [email],
+        ))
+
+    with BatchSender() as sender:
+        current_user, current_email, entries = None, None, []
+        for item_id, user_id, email, title, slug, status in items.iterator(chunk_size=2000):
+            if user_id != current_user:
+                if entries and current_email:
+                    send_digest(current_email, entries, sender)
+                    digests += 1
+                current_user, current_email, entries = user_id, email, []
+            if status == 'published':
+                entries.append((title, slug))
+            handled_ids.append(item_id)
+        if entries and current_email:
+            send_digest(current_email, entries, sender)
+            digests += 1
+
+    for start in range(0, len(handled_ids), 1000):
+        DigestItem.objects.filter(id__in=handled_ids[start:start + 1000]).delete()
+    return digests
@@ -0,0 +1,235 @@
+"""
+Transactional outbox for post lifecycle events.
+
+``record_event`` is called from the post signal handlers, inside the same
+transaction as the post change, so an event exists if and only if the change
+was committed. ``dispatch_pending`` later delivers pending events in batches
+to every configured sink (``BLOG_OUTBOX_SINKS``). Each event remembers which
+sinks already accepted it, so a failing sink is retried with backoff without
+re-sending to the others. Delivery is at-least-once: sinks must be idempotent.
+"""
+import json
+import logging
+import urllib.request
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .compression import decompress_text
+from .models import OutboxEvent, Post
+
+logger = logging.getLogger(__name__)
+
+
+def record_event(post, event_type):
+    """
+    Write an outbox event for ``post``. Must run inside the post's transaction.
+    Uses only columns already on the instance, so no extra queries are made.
+    """
+    return OutboxEvent.objects.create(
+        event_type=event_type,
+        post_id=post.pk,
+        payload={
+            'post_id': post.pk,
+            'slug': post.slug,
+            'title': post.title,
+            'status': post.status,
+            'previous_status': post._loaded_status,
+            'author_id': post.author_id,
+            'category_id': post.category_id,
+            'occurred_at': timezone.now().isoformat(),
+        },
+    )
+
+
+def post_json(url, data, timeout):
+    """
+    POST ``data`` as JSON and raise for non-2xx responses.
+    """
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(data).encode(),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        if response.status >= 300:
+            raise RuntimeError(f'{url} responded with HTTP {response.status}')
+
+
+class Sink:
+    """
+    Base class for outbox destinations. ``deliver`` receives a batch of events
+    and raises to signal that the whole batch must be retried.
+    """
+    name = None
+
+    def deliver(self, events):
+        raise NotImplementedError
+
+
+class WebhookSink(Sink):
+    """
+    POST each batch as ``{"events": [...]}`` to every URL in BLOG_OUTBOX_WEBHOOK_URLS.
+    """
+    name = 'webhook'
+
+    def deliver(self, events):
+        body = {'events': [{'id': e.id, 'type': e.event_type, **e.payload} for e in events]}
+        for url in getattr(settings, 'BLOG_OUTBOX_WEBHOOK_URLS', []):
+            post_json(url, body, timeout=getattr(settings, 'BLOG_OUTBOX_TIMEOUT', 10))
+
+
+class SearchIndexSink(Sink):
+    """
+    Push upserts and deletions to the search index at BLOG_SEARCH_INDEX_URL.
+    Published posts in the batch are loaded with a single query.
+    """
+    name = 'search'
+
+    def deliver(self, events):
+        url = getattr(settings, 'BLOG_SEARCH_INDEX_URL', None)
+        if not url:
+            return
+        # Later events win: a post published then withdrawn in one batch is deleted
+        latest = {}
+        for event in events:
+            latest[event.post_id] = event.event_type
+        upsert_ids = [pk for pk, kind in latest.items() if kind in (OutboxEvent.EVENT_PUBLISH, OutboxEvent.EVENT_UPDATE)]
+        delete_ids = [pk for pk in latest if pk not in upsert_ids]
+        documents = list(
+            Post.objects.filter(id__in=upsert_ids, status='published').values(
+                'id', 'slug', 'title', 'description', 'content', 'author_id', 'category_id', 'created_at'
+            )
+        )
+        for document in documents:
+            document['created_at'] = document['created_at'].isoformat()
+            document['content'] = decompress_text(document['content'])
+        delete_ids += sorted(set(upsert_ids) - {d['id'] for d in documents})
+        post_json(url, {'upsert': documents, 'delete': delete_ids},
+                  timeout=getattr(settings, 'BLOG_OUTBOX_TIMEOUT', 10))
+
+
+class NotificationSink(Sink):
+    """
+    Queue subscriber notifications for newly published posts.
+    Fan-out runs on the ``mail`` queue so slow SMTP never holds up dispatch.
+    """
+    name = 'notify'
+
+    def deliver(self, events):
+        from .tasks import notify_subscribers
+        for event in events:
+            if event.event_type == OutboxEvent.EVENT_PUBLISH:
+                notify_subscribers.delay(event.post_id)
+
+
+class SnapshotSink(Sink):
+    """
+    Queue an incremental static export so changed pages are re-rendered.
+    """
+    name = 'snapshot'
+
+    def deliver(self, events):
+        from .tasks import export_static_site
+        export_static_site.delay()
+
+
+@lru_cache(maxsize=None)
+def get_sinks():
+    return [import_string(path)() for path in settings.BLOG_OUTBOX_SINKS]
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff between delivery attempts, capped at one hour.
+    """
+    return timedelta(seconds=min(3600, 5 * 2 ** max(0, attempts - 1)))
+
+
+def claim_batch(batch_size):
+    """
+    Claim a batch of due events in a short transaction. Claimed events are
+    not due again until BLOG_OUTBOX_CLAIM_TIMEOUT has passed, so other
+    dispatchers skip them while they are delivered outside any transaction,
+    and a dispatcher that dies mid-delivery leaves them to be retried.
+    """
+    claim_timeout = timedelta(seconds=getattr(settings, 'BLOG_OUTBOX_CLAIM_TIMEOUT', 300))
+    with transaction.atomic():
+        now = timezone.now()
+        queryset = OutboxEvent.objects.filter(
+            status=OutboxEvent.STATUS_PENDING,
+            next_attempt_at__lte=now,
+        ).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        events = list(queryset[:batch_size])
+        OutboxEvent.objects.filter(id__in=[e.id for e in events]).update(next_attempt_at=now + claim_timeout)
+    return events
+
+
+def deliver_batch(events):
+    """
+    Send ``events`` to every sink that has not accepted them yet, recording
+    accepted sinks on the events. Returns the error of each failed sink.
+    """
+    errors = []
+    for sink in get_sinks():
+        pending = [e for e in events if sink.name not in e.delivered_sinks]
+        if not pending:
+            continue
+        try:
+            sink.deliver(pending)
+        except Exception as e:
+            errors.append(f'{sink.name}: {e}')
+            logger.warning(f'Outbox sink {sink.name} failed for {len(pending)} events: {e}')
+            continue
+        for event in pending:
+            event.delivered_sinks.append(sink.name)
+    return errors
+
+
+def dispatch_pending(batch_size=100, max_batches=None):
+    """
+    Deliver due outbox events to all sinks, batch by batch.
+    Returns the number of events that were fully delivered.
+    
+    Sinks make network calls, so no transaction is open while they run: the
+    batch is claimed in one short transaction and its outcome written in
+    another, keeping database locks (SQLite's write lock in particular) short.
+    """
+    max_attempts = getattr(settings, 'BLOG_OUTBOX_MAX_ATTEMPTS', 10)
+    delivered = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        events = claim_batch(batch_size)
+        if not events:
+            break
+        batches += 1
+        errors = deliver_batch(events)
+
+        now = timezone.now()
+        for event in events:
+            if all(sink.name in event.delivered_sinks for sink in get_sinks()):
+                event.status = OutboxEvent.STATUS_DELIVERED
+                event.delivered_at = now
+                event.last_error = ''
+                delivered += 1
+            else:
+                event.attempts += 1
+                event.last_error = '\n'.join(errors)
+                event.next_attempt_at = now + retry_delay(event.attempts)
+                if event.attempts >= max_attempts:
+                    event.status = OutboxEvent.STATUS_FAILED
+        with transaction.atomic():
+            OutboxEvent.objects.bulk_update(
+                events,
+                ['status', 'delivered_sinks', 'attempts', 'next_attempt_at', 'last_error', 'delivered_at'],
+            )
+        if len(events) < batch_size:
+            break
+    return delivered
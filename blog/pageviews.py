@@ -0,0 +1,181 @@
+"""
+Buffered page-view counting and popularity ranking.
+
+``record_view`` only increments an in-process counter, so the post detail
+page never writes to the database. A background thread in each process
+flushes the aggregated deltas every ``BLOG_VIEW_FLUSH_INTERVAL`` seconds into
+PostViewDaily rollup rows with a fixed number of queries per flush, however
+many views were buffered, and adds them to the authors' daily statistics.
+Remaining deltas are flushed at interpreter exit.
+
+``compute_popularity`` turns the rollups into a time-decayed score per post
+and stores the top posts in PopularPost for the "popular this week" widget.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.utils import timezone
+
+from .models import PopularPost, Post, PostViewDaily
+from .stats import record_views
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer = Counter()
+_flusher = None
+_recording = True
+
+
+def record_view(post_id):
+    """
+    Count one view of ``post_id`` for today. Never touches the database.
+    """
+    global _flusher
+    if not _recording:
+        return
+    with _lock:
+        _buffer[(post_id, timezone.localdate())] += 1
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_periodically, name='pageview-flusher', daemon=True)
+            _flusher.start()
+
+
+def disable_view_recording():
+    """
+    Stop counting views in this process, e.g. while rendering pages for a
+    static export rather than for readers.
+    """
+    global _recording
+    _recording = False
+
+
+@contextmanager
+def views_not_recorded():
+    """
+    Stop counting views in this process for the duration of the block, e.g.
+    while pages are requested to warm caches rather than by readers.
+    """
+    global _recording
+    recording, _recording = _recording, False
+    try:
+        yield
+    finally:
+        _recording = recording
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(settings.BLOG_VIEW_FLUSH_INTERVAL)
+        try:
+            flush_views()
+        except Exception:
+            logger.exception('Failed to flush page view counters')
+
+
+def flush_views():
+    """
+    Write buffered view deltas to PostViewDaily and return the number of views
+    written. On failure the deltas are put back for the next flush.
+    """
+    with _lock:
+        pending = dict(_buffer)
+        _buffer.clear()
+    if not pending:
+        return 0
+
+    try:
+        with transaction.atomic():
+            # Drop views of posts deleted since they were counted
+            authors = dict(
+                Post.objects.filter(id__in={post_id for post_id, _ in pending}).values_list('id', 'author_id')
+            )
+            pending = {key: views for key, views in pending.items() if key[0] in authors}
+            # Make sure every (post, date) row exists, then increment them all
+            PostViewDaily.objects.bulk_create(
+                [PostViewDaily(post_id=post_id, date=date) for post_id, date in pending],
+                ignore_conflicts=True,
+            )
+            dates = {date for _, date in pending}
+            rows = PostViewDaily.objects.filter(
+                date__in=dates,
+                post_id__in={post_id for post_id, _ in pending},
+            ).only('id', 'post_id', 'date')
+            updates = []
+            for row in rows:
+                delta = pending.get((row.post_id, row.date))
+                if delta:
+                    row.views = F('views') + delta
+                    updates.append(row)
+            PostViewDaily.objects.bulk_update(updates, ['views'], batch_size=500)
+            record_views(pending, authors)
+    except Exception:
+        with _lock:
+            _buffer.update(pending)
+        raise
+    return sum(pending.values())
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception('Failed to flush page view counters at exit')
+
+
+def compute_popularity(days=None, half_life=None, limit=None):
+    """
+    Rebuild PopularPost from the last ``days`` of rollups. Each day's views are
+    weighted by 0.5 ** (age_in_days / half_life), computed in one aggregate query.
+    Returns the number of ranked posts.
+    """
+    days = days or settings.BLOG_POPULAR_WINDOW_DAYS
+    half_life = half_life or settings.BLOG_POPULAR_HALF_LIFE_DAYS
+    limit = limit or settings.BLOG_POPULAR_LIMIT
+    today = timezone.localdate()
+    weighted_views = Case(
+        *[
+            When(date=today - timedelta(days=age), then=F('views') * Value(0.5 ** (age / half_life)))
+            for age in range(days)
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    scores = (
+        PostViewDaily.objects.filter(
+            date__gt=today - timedelta(days=days),
+            post__status='published',
+        )
+        .values('post_id')
+        .annotate(score=Sum(weighted_views))
+        .order_by('-score')[:limit]
+    )
+    now = timezone.now()
+    ranked = [PopularPost(post_id=row['post_id'], score=row['score'], computed_at=now) for row in scores]
+    with transaction.atomic():
+        PopularPost.objects.all().delete()
+        PopularPost.objects.bulk_create(ranked)
+    return len(ranked)
+
+
+def get_trending_posts(limit=5):
+    """
+    Return the top published posts from the precomputed ranking, with only
+    the fields the widget shows.
+    """
+    return [
+        entry.post for entry in PopularPost.objects.select_related(
+            'post__author', 'post__category'
+        ).filter(post__status='published').only(
+            'post__title', 'post__slug', 'post__author__username', 'post__category__name'
+        )[:limit]
+    ]
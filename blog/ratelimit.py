@@ -0,0 +1,225 @@
+"""
+Rate limiting for views that are expensive or attractive to abuse.
+
+Each rule in ``RATELIMIT_RATES`` allows a number of requests per period and
+per client (IP address, or user when logged in). Requests are counted in
+fixed windows of one period, and a request is allowed while the current
+window's count plus the previous window's count, weighted by how much of the
+previous window still falls within the last period, stays within the rate.
+This sliding-window estimate needs one increment and one read per request and
+has no burst at window boundaries.
+
+Views opt in with ``RateLimitMixin`` (class-based views, sync or async) or the
+``ratelimit`` decorator (function views). The check runs first in
+``dispatch``, so a limited client gets a 429 response with a Retry-After
+header before the view runs a query, hashes a password or renders anything.
+
+Counters live in the default cache, which every process shares and which
+increments atomically: Redis, or the database cache in ``BlogBreeze.cache``.
+Every rule a view uses must be in ``RATELIMIT_RATES``; a rule set to None is
+not limited, and a missing one raises ImproperlyConfigured.
+"""
+import functools
+import logging
+import math
+import re
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import add_never_cache_headers
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+@functools.cache
+def parse_rate(rate):
+    """
+    Return ``(requests, period in seconds)`` for a rate such as '10/5m'.
+    The period is a number of seconds or of s, m, h or d units.
+    """
+    count, _, period = rate.partition('/')
+    match = re.fullmatch(r'(\d*)([smhd]?)', period.strip())
+    if not count.strip().isdigit() or match is None or not any(match.groups()):
+        raise ImproperlyConfigured(f'Invalid rate {rate!r}; use "<requests>/<period>", e.g. "10/5m".')
+    return int(count), int(match.group(1) or 1) * PERIODS[match.group(2) or 's']
+
+
+def get_rate(scope):
+    """
+    Return the rate of rule ``scope``, or None if the rule is turned off.
+    """
+    try:
+        return settings.RATELIMIT_RATES[scope]
+    except KeyError:
+        raise ImproperlyConfigured(f'No rate limit rule {scope!r} in RATELIMIT_RATES; set it to None to turn it off.')
+
+
+def client_ip(request):
+    """
+    Return the client's IP address. Behind RATELIMIT_PROXY_COUNT trusted
+    proxies that append to X-Forwarded-For, that is the address the outermost
+    proxy received the request from; earlier entries can be forged.
+    """
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        if len(forwarded) >= proxies and forwarded[-proxies]:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request, key, user):
+    """
+    Return the name ``request`` is counted under: by IP address for
+    ``key='ip'``, by user for ``key='user'`` (by IP address when anonymous),
+    or the result of ``key(request)`` for a callable.
+    """
+    if callable(key):
+        return key(request)
+    if key == 'user' and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def cache_counts(name, window, period):
+    """
+    Count a request in the cache. Return the counts of the current and
+    previous windows.
+    """
+    current_key = f'ratelimit:{name}:{window}'
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        current = 1 if cache.add(current_key, 1, period * 2) else cache.incr(current_key)
+    return current, cache.get(f'ratelimit:{name}:{window - 1}', 0)
+
+
+async def acache_counts(name, window, period):
+    """
+    Async version of ``cache_counts``.
+    """
+    current_key = f'ratelimit:{name}:{window}'
+    try:
+        current = await cache.aincr(current_key)
+    except ValueError:
+        current = 1 if await cache.aadd(current_key, 1, period * 2) else await cache.aincr(current_key)
+    return current, await cache.aget(f'ratelimit:{name}:{window - 1}', 0)
+
+
+def retry_after(limit, period, elapsed, current, previous):
+    """
+    Return the whole seconds until one more request would be allowed.
+    """
+    if current >= limit:
+        # Wait for the next window, and for this window's weight to fade enough
+        wait = period - elapsed + period * (1 - (limit - 1) / current)
+    else:
+        wait = period * (1 - (limit - 1 - current) / previous) - elapsed
+    return max(1, math.ceil(wait))
+
+
+def too_many_requests(seconds):
+    response = HttpResponse(render_to_string('429.html', {'retry_after': seconds}), status=429)
+    response['Retry-After'] = str(seconds)
+    add_never_cache_headers(response)
+    return response
+
+
+def start(request, scope, key, user):
+    limit, period = parse_rate(get_rate(scope))
+    now = time.time()
+    window = int(now // period)
+    return limit, period, window, now - window * period, f'{scope}:{client_key(request, key, user)}'
+
+
+def decide(scope, name, limit, period, elapsed, current, previous):
+    """
+    Return None if the counted request is within the rate, else a 429 response.
+    """
+    if previous * (1 - elapsed / period) + current <= limit:
+        return None
+    logger.info(f'Rate limit {scope} exceeded by {name}')
+    return too_many_requests(retry_after(limit, period, elapsed, current, previous))
+
+
+def check(request, scope, key='ip'):
+    """
+    Count ``request`` against rule ``scope``. Return None if it is allowed,
+    or the 429 response to send instead.
+    """
+    if not settings.RATELIMIT_ENABLED or get_rate(scope) is None:
+        return None
+    limit, period, window, elapsed, name = start(request, scope, key, request.user)
+    return decide(scope, name, limit, period, elapsed, *cache_counts(name, window, period))
+
+
+async def acheck(request, scope, key='ip'):
+    """
+    Async version of ``check``.
+    """
+    if not settings.RATELIMIT_ENABLED or get_rate(scope) is None:
+        return None
+    user = await request.auser() if key == 'user' else None
+    limit, period, window, elapsed, name = start(request, scope, key, user)
+    return decide(scope, name, limit, period, elapsed, *await acache_counts(name, window, period))
+
+
+class RateLimitMixin:
+    """
+    Limit the requests with a method in ``ratelimit_methods`` to the rate of
+    rule ``ratelimit_scope`` in RATELIMIT_RATES, per ``ratelimit_key``
+    (see ``client_key``). Put it first among the view's bases.
+    """
+    ratelimit_scope = None
+    ratelimit_key = 'ip'
+    ratelimit_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.ratelimit_methods:
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self.limited_dispatch(request, *args, **kwargs)
+        return check(request, self.ratelimit_scope, self.ratelimit_key) or super().dispatch(request, *args, **kwargs)
+
+    async def limited_dispatch(self, request, *args, **kwargs):
+        return (
+            await acheck(request, self.ratelimit_scope, self.ratelimit_key)
+            or await super().dispatch(request, *args, **kwargs)
+        )
+
+
+def ratelimit(scope, key='ip', methods=('POST',)):
+    """
+    Decorator limiting a function view (sync or async) like ``RateLimitMixin``.
+
+    Usage:
+        @ratelimit('comment', key='user')
+        def add_comment(request): ...
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def limited(request, *args, **kwargs):
+                if request.method in methods:
+                    response = await acheck(request, scope, key)
+                    if response is not None:
+                        return response
+                return await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def limited(request, *args, **kwargs):
+                if request.method in methods:
+                    response = check(request, scope, key)
+                    if response is not None:
+                        return response
+                return view(request, *args, **kwargs)
+        return limited
+    return decorator
@@ -2,12 +2,22 @@
 Signal handlers for the blog app.
 
 This module contains signal handlers that respond to model events,
-particularly for post publication notifications.
+particularly for post publication notifications and author statistics.
 """
 import logging
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.contrib.auth.models import User
+from django.db.models import F, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
-from .models import Post
+from django.utils import timezone
+from .archive import record_published
+from .categories import detach_category, invalidate_category_counts, place_category
+from .feeds import invalidate_feed_cache
+from .models import Category, Comment, Post, OutboxEvent
+from .outbox import record_event
+from .stats import record_activity
+from .tasks import dispatch_outbox
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +27,12 @@ def post_published_handler(sender, instance, created, **kwargs):
     """
     Signal handler triggered when a post is saved.
     
-    Detects when a post status changes to 'published' and logs the publication event.
-    This handler includes error handling to ensure signal failures don't block post saves.
+    Detects publish, unpublish and published-post update transitions by comparing
+    the status loaded with the instance to the saved one, and writes an outbox event
+    in the same transaction as the save. Delivery is queued for after the commit.
+    
+    The outbox write is deliberately not wrapped in error handling: if the event
+    cannot be recorded, the post change is rolled back with it.
     
     Args:
         sender: The model class (Post)
@@ -28,22 +42,197 @@ def post_published_handler(sender, instance, created, **kwargs):
     
     Requirements: 15.1, 15.2, 15.3, 15.4, 15.5
     """
-    try:
-        # Only process if the post is being updated (not created) and status is published
-        if not created and instance.status == 'published':
-            logger.info(
-                f'Post published: "{instance.title}" by {instance.author.username} '
-                f'(ID: {instance.id}, Slug: {instance.slug})'
-            )
-            # Future enhancements can be added here:
-            # - Send email notifications to subscribers
-            # - Update RSS feed
-            # - Trigger social media posts
-            # - Update search index
-            
-    except Exception as e:
-        # Log the error but don't raise it to prevent blocking the post save
-        logger.error(
-            f'Error in post_published_handler for post ID {instance.id}: {str(e)}',
-            exc_info=True
-        )
+    event_type = instance.get_publication_event(created)
+    record_post_activity(instance, created, event_type)
+    if event_type is None:
+        return
+    
+    record_event(instance, event_type)
+    mark_event_recorded(instance)
+    transaction.on_commit(dispatch_outbox.delay)
+    transaction.on_commit(invalidate_category_counts)
+    transaction.on_commit(invalidate_feed_cache)
+    
+    if event_type == OutboxEvent.EVENT_PUBLISH:
+        record_published(instance.created_at, 1)
+    elif event_type == OutboxEvent.EVENT_UNPUBLISH:
+        record_published(instance.created_at, -1)
+    
+    if event_type == OutboxEvent.EVENT_PUBLISH:
+        logger.info(f'Post published: "{instance.title}" (ID: {instance.id}, Slug: {instance.slug})')
+
+
+def mark_event_recorded(post):
+    """
+    Note on ``post`` that an event was recorded for it in the current
+    transaction, so a tag change saved with it does not record another.
+    """
+    post._event_recorded = True
+    transaction.on_commit(lambda: post.__dict__.pop('_event_recorded', None))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Treat a change to a post's tags as an edit of the post.
+    
+    Tags live in their own table, so changing only the tags saves no Post
+    column and fires no post_save. Whoever changes them (the admin, the post
+    form, ``post.tags.set()`` or ``tag.posts.add()``), the posts' updated_at
+    is bumped for snapshots and feeds, and published posts get an update
+    event for the search index, facets and other outbox sinks, unless the
+    same transaction already recorded one for that instance.
+    """
+    if reverse and action == 'pre_clear':
+        # The cleared posts are gone from the relation by post_clear
+        instance._cleared_post_ids = list(instance.posts.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if action != 'post_clear' and not pk_set:
+        # add() of tags the post already has changes nothing
+        return
+    
+    if not reverse:
+        posts = [instance]
+    elif action == 'post_clear':
+        posts = list(Post.objects.filter(pk__in=instance.__dict__.pop('_cleared_post_ids', [])))
+    else:
+        posts = list(Post.objects.filter(pk__in=pk_set))
+    if not posts:
+        return
+    
+    now = timezone.now()
+    Post.objects.filter(pk__in=[post.pk for post in posts]).update(updated_at=now)
+    recorded = False
+    for post in posts:
+        post.updated_at = now
+        if post._loaded_values is not None:
+            post._loaded_values['updated_at'] = now
+        if post._state.adding or post.status != 'published' or getattr(post, '_event_recorded', False):
+            continue
+        record_event(post, OutboxEvent.EVENT_UPDATE)
+        mark_event_recorded(post)
+        recorded = True
+    if recorded:
+        transaction.on_commit(dispatch_outbox.delay)
+        transaction.on_commit(invalidate_feed_cache)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted_handler(sender, instance, **kwargs):
+    """
+    Record a delete event, and drop the post from its archive month, when a
+    published post is removed. Published means the stored status: an unsaved
+    status change on the instance was never counted anywhere.
+    """
+    if instance._loaded_status == 'published':
+        record_event(instance, OutboxEvent.EVENT_DELETE)
+        record_published(instance.created_at, -1)
+        transaction.on_commit(dispatch_outbox.delay)
+        transaction.on_commit(invalidate_category_counts)
+        transaction.on_commit(invalidate_feed_cache)
+
+
+def origin_model(origin):
+    """
+    Return the model class whose deletion triggered a cascade.
+    """
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def record_post_activity(post, created, event_type):
+    """
+    Count post creation and publication transitions in the author's daily stats.
+    """
+    deltas = {}
+    if created:
+        deltas['posts_created'] = 1
+    if event_type == OutboxEvent.EVENT_PUBLISH:
+        deltas['published'] = 1
+    elif event_type == OutboxEvent.EVENT_UNPUBLISH:
+        deltas['unpublished'] = 1
+    if deltas:
+        record_activity(post.author_id, **deltas)
+
+
+@receiver(pre_delete, sender=Post)
+def post_pre_delete_handler(sender, instance, **kwargs):
+    """
+    Count the post's comments before they are removed by the cascade, so the
+    comment handler does not need to run once per comment.
+    """
+    instance._comment_count = instance.comments.count()
+
+
+@receiver(post_delete, sender=Post)
+def post_stats_delete_handler(sender, instance, origin=None, **kwargs):
+    """
+    Record a deleted post in the author's daily stats. Skipped when the author
+    is being deleted, since their stats rows go with them.
+    """
+    if origin_model(origin) is User:
+        return
+    was_published = instance._loaded_status == 'published'
+    record_activity(
+        instance.author_id,
+        posts_deleted=1,
+        unpublished=int(was_published),
+        comments_deleted=getattr(instance, '_comment_count', 0),
+    )
+
+
+@receiver(post_save, sender=Category)
+def category_saved_handler(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Update the category closure table when a category is created or moved.
+    Saves that leave the parent alone do nothing.
+    """
+    if created or update_fields is None or 'parent' in update_fields:
+        place_category(instance, created)
+        transaction.on_commit(invalidate_category_counts)
+
+
+@receiver(pre_delete, sender=Category)
+def category_pre_delete_handler(sender, instance, **kwargs):
+    """
+    Detach the subcategories of a category that is about to be deleted.
+    """
+    detach_category(instance)
+    transaction.on_commit(invalidate_category_counts)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created_handler(sender, instance, created, **kwargs):
+    """
+    Count a new comment for the author of the post it was left on.
+    """
+    if created:
+        record_activity(instance.post.author_id, comments=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted_handler(sender, instance, origin=None, **kwargs):
+    """
+    Count a deleted comment for the post's author. Comments removed together
+    with their post were already counted by the post handler, and comments on
+    a deleted author's own posts need no stats.
+    """
+    if origin_model(origin) is Post or isinstance(origin, QuerySet) and origin.model is User:
+        return
+    author_id = Post.objects.filter(pk=instance.post_id).values_list('author_id', flat=True).first()
+    if author_id is None or isinstance(origin, User) and author_id == origin.pk:
+        return
+    record_activity(author_id, comments_deleted=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_reply_deleted_handler(sender, instance, origin=None, **kwargs):
+    """
+    Keep the parent's child count in step when a reply is deleted. Parents
+    deleted in the same cascade are already gone and match nothing; nothing
+    is updated when the whole post is being deleted.
+    """
+    if instance.parent_id is None or origin_model(origin) is Post:
+        return
+    Comment.objects.filter(pk=instance.parent_id, child_count__gt=0).update(child_count=F('child_count') - 1)
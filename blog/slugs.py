@@ -0,0 +1,113 @@
+"""
+Slug allocation and old-slug redirects.
+
+``next_free_slug`` finds the first unused ``base``/``base-N`` slug with one
+query over the slugs sharing the prefix (a range scan on the unique index on
+PostgreSQL). Two concurrent saves can still pick the same slug, so
+``SlugMixin`` saves inside a savepoint and allocates again when the insert
+hits the unique constraint. Existing slugs are never regenerated; when a slug
+is changed by hand the old one is kept in SlugHistory so its URLs redirect.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+SLUG_ATTEMPTS = 5
+
+
+def next_free_slug(model, value, exclude_pk=None):
+    """
+    Return ``slugify(value)``, or its lowest free ``-N`` variant if taken,
+    truncated to fit the model's slug length.
+    """
+    max_length = model._meta.get_field('slug').max_length
+    base = slugify(value)[:max_length - 10].strip('-') or model._meta.model_name
+    taken = model._default_manager.filter(Q(slug=base) | Q(slug__startswith=f'{base}-'))
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    taken = taken.values_list('slug', flat=True)
+    base_taken = False
+    suffixes = set()
+    for slug in taken:
+        if slug == base:
+            base_taken = True
+        elif slug[len(base) + 1:].isdigit():
+            suffixes.add(int(slug[len(base) + 1:]))
+    if not base_taken:
+        return base
+    suffix = 1
+    while suffix in suffixes:
+        suffix += 1
+    return f'{base}-{suffix}'
+
+
+def record_slug_change(instance, old_slug):
+    """
+    Remember ``old_slug`` for ``instance`` and point every earlier slug of the
+    object at its current one.
+    """
+    from .models import SlugHistory
+
+    kind = instance._meta.model_name
+    if not old_slug or old_slug == instance.slug:
+        return
+    SlugHistory.objects.filter(kind=kind, old_slug=instance.slug).delete()
+    SlugHistory.objects.filter(kind=kind, object_id=instance.pk).update(current_slug=instance.slug)
+    SlugHistory.objects.update_or_create(
+        kind=kind,
+        old_slug=old_slug,
+        defaults={'object_id': instance.pk, 'current_slug': instance.slug},
+    )
+
+
+def find_current_slug(kind, slug):
+    """
+    Return the current slug for an object that used to be at ``slug``, or None.
+    """
+    from .models import SlugHistory
+    return SlugHistory.objects.filter(kind=kind, old_slug=slug).values_list('current_slug', flat=True).first()
+
+
+async def afind_current_slug(kind, slug):
+    """
+    Async version of ``find_current_slug``.
+    """
+    from .models import SlugHistory
+    return await SlugHistory.objects.filter(kind=kind, old_slug=slug).values_list('current_slug', flat=True).afirst()
+
+
+class SlugMixin:
+    """
+    Model mixin that fills an empty ``slug`` from ``slug_source_field`` and
+    records manual slug changes. Requires ChangeTrackingMixin further along
+    the bases. The save, its signal handlers and the slug history run in one
+    transaction, which a save with nothing to write does not open.
+    """
+    slug_source_field = 'name'
+
+    def save(self, *args, **kwargs):
+        if self.slug and self.is_noop_save(args, kwargs):
+            # Nothing to write, so no transaction either
+            return
+        using = kwargs.get('using')
+        old_slug = self.loaded_value('slug')
+        if self.slug:
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+                record_slug_change(self, old_slug)
+            return
+
+        model = type(self)
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = next_free_slug(model, getattr(self, self.slug_source_field), exclude_pk=self.pk)
+            try:
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+                    record_slug_change(self, old_slug)
+                return
+            except IntegrityError:
+                # Retry only if a concurrent save took the slug we picked
+                conflict = model._default_manager.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                self.slug = ''
+                if not conflict or attempt == SLUG_ATTEMPTS - 1:
+                    raise
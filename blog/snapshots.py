@@ -0,0 +1,314 @@
+"""
+Static HTML snapshots of the public blog pages.
+
+``export_static_site`` renders what an anonymous reader sees on the post list,
+post detail, category and tag pages and the RSS feed into files under
+``STATIC_SNAPSHOT_ROOT`` (``post/<slug>/index.html``, ``feed/index.xml``, ...).
+Every page gets a fingerprint built from the database rows it displays: the
+``updated_at`` of the posts on it, the approved comments, the trending list
+and the category and tag names. A manifest keeps the fingerprints of the last export,
+so later runs only render pages whose fingerprint changed and delete the files
+of pages that no longer exist. Template or code changes need ``--force``.
+
+The files can be served by a CDN or web server, falling through to Django when
+a file is missing. ``StaticSnapshotMiddleware`` serves them from the app
+itself, before sessions, auth or the database are touched. Only anonymous
+requests get snapshots; readers with a session, pending messages or a recent
+write (the replica pin cookie) always reach the views.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from BlogBreeze.routers import PIN_COOKIE
+from .models import Category, CategoryClosure, Comment, PopularPost, Post, Tag
+from .pageviews import disable_view_recording
+
+MANIFEST_FILE = 'manifest.json'
+LOCK_FILE = '.export.lock'
+RENDER_CHUNK = 50
+PAGE_FILES = {'index.html': 'text/html; charset=utf-8', 'index.xml': 'application/rss+xml; charset=utf-8'}
+# Matches {% trending_posts 5 %} in post_list.html
+TRENDING_LIMIT = 5
+FEED_LIMIT = 20
+RELATED_LIMIT = 3
+
+_client = None
+
+
+def fingerprint(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def snapshot_file(url):
+    """
+    Return the file, relative to the snapshot root, that holds the page at ``url``.
+    """
+    name = 'index.xml' if url == reverse('blog:feed') else 'index.html'
+    return f'{url.lstrip("/")}{name}'
+
+
+def static_assets_version():
+    """
+    Return a fingerprint of the collected static files, so pages are rendered
+    again when the hashed asset names they reference change.
+    """
+    manifest = getattr(staticfiles_storage, 'manifest_name', None)
+    if manifest is None or not staticfiles_storage.exists(manifest):
+        return None
+    with staticfiles_storage.open(manifest) as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def listing_pages(view_name, kwargs, posts, *context):
+    """
+    Yield ``(url, fingerprint)`` for every page of a paginated post listing.
+    ``posts`` holds the ``(id, updated_at)`` of the listed posts in order.
+    """
+    from .views import PostListView
+
+    per_page = PostListView.paginate_by
+    pages = [posts[start:start + per_page] for start in range(0, len(posts), per_page)] or [[]]
+    for number, page in enumerate(pages, start=1):
+        page_kwargs = {**kwargs, 'page': number} if number > 1 else kwargs
+        yield reverse(view_name, kwargs=page_kwargs), fingerprint(len(posts), number, page, *context)
+
+
+def plan_pages():
+    """
+    Return ``{url: fingerprint}`` for every page of the static export, using a
+    fixed number of queries however many posts there are.
+    """
+    posts = list(
+        Post.objects.filter(status='published')
+        .order_by('-created_at')
+        .values_list('id', 'slug', 'category_id', 'updated_at')
+    )
+    cards = {post_id: (post_id, updated_at) for post_id, _, _, updated_at in posts}
+    post_tags = defaultdict(list)
+    for post_id, tag_id in Post.tags.through.objects.filter(post__status='published').values_list('post_id', 'tag_id'):
+        post_tags[post_id].append(tag_id)
+    # Detail pages list the approved comments, so approving or hiding one
+    # changes the fingerprint as well as posting or deleting one
+    comments = defaultdict(list)
+    for post_id, comment_id in Comment.objects.filter(is_approved=True).order_by('post', 'id').values_list('post', 'id'):
+        comments[post_id].append(comment_id)
+    categories = list(Category.objects.order_by('id').values_list('id', 'slug', 'name', 'description', 'parent_id'))
+    ancestors = defaultdict(list)
+    for ancestor_id, descendant_id in CategoryClosure.objects.values_list('ancestor_id', 'descendant_id'):
+        ancestors[descendant_id].append(ancestor_id)
+    tags = list(Tag.objects.order_by('id').values_list('id', 'slug', 'name'))
+    trending = [
+        cards[post_id] for post_id in PopularPost.objects.filter(post__status='published').values_list('post_id', flat=True)[:TRENDING_LIMIT]
+    ]
+    # Category and tag names and static assets appear on every page
+    site = fingerprint(categories, tags, static_assets_version())
+
+    by_category = defaultdict(list)
+    # Category pages list the posts of every subcategory too
+    by_subtree = defaultdict(list)
+    by_tag = defaultdict(list)
+    for post_id, _, category_id, _ in posts:
+        by_category[category_id].append(cards[post_id])
+        for ancestor_id in ancestors[category_id]:
+            by_subtree[ancestor_id].append(cards[post_id])
+        for tag_id in post_tags[post_id]:
+            by_tag[tag_id].append(cards[post_id])
+
+    pages = dict(listing_pages('blog:post_list', {}, list(cards.values()), site, trending))
+    for category_id, slug, *_ in categories:
+        pages.update(listing_pages('blog:category_posts', {'slug': slug}, by_subtree[category_id], site))
+    for tag_id, slug, _ in tags:
+        pages.update(listing_pages('blog:tag_posts', {'slug': slug}, by_tag[tag_id], site))
+    for post_id, slug, category_id, updated_at in posts:
+        related = [card for card in by_category[category_id] if card[0] != post_id][:RELATED_LIMIT]
+        pages[reverse('blog:post_detail', kwargs={'slug': slug})] = fingerprint(
+            site, updated_at, comments[post_id], related
+        )
+    pages[reverse('blog:category_list')] = fingerprint(
+        site, sorted((category_id, len(listed)) for category_id, listed in by_subtree.items())
+    )
+    pages[reverse('blog:feed')] = fingerprint(list(cards.values())[:FEED_LIMIT])
+    return pages
+
+
+def init_worker():
+    """
+    Initializer for export processes: reconnect to the database and make sure
+    rendering pages is not counted as reader views.
+    """
+    from taskqueue.worker import init_process
+
+    init_process()
+    disable_view_recording()
+
+
+def write_file(path, content):
+    """
+    Write ``content`` to ``path`` through a temporary file, so a concurrent
+    reader never sees a partially written page.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def render_pages(urls, root):
+    """
+    Render ``urls`` as an anonymous reader through the full middleware stack and
+    write the successful ones below ``root``. Return ``(url, status)`` per URL.
+    """
+    global _client
+    from django.test import Client
+
+    site = urlsplit(settings.SITE_URL)
+    if _client is None:
+        _client = Client(HTTP_HOST=site.netloc, raise_request_exception=False)
+    results = []
+    for url in urls:
+        response = _client.get(url, secure=site.scheme == 'https')
+        if response.status_code == 200:
+            write_file(Path(root) / snapshot_file(url), response.content)
+        results.append((url, response.status_code))
+    return results
+
+
+def remove_page(root, url):
+    """
+    Delete the file of a page, and any directories left empty below ``root``.
+    """
+    path = root / snapshot_file(url)
+    path.unlink(missing_ok=True)
+    for parent in path.parents:
+        if parent == root or not parent.is_relative_to(root):
+            break
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+
+
+def export_site(root, workers=1, force=False):
+    """
+    Render the new and changed pages into ``root`` and delete the files of pages
+    that no longer exist. With ``workers`` > 1 pages are rendered by a process
+    pool. Concurrent exports to the same directory run one after the other.
+
+    Returns:
+        Dict with the number of ``rendered``, ``unchanged`` and ``removed``
+        pages and a list of ``failed`` ``(url, status)`` pairs
+    """
+    import fcntl
+
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / LOCK_FILE, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(root / MANIFEST_FILE) as f:
+                previous = json.load(f)['pages']
+        except (FileNotFoundError, ValueError, KeyError):
+            previous = {}
+
+        pages = plan_pages()
+        stale = [
+            url for url, fp in pages.items()
+            if force or previous.get(url) != fp or not (root / snapshot_file(url)).exists()
+        ]
+        chunks = [stale[start:start + RENDER_CHUNK] for start in range(0, len(stale), RENDER_CHUNK)]
+        if workers > 1 and len(chunks) > 1:
+            # Children must not share the parent's database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+                results = [result for chunk in pool.map(render_pages, chunks, repeat(root)) for result in chunk]
+        else:
+            disable_view_recording()
+            results = [result for chunk in chunks for result in render_pages(chunk, root)]
+
+        # Failed pages fall through to Django until a later export succeeds
+        failed = [(url, status) for url, status in results if status != 200]
+        gone = [url for url in previous if url not in pages] + [url for url, _ in failed]
+        for url in gone:
+            remove_page(root, url)
+        for url, _ in failed:
+            del pages[url]
+        write_file(root / MANIFEST_FILE, json.dumps({'pages': pages}, indent=1, sort_keys=True).encode())
+    return {
+        'rendered': len(results) - len(failed),
+        'unchanged': len(pages) - len(results) + len(failed),
+        'removed': len(gone) - len(failed),
+        'failed': failed,
+    }
+
+
+class StaticSnapshotMiddleware:
+    """
+    Serve exported pages to anonymous GET/HEAD requests straight from
+    ``STATIC_SNAPSHOT_ROOT``. Requests without a snapshot file continue down
+    the middleware stack as usual.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = settings.STATIC_SNAPSHOT_ROOT
+        self.bypass_cookies = (settings.SESSION_COOKIE_NAME, 'messages', PIN_COOKIE)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.serve(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self.serve(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    def serve(self, request):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.GET
+            or not request.path_info.endswith('/')
+            or any(name in request.COOKIES for name in self.bypass_cookies)
+        ):
+            return None
+        for name, content_type in PAGE_FILES.items():
+            try:
+                path = safe_join(self.root, request.path_info.lstrip('/'), name)
+                stat = os.stat(path)
+            except (SuspiciousFileOperation, OSError):
+                continue
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+            response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+            if response is None:
+                with open(path, 'rb') as f:
+                    response = HttpResponse(f.read(), content_type=content_type)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(stat.st_mtime)
+            response['Cache-Control'] = f'public, max-age={settings.STATIC_SNAPSHOT_MAX_AGE}'
+            return response
+        return None
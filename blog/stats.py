@@ -0,0 +1,145 @@
+"""
+Materialized author statistics.
+
+Every post, comment and page-view change adds to the author's AuthorDailyStats
+row for the day it happened, using a single UPDATE with F() expressions (the
+row is created on first use). The dashboard sums one author's rows in the
+database for the lifetime totals and reads the recent rows for the time
+series, both through the (author, date) unique index, however many posts the
+author owns. The migration that creates the table fills it from existing data.
+
+Rows record activity as it happens: deleting a post or comment counts as a
+deletion on that day rather than rewriting earlier days.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AuthorDailyStats, Comment, Post, PostViewDaily
+
+
+def record_activity(author_id, date=None, **deltas):
+    """
+    Add ``deltas`` (field name -> amount) to the author's row for ``date``.
+    """
+    date = date or timezone.localdate()
+    rows = AuthorDailyStats.objects.filter(author_id=author_id, date=date)
+    increments = {field: F(field) + amount for field, amount in deltas.items()}
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            AuthorDailyStats.objects.create(author_id=author_id, date=date, **deltas)
+    except IntegrityError:
+        # Another request created the row first
+        rows.update(**increments)
+
+
+def record_views(pending, authors):
+    """
+    Add flushed page-view deltas, keyed by ``(post_id, date)``, to the authors'
+    rows. ``authors`` maps each post id to its author id.
+    """
+    per_author = {}
+    for (post_id, date), views in pending.items():
+        if post_id in authors:
+            key = (authors[post_id], date)
+            per_author[key] = per_author.get(key, 0) + views
+    for (author_id, date), views in per_author.items():
+        record_activity(author_id, date, views=views)
+
+
+def get_author_stats(author_id, days=30):
+    """
+    Return lifetime totals, summed in the database, and a per-day series for
+    the last ``days`` days read from the author's recent rows.
+    """
+    today = timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = AuthorDailyStats.objects.filter(author_id=author_id)
+    totals = {
+        name: total or 0
+        for name, total in rows.aggregate(
+            posts=Sum(F('posts_created') - F('posts_deleted')),
+            published=Sum(F('published') - F('unpublished')),
+            comments=Sum(F('comments') - F('comments_deleted')),
+            views=Sum('views'),
+        ).items()
+    }
+    totals['drafts'] = totals['posts'] - totals['published']
+    by_date = {
+        date: {'published': published, 'comments': comments, 'views': views}
+        for date, published, comments, views in rows.filter(date__gte=start).values_list(
+            'date', 'published', 'comments', 'views'
+        )
+    }
+
+    series = []
+    empty = {'published': 0, 'comments': 0, 'views': 0}
+    for offset in range(days):
+        date = start + timedelta(days=offset)
+        series.append({'date': date, **by_date.get(date, empty)})
+    peak_views = max(day['views'] for day in series) or 1
+    for day in series:
+        day['views_percent'] = round(100 * day['views'] / peak_views)
+    return {'totals': totals, 'series': series}
+
+
+def rebuild_author_stats(author_ids=None):
+    """
+    Recompute AuthorDailyStats from the current posts, comments and view rollups.
+    Publication is attributed to each published post's creation date, since
+    earlier transitions are not stored. Returns the number of rows written.
+    """
+    posts = Post.objects.all()
+    comments = Comment.objects.all()
+    views = PostViewDaily.objects.all()
+    existing = AuthorDailyStats.objects.all()
+    if author_ids is not None:
+        posts = posts.filter(author_id__in=author_ids)
+        comments = comments.filter(post__author_id__in=author_ids)
+        views = views.filter(post__author_id__in=author_ids)
+        existing = existing.filter(author_id__in=author_ids)
+
+    rows = {}
+
+    def row(author_id, date):
+        if (author_id, date) not in rows:
+            rows[author_id, date] = AuthorDailyStats(author_id=author_id, date=date)
+        return rows[author_id, date]
+
+    for author_id, date, status, count in (
+        posts.annotate(day=TruncDate('created_at'))
+        .values('author_id', 'day', 'status')
+        .annotate(count=Count('id'))
+        .values_list('author_id', 'day', 'status', 'count')
+        .order_by()
+    ):
+        row(author_id, date).posts_created += count
+        if status == 'published':
+            row(author_id, date).published += count
+
+    for author_id, date, count in (
+        comments.annotate(day=TruncDate('created_at'))
+        .values('post__author_id', 'day')
+        .annotate(count=Count('id'))
+        .values_list('post__author_id', 'day', 'count')
+        .order_by()
+    ):
+        row(author_id, date).comments += count
+
+    for author_id, date, total in (
+        views.values('post__author_id', 'date')
+        .annotate(total=Sum('views'))
+        .values_list('post__author_id', 'date', 'total')
+        .order_by()
+    ):
+        row(author_id, date).views += total
+
+    with transaction.atomic():
+        existing.delete()
+        AuthorDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
@@ -0,0 +1,583 @@
+"""
+Build-time Tailwind CSS.
+
+Generates the site stylesheet in Python during the build, replacing the
+in-browser compiler from the Tailwind CDN. ``build_stylesheet`` scans the
+templates, and the Python sources for form widget classes, for class names,
+reads the theme from the inline ``tailwind-config`` script in ``base.html``,
+and returns Tailwind's preflight, the forms plugin base styles and the CSS of
+every utility it found, with values matching Tailwind CSS v3.
+
+This implements the utility families, variants and palette colors the site
+uses, plus arbitrary values (``max-w-[1200px]``) and color opacity modifiers
+(``bg-primary/20``). Unrecognized class names produce no CSS;
+``python manage.py build_tailwind --unknown`` lists those used in templates,
+so a newly used utility that needs adding here is noticed.
+"""
+import json
+import os
+import re
+from functools import cache, lru_cache
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+
+BASE_CSS = Path(__file__).with_name('tailwind_base.css')
+MANIFEST_NAME = 'css/tailwind.json'
+
+# Characters class names are made of; everything else separates candidates
+CANDIDATE = re.compile(r'[A-Za-z0-9_:/\[\]\.\-#%]+')
+CLASS_ATTRIBUTE = re.compile(r'class="([^"]*)"')
+CONFIG_SCRIPT = re.compile(r'<script id="tailwind-config">\s*tailwind\.config\s*=\s*(.*?);?\s*</script>', re.S)
+
+SCREENS = {'sm': '640px', 'md': '768px', 'lg': '1024px', 'xl': '1280px', '2xl': '1536px'}
+# Selector template of each state variant, applied innermost first; output follows this order
+VARIANTS = {
+    'placeholder': '{}::placeholder',
+    'group-hover': '.group:hover {}',
+    'focus-within': '{}:focus-within',
+    'hover': '{}:hover',
+    'focus': '{}:focus',
+    'dark': '.dark {}',
+}
+
+PALETTE = {
+    'slate': ['#f8fafc', '#f1f5f9', '#e2e8f0', '#cbd5e1', '#94a3b8', '#64748b', '#475569', '#334155', '#1e293b', '#0f172a', '#020617'],
+    'gray': ['#f9fafb', '#f3f4f6', '#e5e7eb', '#d1d5db', '#9ca3af', '#6b7280', '#4b5563', '#374151', '#1f2937', '#111827', '#030712'],
+    'red': ['#fef2f2', '#fee2e2', '#fecaca', '#fca5a5', '#f87171', '#ef4444', '#dc2626', '#b91c1c', '#991b1b', '#7f1d1d', '#450a0a'],
+    'yellow': ['#fefce8', '#fef9c3', '#fef08a', '#fde047', '#facc15', '#eab308', '#ca8a04', '#a16207', '#854d0e', '#713f12', '#422006'],
+    'green': ['#f0fdf4', '#dcfce7', '#bbf7d0', '#86efac', '#4ade80', '#22c55e', '#16a34a', '#15803d', '#166534', '#14532d', '#052e16'],
+    'blue': ['#eff6ff', '#dbeafe', '#bfdbfe', '#93c5fd', '#60a5fa', '#3b82f6', '#2563eb', '#1d4ed8', '#1e40af', '#1e3a8a', '#172554'],
+}
+SHADES = ['50', '100', '200', '300', '400', '500', '600', '700', '800', '900', '950']
+
+DEFAULT_THEME = {
+    'colors': {
+        'white': '#ffffff',
+        'black': '#000000',
+        **{f'{name}-{shade}': value for name, values in PALETTE.items() for shade, value in zip(SHADES, values)},
+    },
+    'fontFamily': {
+        'sans': ['ui-sans-serif', 'system-ui', 'sans-serif'],
+        'serif': ['ui-serif', 'Georgia', 'serif'],
+        'mono': ['ui-monospace', 'monospace'],
+    },
+    'borderRadius': {
+        'none': '0px', 'sm': '0.125rem', 'DEFAULT': '0.25rem', 'md': '0.375rem', 'lg': '0.5rem',
+        'xl': '0.75rem', '2xl': '1rem', '3xl': '1.5rem', 'full': '9999px',
+    },
+}
+
+FONT_SIZES = {
+    'xs': ('0.75rem', '1rem'), 'sm': ('0.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'), '4xl': ('2.25rem', '2.5rem'), '5xl': ('3rem', '1'),
+    '6xl': ('3.75rem', '1'), '7xl': ('4.5rem', '1'), '8xl': ('6rem', '1'), '9xl': ('8rem', '1'),
+}
+FONT_WEIGHTS = {
+    'thin': '100', 'extralight': '200', 'light': '300', 'normal': '400', 'medium': '500',
+    'semibold': '600', 'bold': '700', 'extrabold': '800', 'black': '900',
+}
+LINE_HEIGHTS = {'none': '1', 'tight': '1.25', 'snug': '1.375', 'normal': '1.5', 'relaxed': '1.625', 'loose': '2'}
+LETTER_SPACING = {
+    'tighter': '-0.05em', 'tight': '-0.025em', 'normal': '0em', 'wide': '0.025em', 'wider': '0.05em', 'widest': '0.1em',
+}
+MAX_WIDTHS = {
+    'none': 'none', 'xs': '20rem', 'sm': '24rem', 'md': '28rem', 'lg': '32rem', 'xl': '36rem', '2xl': '42rem',
+    '3xl': '48rem', '4xl': '56rem', '5xl': '64rem', '6xl': '72rem', '7xl': '80rem', 'full': '100%',
+    'prose': '65ch', 'screen-sm': '640px', 'screen-md': '768px', 'screen-lg': '1024px', 'screen-xl': '1280px',
+}
+SHADOWS = {
+    'sm': '0 1px 2px 0 rgb(0 0 0 / 0.05)',
+    'DEFAULT': '0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)',
+    'md': '0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)',
+    'lg': '0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)',
+    'xl': '0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1)',
+    '2xl': '0 25px 50px -12px rgb(0 0 0 / 0.25)',
+    'none': '0 0 #0000',
+}
+TRANSITIONS = {
+    'DEFAULT': 'color, background-color, border-color, text-decoration-color, fill, stroke, opacity, box-shadow, transform, filter, backdrop-filter',
+    'all': 'all',
+    'colors': 'color, background-color, border-color, text-decoration-color, fill, stroke',
+    'opacity': 'opacity',
+    'shadow': 'box-shadow',
+    'transform': 'transform',
+}
+TRANSFORM = (
+    'transform: translate(var(--tw-translate-x), var(--tw-translate-y)) rotate(var(--tw-rotate)) '
+    'skewX(var(--tw-skew-x)) skewY(var(--tw-skew-y)) scaleX(var(--tw-scale-x)) scaleY(var(--tw-scale-y))'
+)
+
+# Output order of the utility groups, following Tailwind's core plugin order
+# so that later utilities win over earlier ones as they do with Tailwind
+ORDER = [
+    'container', 'position', 'margin', 'line-clamp', 'display', 'aspect', 'size', 'height', 'min-height',
+    'width', 'min-width', 'max-width', 'flex', 'flex-shrink', 'flex-grow', 'transform', 'cursor', 'resize',
+    'grid-cols', 'flex-direction', 'flex-wrap', 'align-items', 'justify', 'gap', 'space', 'align-self',
+    'overflow', 'truncate', 'whitespace', 'rounded', 'border-width', 'border-style', 'border-color',
+    'bg-color', 'bg-opacity', 'bg-size', 'bg-position', 'bg-repeat', 'padding', 'text-align', 'font-family',
+    'font-size', 'font-weight', 'text-transform', 'leading', 'tracking', 'text-color', 'text-decoration',
+    'opacity', 'shadow', 'outline', 'ring-width', 'ring-color', 'transition', 'duration',
+]
+
+STATIC = {
+    'relative': ('position', ['position: relative']),
+    'absolute': ('position', ['position: absolute']),
+    'fixed': ('position', ['position: fixed']),
+    'sticky': ('position', ['position: sticky']),
+    'block': ('display', ['display: block']),
+    'inline-block': ('display', ['display: inline-block']),
+    'inline': ('display', ['display: inline']),
+    'flex': ('display', ['display: flex']),
+    'inline-flex': ('display', ['display: inline-flex']),
+    'table': ('display', ['display: table']),
+    'grid': ('display', ['display: grid']),
+    'hidden': ('display', ['display: none']),
+    'aspect-auto': ('aspect', ['aspect-ratio: auto']),
+    'aspect-square': ('aspect', ['aspect-ratio: 1 / 1']),
+    'aspect-video': ('aspect', ['aspect-ratio: 16 / 9']),
+    'flex-1': ('flex', ['flex: 1 1 0%']),
+    'flex-auto': ('flex', ['flex: 1 1 auto']),
+    'flex-none': ('flex', ['flex: none']),
+    'shrink-0': ('flex-shrink', ['flex-shrink: 0']),
+    'flex-shrink-0': ('flex-shrink', ['flex-shrink: 0']),
+    'grow': ('flex-grow', ['flex-grow: 1']),
+    'flex-grow': ('flex-grow', ['flex-grow: 1']),
+    'grow-0': ('flex-grow', ['flex-grow: 0']),
+    'cursor-pointer': ('cursor', ['cursor: pointer']),
+    'resize-none': ('resize', ['resize: none']),
+    'resize-y': ('resize', ['resize: vertical']),
+    'flex-row': ('flex-direction', ['flex-direction: row']),
+    'flex-row-reverse': ('flex-direction', ['flex-direction: row-reverse']),
+    'flex-col': ('flex-direction', ['flex-direction: column']),
+    'flex-wrap': ('flex-wrap', ['flex-wrap: wrap']),
+    'flex-nowrap': ('flex-wrap', ['flex-wrap: nowrap']),
+    'items-start': ('align-items', ['align-items: flex-start']),
+    'items-end': ('align-items', ['align-items: flex-end']),
+    'items-center': ('align-items', ['align-items: center']),
+    'items-baseline': ('align-items', ['align-items: baseline']),
+    'items-stretch': ('align-items', ['align-items: stretch']),
+    'justify-start': ('justify', ['justify-content: flex-start']),
+    'justify-end': ('justify', ['justify-content: flex-end']),
+    'justify-center': ('justify', ['justify-content: center']),
+    'justify-between': ('justify', ['justify-content: space-between']),
+    'self-start': ('align-self', ['align-self: flex-start']),
+    'self-center': ('align-self', ['align-self: center']),
+    'overflow-hidden': ('overflow', ['overflow: hidden']),
+    'overflow-auto': ('overflow', ['overflow: auto']),
+    'overflow-x-auto': ('overflow', ['overflow-x: auto']),
+    'truncate': ('truncate', ['overflow: hidden', 'text-overflow: ellipsis', 'white-space: nowrap']),
+    'whitespace-nowrap': ('whitespace', ['white-space: nowrap']),
+    'border-solid': ('border-style', ['border-style: solid']),
+    'border-dashed': ('border-style', ['border-style: dashed']),
+    'border-none': ('border-style', ['border-style: none']),
+    'bg-transparent': ('bg-color', ['background-color: transparent']),
+    'bg-cover': ('bg-size', ['background-size: cover']),
+    'bg-contain': ('bg-size', ['background-size: contain']),
+    'bg-center': ('bg-position', ['background-position: center']),
+    'bg-no-repeat': ('bg-repeat', ['background-repeat: no-repeat']),
+    'text-left': ('text-align', ['text-align: left']),
+    'text-center': ('text-align', ['text-align: center']),
+    'text-right': ('text-align', ['text-align: right']),
+    'uppercase': ('text-transform', ['text-transform: uppercase']),
+    'lowercase': ('text-transform', ['text-transform: lowercase']),
+    'capitalize': ('text-transform', ['text-transform: capitalize']),
+    'underline': ('text-decoration', ['text-decoration-line: underline']),
+    'no-underline': ('text-decoration', ['text-decoration-line: none']),
+    'outline-none': ('outline', ['outline: 2px solid transparent', 'outline-offset: 2px']),
+}
+
+# Utility prefix -> (group, position within the group, properties, allowed keywords)
+SPACED = {
+    'm': ('margin', 0, ['margin'], 'auto'),
+    'mx': ('margin', 1, ['margin-left', 'margin-right'], 'auto'),
+    'my': ('margin', 1, ['margin-top', 'margin-bottom'], 'auto'),
+    'ms': ('margin', 2, ['margin-inline-start'], 'auto'),
+    'me': ('margin', 2, ['margin-inline-end'], 'auto'),
+    'mt': ('margin', 3, ['margin-top'], 'auto'),
+    'mr': ('margin', 3, ['margin-right'], 'auto'),
+    'mb': ('margin', 3, ['margin-bottom'], 'auto'),
+    'ml': ('margin', 3, ['margin-left'], 'auto'),
+    'p': ('padding', 0, ['padding'], ''),
+    'px': ('padding', 1, ['padding-left', 'padding-right'], ''),
+    'py': ('padding', 1, ['padding-top', 'padding-bottom'], ''),
+    'pt': ('padding', 2, ['padding-top'], ''),
+    'pr': ('padding', 2, ['padding-right'], ''),
+    'pb': ('padding', 2, ['padding-bottom'], ''),
+    'pl': ('padding', 2, ['padding-left'], ''),
+    'gap': ('gap', 0, ['gap'], ''),
+    'gap-x': ('gap', 1, ['column-gap'], ''),
+    'gap-y': ('gap', 2, ['row-gap'], ''),
+    'size': ('size', 0, ['width', 'height'], 'auto full fit min max fraction'),
+    'h': ('height', 0, ['height'], 'auto full fit min max screen fraction'),
+    'min-h': ('min-height', 0, ['min-height'], 'full fit min max screen'),
+    'w': ('width', 0, ['width'], 'auto full fit min max screen fraction'),
+    'min-w': ('min-width', 0, ['min-width'], 'full fit min max'),
+    'translate-x': ('transform', 0, ['--tw-translate-x'], 'full fraction'),
+    'translate-y': ('transform', 0, ['--tw-translate-y'], 'full fraction'),
+}
+KEYWORDS = {'auto': 'auto', 'full': '100%', 'fit': 'fit-content', 'min': 'min-content', 'max': 'max-content'}
+SCREEN_SIZES = {'height': '100vh', 'min-height': '100vh', 'width': '100vw'}
+COLORED = {
+    'bg': ('bg-color', 'background-color', '--tw-bg-opacity'),
+    'text': ('text-color', 'color', '--tw-text-opacity'),
+    'border': ('border-color', 'border-color', '--tw-border-opacity'),
+    'ring': ('ring-color', '--tw-ring-color', '--tw-ring-opacity'),
+}
+BORDER_SIDES = {
+    '': ['border-width'],
+    'x': ['border-left-width', 'border-right-width'],
+    'y': ['border-top-width', 'border-bottom-width'],
+    't': ['border-top-width'],
+    'r': ['border-right-width'],
+    'b': ['border-bottom-width'],
+    'l': ['border-left-width'],
+}
+CORNERS = {
+    '': ['border-radius'],
+    't': ['border-top-left-radius', 'border-top-right-radius'],
+    'r': ['border-top-right-radius', 'border-bottom-right-radius'],
+    'b': ['border-bottom-right-radius', 'border-bottom-left-radius'],
+    'l': ['border-top-left-radius', 'border-bottom-left-radius'],
+}
+
+
+def parse_config(text):
+    """
+    Return the object assigned to ``tailwind.config`` in ``text`` (a template
+    containing the inline config script), converted from a JavaScript object
+    literal with bare keys and trailing commas.
+    """
+    match = CONFIG_SCRIPT.search(text)
+    if match is None:
+        return {}
+    literal = re.sub(r'([{,]\s*)([A-Za-z_$][\w$]*)\s*:', r'\1"\2":', match.group(1))
+    literal = re.sub(r',(\s*[}\]])', r'\1', literal)
+    return json.loads(literal)
+
+
+def flatten_colors(colors, prefix=''):
+    flat = {}
+    for name, value in colors.items():
+        key = prefix if name == 'DEFAULT' else f'{prefix}-{name}' if prefix else name
+        if isinstance(value, dict):
+            flat.update(flatten_colors(value, key))
+        else:
+            flat[key] = value
+    return flat
+
+
+def build_theme(config):
+    """
+    Merge the config's ``theme`` (replacing defaults) and ``theme.extend``
+    (adding to them) into the default theme.
+    """
+    theme = {key: dict(value) for key, value in DEFAULT_THEME.items()}
+    overrides = config.get('theme', {})
+    for key in theme:
+        if key in overrides:
+            theme[key] = dict(overrides[key])
+        theme[key].update(overrides.get('extend', {}).get(key, {}))
+    theme['colors'] = flatten_colors(theme['colors'])
+    theme['darkMode'] = config.get('darkMode', 'media')
+    return theme
+
+
+def escape(name):
+    return '.' + re.sub(r'([^A-Za-z0-9_-])', r'\\\1', name)
+
+
+def arbitrary(value):
+    if value.startswith('[') and value.endswith(']') and len(value) > 2:
+        return value[1:-1].replace('_', ' ')
+    return None
+
+
+def spacing(value):
+    """
+    Return the CSS length of spacing scale step ``value`` ('4' -> 1rem), or None.
+    """
+    if value == 'px':
+        return '1px'
+    if value == '0':
+        return '0px'
+    if re.fullmatch(r'\d+(\.5)?', value):
+        return f'{float(value) * 0.25:g}rem'
+    return None
+
+
+def fraction(value):
+    match = re.fullmatch(r'(\d+)/(\d+)', value)
+    if match is None or int(match.group(2)) == 0:
+        return None
+    percent = f'{int(match.group(1)) / int(match.group(2)) * 100:.6f}'.rstrip('0').rstrip('.')
+    return f'{percent}%'
+
+
+def rgb(color, opacity):
+    """
+    Return a CSS color for hex ``color`` with ``opacity`` (a number or a CSS variable).
+    """
+    if not re.fullmatch(r'#[0-9a-fA-F]{6}', color):
+        return color
+    red, green, blue = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return f'rgb({red} {green} {blue} / {opacity})'
+
+
+def color_declarations(property_name, variable, value, theme):
+    name, _, alpha = value.partition('/')
+    color = arbitrary(name) or theme['colors'].get(name)
+    if color is None or alpha and not alpha.isdigit():
+        return None
+    if alpha:
+        return [f'{property_name}: {rgb(color, f"{int(alpha) / 100:g}")}']
+    if not color.startswith('#'):
+        return [f'{property_name}: {color}']
+    return [f'{variable}: 1', f'{property_name}: {rgb(color, f"var({variable})")}']
+
+
+def resolve(utility, theme):
+    """
+    Return ``(group, position, declarations, selector_suffix)`` for a utility
+    class name without variants, or None if it is not supported.
+    """
+    if utility in STATIC:
+        group, declarations = STATIC[utility]
+        return group, 0, declarations, ''
+    if utility.endswith('-'):
+        return None
+    # Try the longest prefix first: 'gap-x-2' is gap-x, not gap
+    for candidate in sorted(SPACED, key=len, reverse=True):
+        if utility.startswith(candidate + '-'):
+            group, position, properties, keywords = SPACED[candidate]
+            value = utility[len(candidate) + 1:]
+            css = arbitrary(value) or spacing(value)
+            if css is None and value in keywords.split():
+                css = SCREEN_SIZES[properties[0]] if value == 'screen' else KEYWORDS[value]
+            if css is None and 'fraction' in keywords:
+                css = fraction(value)
+            if css is None:
+                return None
+            declarations = [f'{name}: {css}' for name in properties]
+            if group == 'transform':
+                declarations.append(TRANSFORM)
+            return group, position, declarations, ''
+
+    if utility.startswith('space-y-') and spacing(utility[8:]):
+        css = spacing(utility[8:])
+        return 'space', 0, [
+            '--tw-space-y-reverse: 0',
+            f'margin-top: calc({css} * calc(1 - var(--tw-space-y-reverse)))',
+            f'margin-bottom: calc({css} * var(--tw-space-y-reverse))',
+        ], ' > :not([hidden]) ~ :not([hidden])'
+    if utility.startswith('max-w-'):
+        css = arbitrary(utility[6:]) or MAX_WIDTHS.get(utility[6:])
+        return ('max-width', 0, [f'max-width: {css}'], '') if css else None
+    if utility.startswith('flex-['):
+        css = arbitrary(utility[5:])
+        return ('flex', 0, [f'flex: {css}'], '') if css else None
+    if utility.startswith('grid-cols-') and utility[10:].isdigit():
+        return 'grid-cols', 0, [f'grid-template-columns: repeat({utility[10:]}, minmax(0, 1fr))'], ''
+    if utility.startswith('line-clamp-') and utility[11:].isdigit():
+        return 'line-clamp', 0, [
+            'overflow: hidden', 'display: -webkit-box', '-webkit-box-orient: vertical',
+            f'-webkit-line-clamp: {utility[11:]}',
+        ], ''
+    if utility.startswith('text-') and utility[5:] in FONT_SIZES:
+        size, line_height = FONT_SIZES[utility[5:]]
+        return 'font-size', 0, [f'font-size: {size}', f'line-height: {line_height}'], ''
+    if utility.startswith('font-'):
+        name = utility[5:]
+        if name in FONT_WEIGHTS:
+            return 'font-weight', 0, [f'font-weight: {FONT_WEIGHTS[name]}'], ''
+        if name in theme['fontFamily']:
+            family = theme['fontFamily'][name]
+            family = ', '.join(family) if isinstance(family, list) else family
+            return 'font-family', 0, [f'font-family: {family}'], ''
+        return None
+    if utility.startswith('leading-'):
+        value = utility[8:]
+        css = arbitrary(value) or LINE_HEIGHTS.get(value) or (spacing(value) if value.isdigit() else None)
+        return ('leading', 0, [f'line-height: {css}'], '') if css else None
+    if utility.startswith('tracking-'):
+        css = arbitrary(utility[9:]) or LETTER_SPACING.get(utility[9:])
+        return ('tracking', 0, [f'letter-spacing: {css}'], '') if css else None
+    if utility == 'rounded' or utility.startswith('rounded-'):
+        parts = utility.split('-')[1:]
+        side = parts.pop(0) if parts and parts[0] in CORNERS else ''
+        css = theme['borderRadius'].get('-'.join(parts) or 'DEFAULT')
+        return ('rounded', 1 if side else 0, [f'{name}: {css}' for name in CORNERS[side]], '') if css else None
+    if utility == 'border' or re.fullmatch(r'border-[xytrbl](-\d+)?|border-\d+', utility):
+        parts = utility.split('-')[1:]
+        side = parts.pop(0) if parts and not parts[0].isdigit() else ''
+        width = parts[0] if parts else '1'
+        position = 0 if not side else 1 if side in 'xy' else 2
+        return 'border-width', position, [f'{name}: {width}px' for name in BORDER_SIDES[side]], ''
+    if utility.startswith('bg-opacity-') and utility[11:].isdigit():
+        return 'bg-opacity', 0, [f'--tw-bg-opacity: {int(utility[11:]) / 100:g}'], ''
+    if utility.startswith('opacity-') and utility[8:].isdigit():
+        return 'opacity', 0, [f'opacity: {int(utility[8:]) / 100:g}'], ''
+    if utility == 'shadow' or utility.startswith('shadow-'):
+        shadow = SHADOWS.get(utility[7:] or 'DEFAULT')
+        if shadow is None:
+            return None
+        colored = re.sub(r'rgb\([^)]*\)', 'var(--tw-shadow-color)', shadow)
+        return 'shadow', 0, [
+            f'--tw-shadow: {shadow}', f'--tw-shadow-colored: {colored}',
+            'box-shadow: var(--tw-ring-offset-shadow, 0 0 #0000), var(--tw-ring-shadow, 0 0 #0000), var(--tw-shadow)',
+        ], ''
+    if utility.startswith('outline-') and utility[8:].isdigit():
+        return 'outline', 1, [f'outline-width: {utility[8:]}px'], ''
+    if utility == 'ring' or utility.startswith('ring-') and utility[5:].isdigit():
+        width = utility[5:] or '3'
+        return 'ring-width', 0, [
+            '--tw-ring-offset-shadow: var(--tw-ring-inset) 0 0 0 var(--tw-ring-offset-width) var(--tw-ring-offset-color)',
+            f'--tw-ring-shadow: var(--tw-ring-inset) 0 0 0 calc({width}px + var(--tw-ring-offset-width)) var(--tw-ring-color)',
+            'box-shadow: var(--tw-ring-offset-shadow), var(--tw-ring-shadow), var(--tw-shadow, 0 0 #0000)',
+        ], ''
+    if utility == 'transition' or utility.startswith('transition-'):
+        properties = TRANSITIONS.get(utility[11:] or 'DEFAULT')
+        if properties is None:
+            return None
+        return 'transition', 0, [
+            f'transition-property: {properties}',
+            'transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1)',
+            'transition-duration: 150ms',
+        ], ''
+    if utility.startswith('duration-') and utility[9:].isdigit():
+        return 'duration', 0, [f'transition-duration: {utility[9:]}ms'], ''
+    for prefix, (group, property_name, variable) in COLORED.items():
+        if utility.startswith(prefix + '-'):
+            declarations = color_declarations(property_name, variable, utility[len(prefix) + 1:], theme)
+            return (group, 0, declarations, '') if declarations else None
+    return None
+
+
+def container_rules():
+    rules = ['.container{width:100%}']
+    for width in SCREENS.values():
+        rules.append(f'@media (min-width:{width}){{.container{{max-width:{width}}}}}')
+    return rules
+
+
+def generate(candidates, theme):
+    """
+    Return ``(css, classes)``: the rules of every supported class name in
+    ``candidates``, ordered as Tailwind orders them, and the sorted names.
+    """
+    rules = []
+    for name in set(candidates):
+        *variants, utility = name.split(':')
+        screen, states = None, []
+        for variant in variants:
+            if variant in SCREENS and screen is None:
+                screen = variant
+            elif variant in VARIANTS and variant not in states:
+                states.append(variant)
+            else:
+                break
+        else:
+            if utility == 'container' and not variants:
+                continue
+            resolved = resolve(utility, theme)
+            if resolved is None:
+                continue
+            group, position, declarations, suffix = resolved
+            selector = escape(name) + suffix
+            media = f'@media (min-width:{SCREENS[screen]})' if screen else None
+            for variant in reversed(states):
+                if variant == 'dark' and theme['darkMode'] == 'media':
+                    media = '@media (prefers-color-scheme:dark)' + (f' and (min-width:{SCREENS[screen]})' if screen else '')
+                    continue
+                selector = VARIANTS[variant].format(selector)
+            key = (
+                list(SCREENS).index(screen) + 1 if screen else 0,
+                sorted(list(VARIANTS).index(variant) + 1 for variant in states),
+                ORDER.index(group),
+                position,
+                name,
+            )
+            rules.append((key, name, media, f'{selector}{{{";".join(declarations)}}}'))
+    rules.sort(key=lambda rule: rule[0])
+    css = container_rules() if 'container' in candidates else []
+    for _, _, media, rule in rules:
+        css.append(f'{media}{{{rule}}}' if media else rule)
+    return '\n'.join(css), sorted(name for _, name, _, _ in rules)
+
+
+def source_files():
+    """
+    Return the template files and project Python modules to scan for class names.
+    """
+    directories = [Path(path) for engine in settings.TEMPLATES for path in engine.get('DIRS', [])]
+    modules = []
+    for app_config in apps.get_app_configs():
+        path = Path(app_config.path)
+        if path.is_relative_to(settings.BASE_DIR):
+            directories.append(path / 'templates')
+            modules.extend(path.rglob('*.py'))
+    templates = [file for directory in directories if directory.is_dir() for file in directory.rglob('*.html')]
+    return sorted(set(templates)), sorted(set(modules))
+
+
+def find_config_template():
+    for directory in (Path(path) for engine in settings.TEMPLATES for path in engine.get('DIRS', [])):
+        if (directory / 'base.html').is_file():
+            return directory / 'base.html'
+    return None
+
+
+def build_stylesheet():
+    """
+    Return ``(css, classes, unknown)``: the stylesheet, the class names it
+    styles, and the names used in template ``class`` attributes that
+    produced no CSS (template tags excluded).
+    """
+    config_template = find_config_template()
+    theme = build_theme(parse_config(config_template.read_text()) if config_template else {})
+    templates, modules = source_files()
+    candidates, used = set(), set()
+    for path in templates + modules:
+        text = path.read_text(errors='ignore')
+        candidates.update(CANDIDATE.findall(text))
+        if path.suffix == '.html':
+            for attribute in CLASS_ATTRIBUTE.findall(re.sub(r'{[{%].*?[%}]}', ' ', text)):
+                used.update(attribute.split())
+    utilities, classes = generate(candidates, theme)
+    css = f'{BASE_CSS.read_text().strip()}\n\n/* Utilities */\n{utilities}\n'
+    unknown = sorted(used - set(classes) - {'container', 'group'})
+    return css, classes, unknown
+
+
+@cache
+def find_manifest():
+    """
+    Return the file path of the ``build_tailwind`` manifest, or None. Searching
+    the static finders walks every app's static directory, so it runs once.
+    """
+    return finders.find(MANIFEST_NAME)
+
+
+@lru_cache(maxsize=1)
+def read_manifest(path, mtime):
+    with open(path) as f:
+        return json.load(f)['css']
+
+
+def built_stylesheet():
+    """
+    Return the static path of the stylesheet written by ``build_tailwind``,
+    or None if it has not been built. With DEBUG, a manifest built or rebuilt
+    while the server runs is picked up by its modification time.
+    """
+    path = find_manifest()
+    if not settings.DEBUG:
+        return None if path is None else read_manifest(path, None)
+    if path is None or not os.path.isfile(path):
+        # Not built yet, or removed: search again on the next request
+        find_manifest.cache_clear()
+        return None
+    return read_manifest(path, os.stat(path).st_mtime_ns)
@@ -0,0 +1,47 @@
+"""
+Background tasks for the blog app.
+
+These run in a ``runworker`` process instead of inside the request that
+saved the post, so slow side effects never add latency to post saves.
+"""
+from django.conf import settings
+from taskqueue.queue import task
+from .notifications import fan_out_post, send_digests
+from .outbox import dispatch_pending
+from .snapshots import export_site
+
+
+@task
+def dispatch_outbox():
+    """
+    Deliver pending outbox events (publish, unpublish, update, delete) to the
+    configured sinks. Queued after every commit that records an event; events
+    that fail are retried by later runs or by ``dispatch_outbox --loop``.
+    """
+    dispatch_pending()
+
+
+@task(queue='mail', max_attempts=1)
+def notify_subscribers(post_id):
+    """
+    Email (or queue for digest) every subscriber of a newly published post.
+    Not retried: a partial failure must not email the same readers twice.
+    """
+    fan_out_post(post_id)
+
+
+@task(queue='mail')
+def send_digest_emails():
+    """
+    Send the pending digest emails.
+    """
+    send_digests()
+
+
+@task
+def export_static_site():
+    """
+    Re-render the static snapshot pages changed since the last export.
+    Queued by the outbox snapshot sink; runs in a single process.
+    """
+    export_site(settings.STATIC_SNAPSHOT_ROOT)
@@ -0,0 +1,91 @@
+from django import template
+from django.templatetags.static import static
+from django.urls import reverse
+from ..archive import get_archive_years
+from ..models import Subscription
+from ..pageviews import get_trending_posts
+from ..tailwind import built_stylesheet
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/subscribe_button.html', takes_context=True)
+def subscribe_button(context, kind, target, label=None):
+    """
+    Render a subscribe/unsubscribe toggle for an author, category or tag.
+    
+    Usage:
+        {% subscribe_button 'category' category %}
+    """
+    user = context['user']
+    subscribed = user.is_authenticated and Subscription.objects.filter(
+        user=user, **{kind: target}
+    ).exists()
+    key = target.username if kind == 'author' else target.slug
+    return {
+        'user': user,
+        'kind': kind,
+        'key': key,
+        'label': label or str(target),
+        'subscribed': subscribed,
+        'csrf_token': context.get('csrf_token'),
+        'next': context['request'].get_full_path(),
+    }
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, number):
+    """
+    Return the URL of page ``number`` of the current post listing. Pages use
+    ``.../page/<n>/`` paths so they can be exported as static files.
+    
+    Usage:
+        <a href="{% page_url page_obj.next_page_number %}">
+    """
+    match = context['request'].resolver_match
+    kwargs = {key: value for key, value in match.kwargs.items() if key != 'page'}
+    if int(number) > 1:
+        kwargs['page'] = number
+    return reverse(match.view_name, kwargs=kwargs)
+
+
+@register.inclusion_tag('includes/trending_posts.html')
+def trending_posts(limit=5):
+    """
+    Render the "popular this week" list from the precomputed ranking.
+    
+    Usage:
+        {% trending_posts 5 %}
+    """
+    return {'trending_posts': get_trending_posts(limit)}
+
+
+@register.inclusion_tag('includes/archive_months.html')
+def archive_months():
+    """
+    Render the archive sidebar: published post counts per year and month.
+    
+    Usage:
+        {% archive_months %}
+    """
+    return {'archive_years': get_archive_years()}
+
+
+@register.simple_tag
+def tailwind_stylesheet():
+    """
+    Return the URL of the stylesheet built by ``build_tailwind``, or an
+    empty string if it has not been built (or not collected), in which case
+    the page falls back to the Tailwind CDN.
+    
+    Usage:
+        {% tailwind_stylesheet as tailwind_css %}
+    """
+    name = built_stylesheet()
+    if name is None:
+        return ''
+    try:
+        return static(name)
+    except ValueError:
+        # Missing from the staticfiles manifest: built after collectstatic
+        return ''
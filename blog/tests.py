@@ -1,3 +1,1384 @@
-from django.test import TestCase
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import async_views, compression, outbox, pageviews, snapshots, tailwind
+from .categories import get_ancestors, get_subtree_post_counts, posts_under, rebuild_closure
+from .checks import check_content_search
+from .facets import SPARSE_MAX, Bitmap, FacetIndex, FacetSelection, roll_up_category_counts
+from .forms import CommentForm
+from .models import (
+    Category, CategoryClosure, Comment, CompressionDictionary, DigestItem, MonthlyArchive, OutboxEvent, Post,
+    PostNotification, PostViewDaily, SlugHistory, Subscription, Tag,
+)
+from .notifications import fan_out_post, send_digests
+from .slugs import SLUG_ATTEMPTS, next_free_slug
+from .stats import get_author_stats, record_views
+from .threads import get_comment_page
+from .transfer import Importer, export_content, import_content
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    BLOG_NOTIFICATION_RATE_LIMIT=10000,
+)
+class NotificationTests(TestCase):
+    """
+    Subscriber fan-out and digests, sent through the locmem email backend.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'password')
+        cls.category = Category.objects.create(name='Design')
+        cls.tag = Tag.objects.create(name='Python')
+        cls.other_tag = Tag.objects.create(name='Django')
+
+    def create_post(self, title='New post', status='published'):
+        post = Post.objects.create(
+            title=title, description='Description', content='Content',
+            author=self.author, category=self.category, status=status,
+        )
+        post.tags.add(self.tag, self.other_tag)
+        return post
+
+    def subscribe(self, user, delivery=Subscription.DELIVERY_INSTANT, **target):
+        return Subscription.objects.create(user=user, delivery=delivery, **target)
+
+    def recipients(self):
+        return sorted(address for message in mail.outbox for address in message.to)
+
+    def test_overlapping_subscriptions_send_one_email(self):
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.subscribe(reader, author=self.author)
+        self.subscribe(reader, category=self.category)
+        self.subscribe(reader, tag=self.tag)
+        self.subscribe(reader, tag=self.other_tag)
+        post = self.create_post()
+
+        notification = fan_out_post(post.pk)
+
+        self.assertEqual(self.recipients(), ['reader@example.com'])
+        self.assertEqual(notification.instant_recipients, 1)
+        self.assertFalse(DigestItem.objects.exists())
+
+    def test_instant_subscription_wins_over_digest(self):
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.subscribe(reader, delivery=Subscription.DELIVERY_DIGEST, category=self.category)
+        self.subscribe(reader, tag=self.tag)
+        post = self.create_post()
+
+        notification = fan_out_post(post.pk)
+
+        self.assertEqual(self.recipients(), ['reader@example.com'])
+        self.assertEqual(notification.digest_recipients, 0)
+        self.assertFalse(DigestItem.objects.exists())
+
+    def test_digest_subscription_queues_item(self):
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.subscribe(reader, delivery=Subscription.DELIVERY_DIGEST, category=self.category)
+        self.subscribe(reader, delivery=Subscription.DELIVERY_DIGEST, tag=self.tag)
+        post = self.create_post()
+
+        notification = fan_out_post(post.pk)
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(notification.digest_recipients, 1)
+        self.assertQuerySetEqual(DigestItem.objects.values_list('user', 'post'), [(reader.pk, post.pk)])
+
+    def test_author_is_not_notified(self):
+        co_author = User.objects.create_user('co-author', 'co-author@example.com', 'password')
+        self.subscribe(self.author, category=self.category)
+        self.subscribe(self.author, delivery=Subscription.DELIVERY_DIGEST, tag=self.tag)
+        self.subscribe(co_author, tag=self.tag)
+        post = self.create_post()
+
+        fan_out_post(post.pk)
+
+        self.assertEqual(self.recipients(), ['co-author@example.com'])
+        self.assertFalse(DigestItem.objects.filter(user=self.author).exists())
+
+    def test_post_is_fanned_out_once(self):
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.subscribe(reader, category=self.category)
+        post = self.create_post()
+
+        self.assertIsNotNone(fan_out_post(post.pk))
+        self.assertIsNone(fan_out_post(post.pk))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(PostNotification.objects.filter(post=post).count(), 1)
+
+    def test_draft_is_not_fanned_out(self):
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        self.subscribe(reader, category=self.category)
+        post = self.create_post(status='draft')
+
+        self.assertIsNone(fan_out_post(post.pk))
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(PostNotification.objects.exists())
+
+    def test_digests_group_posts_per_reader(self):
+        first = User.objects.create_user('first', 'first@example.com', 'password')
+        second = User.objects.create_user('second', 'second@example.com', 'password')
+        posts = [self.create_post(f'Post {number}') for number in range(3)]
+        DigestItem.objects.bulk_create(
+            [DigestItem(user=first, post=post) for post in posts] + [DigestItem(user=second, post=posts[0])]
+        )
+
+        self.assertEqual(send_digests(), 2)
+
+        by_recipient = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(sorted(by_recipient), ['first@example.com', 'second@example.com'])
+        self.assertEqual(by_recipient['first@example.com'].subject, '3 new posts for you')
+        self.assertEqual(by_recipient['second@example.com'].subject, '1 new post for you')
+        for post in posts:
+            self.assertIn(post.title, by_recipient['first@example.com'].body)
+        self.assertFalse(DigestItem.objects.exists())
+
+    def test_digests_drop_unpublished_posts(self):
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        lapsed = User.objects.create_user('lapsed', 'lapsed@example.com', 'password')
+        kept, withdrawn = self.create_post('Kept post'), self.create_post('Withdrawn post')
+        DigestItem.objects.bulk_create([
+            DigestItem(user=reader, post=kept),
+            DigestItem(user=reader, post=withdrawn),
+            DigestItem(user=lapsed, post=withdrawn),
+        ])
+        withdrawn.status = 'draft'
+        withdrawn.save()
+
+        self.assertEqual(send_digests(), 1)
+
+        [message] = mail.outbox
+        self.assertEqual(message.to, ['reader@example.com'])
+        self.assertEqual(message.subject, '1 new post for you')
+        self.assertIn('Kept post', message.body)
+        self.assertNotIn('Withdrawn post', message.body)
+        self.assertFalse(DigestItem.objects.exists())
+
+
+class FeedTests(TestCase):
+    """
+    The cached RSS feed is invalidated when a post change commits.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', 'author@example.com', 'password')
+
+    def test_feed_shows_changes_after_commit(self):
+        post = Post.objects.create(
+            title='First title', description='Description', content='Content',
+            author=self.author, status='published',
+        )
+        self.assertContains(self.client.get('/feed/'), 'First title')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Second title'
+            post.save()
+
+        response = self.client.get('/feed/')
+        self.assertContains(response, 'Second title')
+        self.assertNotContains(response, 'First title')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+
+        self.assertNotContains(self.client.get('/feed/'), 'Second title')
+
+
+class PostTagsChangedTests(TestCase):
+    """
+    Changing only a post's tags is recorded as an update of the post.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', 'author@example.com', 'password')
+        self.tag = Tag.objects.create(name='Django')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(
+                title='Tagged post', content='Content', author=self.author, status='published',
+            )
+
+    def update_events(self):
+        return OutboxEvent.objects.filter(post_id=self.post.pk, event_type=OutboxEvent.EVENT_UPDATE)
+
+    def test_adding_a_tag_records_an_update(self):
+        updated_at = self.post.updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add(self.tag)
+
+        self.assertEqual(self.update_events().count(), 1)
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated_at, updated_at)
+
+    def test_adding_from_the_tag_side_records_an_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.posts.add(self.post)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.posts.clear()
+
+        self.assertEqual(self.update_events().count(), 2)
+
+    def test_adding_a_tag_the_post_has_records_nothing(self):
+        self.post.tags.add(self.tag)
+        self.update_events().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add(self.tag)
+
+        self.assertFalse(self.update_events().exists())
+
+    def test_saving_with_tags_records_one_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.post.title = 'Retitled post'
+                self.post.save()
+                self.post.tags.set([self.tag])
+
+        self.assertEqual(self.update_events().count(), 1)
+
+    def test_draft_records_nothing(self):
+        draft = Post.objects.create(title='Draft', content='Content', author=self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.tags.add(self.tag)
+
+        self.assertFalse(OutboxEvent.objects.filter(post_id=draft.pk).exists())
+
+
+class ContentSearchTests(TestCase):
+    """
+    Body search is switched off, loudly, when bodies are compressed.
+    """
+
+    def setUp(self):
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        Post.objects.create(
+            title='Haystack post', description='Description', content='Needle in the body',
+            author=author, status='published',
+        )
+
+    def test_search_matches_body(self):
+        self.assertContains(self.client.get('/search/', {'q': 'needle'}), 'Haystack post')
+
+    @override_settings(SEARCH_POST_CONTENT=False)
+    def test_search_without_body(self):
+        self.assertNotContains(self.client.get('/search/', {'q': 'needle'}), 'Haystack post')
+        self.assertContains(self.client.get('/search/', {'q': 'description'}), 'Haystack post')
+
+    @override_settings(POST_CONTENT_COMPRESSION=True)
+    def test_compression_requires_body_search_off(self):
+        self.assertEqual([error.id for error in check_content_search(None)], ['blog.E001'])
+        with override_settings(SEARCH_POST_CONTENT=False):
+            self.assertEqual(check_content_search(None), [])
+
+
+class NoOpSaveTests(TestCase):
+    """
+    Saving an unchanged instance runs no queries, not even BEGIN/COMMIT.
+    """
+
+    def test_unchanged_post_save_runs_no_queries(self):
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        Post.objects.create(title='Post', content='Content', author=author, status='published')
+        post = Post.objects.get()
+
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_unchanged_tag_save_runs_no_queries(self):
+        Tag.objects.create(name='Django')
+        tag = Tag.objects.get()
+
+        with CaptureQueriesContext(connection) as queries:
+            tag.save()
+        self.assertEqual(queries.captured_queries, [])
+
+        tag.name = 'Python'
+        with self.assertNumQueries(3):
+            # SAVEPOINT, UPDATE, RELEASE SAVEPOINT
+            tag.save()
+
+
+class PostListAPITests(TestCase):
+    """
+    ``/api/posts/`` pages through published posts with a cursor.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', 'author@example.com', 'password')
+        other = User.objects.create_user('other', 'other@example.com', 'password')
+        cls.parent = Category.objects.create(name='Programming')
+        cls.child = Category.objects.create(name='Python', parent=cls.parent)
+        cls.tag = Tag.objects.create(name='Django')
+        start = timezone.now() - timezone.timedelta(days=1)
+        cls.posts = []
+        for n in range(5):
+            post = Post.objects.create(
+                title=f'Post {n}', content='Content', author=cls.author, status='published',
+                category=cls.child if n == 0 else None,
+            )
+            cls.posts.append(post)
+        # Two posts share a timestamp, so the id breaks the tie
+        for n, post in enumerate(cls.posts):
+            Post.objects.filter(pk=post.pk).update(created_at=start + timezone.timedelta(minutes=min(n, 3)))
+        cls.posts[1].tags.add(cls.tag)
+        Post.objects.create(title='Draft', content='Content', author=cls.author)
+        Post.objects.create(title='By other', content='Content', author=other, status='published', category=cls.parent)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        return response.status_code, response.json()
+
+    def test_pages_follow_the_cursor_newest_first(self):
+        slugs, url, params = [], '/api/posts/', {'author': 'author', 'limit': 2, 'fields': 'slug'}
+        while url:
+            status, data = self.get(url, **params)
+            self.assertEqual(status, 200)
+            self.assertLessEqual(len(data['results']), 2)
+            slugs += [row['slug'] for row in data['results']]
+            url, params = data['next'], {}
+        self.assertEqual(slugs, [post.slug for post in reversed(self.posts)])
+
+    def test_last_page_has_no_next(self):
+        status, data = self.get('/api/posts/', limit=100)
+        self.assertEqual(len(data['results']), 6)
+        self.assertIsNone(data['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('WyJ4IiwxXQ', 'not base64!', 'WzFd'):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.get('/api/posts/', cursor=cursor), (400, {'error': 'Invalid cursor.'}))
+
+    def test_filters(self):
+        def titles(**params):
+            return {row['title'] for row in self.get('/api/posts/', fields='title', **params)[1]['results']}
+
+        self.assertEqual(titles(category='programming'), {'Post 0', 'By other'})
+        self.assertEqual(titles(category='python'), {'Post 0'})
+        self.assertEqual(titles(tag='django'), {'Post 1'})
+        self.assertEqual(titles(author='other'), {'By other'})
+
+    def test_unknown_field(self):
+        self.assertEqual(self.get('/api/posts/', fields='title,secret'), (400, {'error': 'Unknown fields: secret.'}))
+
+
+async def get_async_view(view, path, **kwargs):
+    """
+    Run an async view the way RoleMiddleware leaves requests for a reader.
+    """
+    request = AsyncRequestFactory().get(path)
+    request.user = AnonymousUser()
+    request.role = None
+    request.session = {}
+    return await view.as_view()(request, **kwargs)
+
+
+class AsyncViewTests(TestCase):
+    """
+    The async views render the same listings and context as the sync views.
+    """
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        self.parent = Category.objects.create(name='Backend', slug='backend')
+        self.child = Category.objects.create(name='Databases', slug='databases', parent=self.parent)
+        self.tag = Tag.objects.create(name='Postgres', slug='postgres')
+        self.post = Post.objects.create(
+            title='Tuning vacuum', content='<p>Autovacuum settings.</p>',
+            author=author, category=self.child, status='published',
+        )
+        self.post.tags.add(self.tag)
+        self.related = Post.objects.create(
+            title='Index bloat', content='<p>Reindex concurrently.</p>',
+            author=author, category=self.child, status='published',
+        )
+        Post.objects.create(
+            title='Unfinished draft', content='<p>Draft.</p>',
+            author=author, category=self.child, status='draft',
+        )
+        Comment.objects.create(post=self.post, user=author, content='Great read', is_approved=True)
+
+    async def test_post_list(self):
+        response = await get_async_view(async_views.PostListView, '/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Tuning vacuum')
+        self.assertContains(response, 'Index bloat')
+        self.assertNotContains(response, 'Unfinished draft')
+
+    async def test_category_posts_include_subcategories(self):
+        response = await get_async_view(async_views.CategoryPostListView, '/', slug=self.parent.slug)
+
+        self.assertContains(response, 'Tuning vacuum')
+        self.assertContains(response, 'Databases')
+        self.assertNotContains(response, 'Unfinished draft')
+
+    async def test_tag_posts(self):
+        response = await get_async_view(async_views.TagPostListView, '/', slug=self.tag.slug)
+
+        self.assertContains(response, 'Tuning vacuum')
+        self.assertNotContains(response, 'Index bloat')
+
+    async def test_search(self):
+        response = await get_async_view(async_views.SearchView, '/?q=vacuum')
+
+        self.assertContains(response, 'Tuning vacuum')
+        self.assertNotContains(response, 'Index bloat')
+
+    async def test_category_list(self):
+        response = await get_async_view(async_views.CategoryListView, '/')
+
+        self.assertContains(response, 'Backend')
+        self.assertContains(response, 'Databases')
+
+    async def test_post_detail(self):
+        response = await get_async_view(async_views.PostDetailView, '/', slug=self.post.slug)
+
+        self.assertContains(response, 'Autovacuum settings.')
+        self.assertContains(response, 'Great read')
+        self.assertContains(response, 'Index bloat')
+
+
+@skipUnless(zstandard, 'requires the zstandard package')
+@override_settings(POST_CONTENT_COMPRESSION=True, POST_CONTENT_CODEC='zstd', SEARCH_POST_CONTENT=False)
+class DictionaryCompressionTests(TestCase):
+    """
+    Bodies compressed with a zstd dictionary render in the async views.
+    """
+
+    def setUp(self):
+        samples = [
+            f'<p>Post {n} about {topic} and how it is deployed, tested and monitored.</p>'.encode() * 4
+            for n in range(200) for topic in ('django', 'python', 'postgres')
+        ]
+        dictionary = zstandard.train_dictionary(4096, samples)
+        CompressionDictionary.objects.create(
+            dict_id=dictionary.dict_id(), data=dictionary.as_bytes(), sample_count=len(samples)
+        )
+        compression.newest_dictionary_id.cache_clear()
+        compression.get_dictionary.cache_clear()
+        self.addCleanup(compression.newest_dictionary_id.cache_clear)
+        self.addCleanup(compression.get_dictionary.cache_clear)
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        self.post = Post.objects.create(
+            title='Compressed', content='<p>Deployed with django and postgres.</p>' * 40,
+            author=author, status='published',
+        )
+        stored = Post.objects.values_list('content', flat=True).get(pk=self.post.pk)
+        self.assertTrue(stored.startswith(f'{compression.MARKER}s{dictionary.dict_id()}:'))
+        # The dictionary is loaded on first use, from the view
+        compression.get_dictionary.cache_clear()
+
+    async def test_async_detail_view_renders(self):
+        response = await get_async_view(async_views.PostDetailView, '/', slug=self.post.slug)
+
+        self.assertContains(response, 'Deployed with django and postgres.')
+
+
+class PostDeleteTests(TestCase):
+    """
+    Deleting a post undoes what its stored status counted, whatever unsaved
+    status the instance has.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', 'author@example.com', 'password')
+
+    def delete_with_status(self, stored, unsaved):
+        Post.objects.create(title='Post', content='Content', author=self.author, status=stored)
+        post = Post.objects.get()
+        post.status = unsaved
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        return OutboxEvent.objects.filter(event_type=OutboxEvent.EVENT_DELETE).exists()
+
+    def test_published_post_with_unsaved_draft_status(self):
+        self.assertTrue(self.delete_with_status('published', 'draft'))
+        self.assertEqual(MonthlyArchive.objects.get().published_count, 0)
+        totals = get_author_stats(self.author.pk)['totals']
+        self.assertEqual((totals['posts'], totals['published']), (0, 0))
+
+    def test_draft_with_unsaved_published_status(self):
+        self.assertFalse(self.delete_with_status('draft', 'published'))
+        self.assertFalse(MonthlyArchive.objects.exists())
+        totals = get_author_stats(self.author.pk)['totals']
+        self.assertEqual((totals['posts'], totals['published']), (0, 0))
+
+
+class SlugTests(TestCase):
+    """
+    Slugs are allocated once, with the lowest free suffix, and old ones redirect.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', 'author@example.com', 'password')
+
+    def create_post(self, title, **kwargs):
+        return Post.objects.create(title=title, content='Content', author=self.author, status='published', **kwargs)
+
+    def test_suffixes_are_allocated_in_order(self):
+        slugs = [self.create_post('Hello World').slug for _ in range(3)]
+
+        self.assertEqual(slugs, ['hello-world', 'hello-world-1', 'hello-world-2'])
+
+    def test_prefix_siblings_do_not_take_a_suffix(self):
+        self.create_post('x')
+        self.create_post('x 10')
+        self.create_post('x ray')
+
+        self.assertEqual(self.create_post('x').slug, 'x-1')
+
+    def test_freed_suffix_is_reused(self):
+        self.create_post('x')
+        self.create_post('x')
+        self.create_post('x').delete()
+        Post.objects.get(slug='x-1').delete()
+
+        self.assertEqual(self.create_post('x').slug, 'x-1')
+        self.assertEqual(next_free_slug(Post, 'x'), 'x-2')
+
+    def test_concurrent_allocation_is_retried(self):
+        self.create_post('x')
+        # A concurrent save took 'x' after this one looked for free slugs
+        with mock.patch('blog.slugs.next_free_slug', side_effect=['x', 'x-1']) as allocate:
+            post = self.create_post('x')
+
+        self.assertEqual(post.slug, 'x-1')
+        self.assertEqual(allocate.call_count, 2)
+
+    def test_allocation_gives_up_after_repeated_conflicts(self):
+        self.create_post('x')
+        with mock.patch('blog.slugs.next_free_slug', return_value='x') as allocate:
+            with self.assertRaises(IntegrityError):
+                self.create_post('x')
+
+        self.assertEqual(allocate.call_count, SLUG_ATTEMPTS)
+
+    def test_slug_is_kept_when_title_changes(self):
+        post = self.create_post('First title')
+        post.title = 'Second title'
+        post.save()
+
+        self.assertEqual(post.slug, 'first-title')
+
+    def test_old_slug_redirects(self):
+        post = self.create_post('First title')
+        post.slug = 'second-title'
+        post.save()
+        post.slug = 'third-title'
+        post.save()
+
+        for old in ('first-title', 'second-title'):
+            with self.subTest(old=old):
+                self.assertRedirects(
+                    self.client.get(f'/post/{old}/', {'page': 2}), '/post/third-title/?page=2',
+                    status_code=301, fetch_redirect_response=False,
+                )
+
+    def test_unknown_slug_is_not_found(self):
+        self.assertEqual(self.client.get('/post/missing/').status_code, 404)
+
+    def test_old_slug_taken_by_new_post(self):
+        post = self.create_post('Hello')
+        post.slug = 'renamed'
+        post.save()
+
+        reused = self.create_post('Hello')
+        self.assertEqual(reused.slug, 'hello')
+        self.assertContains(self.client.get('/post/hello/'), reused.title)
+
+        # Moving a post back to an old slug of its own drops the redirect
+        post.slug = 'hello-again'
+        post.save()
+        reused.slug = 'renamed'
+        reused.save()
+        self.assertEqual(self.client.get('/post/renamed/').status_code, 200)
+        self.assertFalse(SlugHistory.objects.filter(old_slug='renamed').exists())
+
+
+class CommentThreadTests(TestCase):
+    """
+    Comments keep their materialized path, depth and reply count in step.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'password')
+        cls.post = Post.objects.create(title='Post', content='Content', author=cls.user, status='published')
+
+    def comment(self, parent=None, **kwargs):
+        return Comment.objects.create(post=self.post, user=self.user, content='Comment', parent=parent, **kwargs)
+
+    def test_reply_path_and_depth(self):
+        root = self.comment()
+        reply = self.comment(parent=root)
+        nested = self.comment(parent=reply)
+
+        self.assertEqual((root.depth, reply.depth, nested.depth), (0, 1, 2))
+        self.assertEqual(root.path, f'{root.pk:010d}')
+        self.assertEqual(nested.path, f'{root.pk:010d}{reply.pk:010d}{nested.pk:010d}')
+        self.assertEqual(Comment.objects.get(pk=nested.pk).path, nested.path)
+        root.refresh_from_db()
+        self.assertEqual(root.child_count, 1)
+
+    def test_replies_past_max_depth_join_the_parent(self):
+        parent = None
+        for _ in range(Comment.MAX_DEPTH + 1):
+            parent = self.comment(parent=parent)
+        deepest = self.comment(parent=parent)
+
+        self.assertEqual(deepest.depth, Comment.MAX_DEPTH)
+        self.assertEqual(deepest.parent_id, parent.parent_id)
+
+    def test_child_count_when_reply_is_deleted(self):
+        root = self.comment()
+        first, second = self.comment(parent=root), self.comment(parent=root)
+        self.comment(parent=first)
+
+        first.delete()
+
+        root.refresh_from_db()
+        self.assertEqual(root.child_count, 1)
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True)), [root.pk, second.pk])
+
+    def test_threads_sort_by_path_across_digit_counts(self):
+        # IDs with more digits still sort after shorter ones, replies right after their parent
+        nine, ten, eleven = (self.comment(pk=pk) for pk in (9, 10, 11))
+        reply_to_nine = self.comment(parent=nine, pk=100)
+        reply_to_ten = self.comment(parent=ten, pk=12)
+
+        page, comments = get_comment_page(self.post, 1)
+
+        self.assertEqual(page.object_list, [nine.path, ten.path, eleven.path])
+        self.assertEqual(comments, [nine, reply_to_nine, ten, reply_to_ten, eleven])
+
+    def test_reply_to_comment_on_another_post_is_rejected(self):
+        other_post = Post.objects.create(title='Other', content='Content', author=self.user, status='published')
+        other = Comment.objects.create(post=other_post, user=self.user, content='Comment')
+
+        form = CommentForm({'content': 'A reply', 'parent': other.pk}, post=self.post)
+        self.assertFalse(form.is_valid())
+        self.assertIn('parent', form.errors)
+        with self.assertRaises(ValueError):
+            self.comment(parent=other)
+        self.assertEqual(Comment.objects.get(pk=other.pk).child_count, 0)
+
+
+class CategoryClosureTests(TestCase):
+    """
+    The closure table holds every ancestor/descendant pair as categories are
+    created, moved and deleted.
+    """
+
+    def setUp(self):
+        self.a = Category.objects.create(name='A')
+        self.b = Category.objects.create(name='B', parent=self.a)
+        self.c = Category.objects.create(name='C', parent=self.b)
+        self.d = Category.objects.create(name='D')
+
+    def links(self):
+        return set(CategoryClosure.objects.values_list('ancestor__name', 'descendant__name', 'depth'))
+
+    def assertLinks(self, *pairs):
+        names = Category.objects.values_list('name', flat=True)
+        self.assertEqual(self.links(), {(name, name, 0) for name in names} | set(pairs))
+
+    def test_create(self):
+        self.assertLinks(('A', 'B', 1), ('A', 'C', 2), ('B', 'C', 1))
+        self.assertEqual(list(get_ancestors(self.c)), [self.a, self.b])
+
+    def test_move_subtree(self):
+        self.b.parent = self.d
+        self.b.save()
+
+        self.assertLinks(('D', 'B', 1), ('D', 'C', 2), ('B', 'C', 1))
+
+        self.b.parent = None
+        self.b.save()
+
+        self.assertLinks(('B', 'C', 1))
+
+    def test_delete_makes_children_top_level(self):
+        self.b.delete()
+
+        self.assertLinks()
+        self.c.refresh_from_db()
+        self.assertIsNone(self.c.parent_id)
+
+    def test_cannot_move_under_itself_or_a_descendant(self):
+        before = self.links()
+        for parent in (self.a, self.c):
+            with self.subTest(parent=parent.name):
+                self.a.parent = parent
+                with self.assertRaises(ValueError):
+                    self.a.save()
+                self.assertEqual(self.links(), before)
+                self.assertIsNone(Category.objects.get(pk=self.a.pk).parent_id)
+
+    def test_rebuild_reproduces_the_table(self):
+        self.c.parent = self.d
+        self.c.save()
+        Category.objects.create(name='E', parent=self.c)
+        maintained = self.links()
+
+        rebuild_closure()
+
+        self.assertEqual(self.links(), maintained)
+
+    def test_subtree_post_counts(self):
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        for category in (self.a, self.c, self.c, self.d):
+            Post.objects.create(title='Post', content='Content', author=author, status='published', category=category)
+        Post.objects.create(title='Draft', content='Content', author=author, category=self.c)
+
+        counts = get_subtree_post_counts()
+
+        self.assertEqual(counts, {self.a.pk: 3, self.b.pk: 2, self.c.pk: 2, self.d.pk: 1})
+        self.assertEqual(posts_under(self.b).filter(status='published').count(), 2)
+
+
+class BitmapTests(SimpleTestCase):
+    """
+    Bitmaps behave like sets of integers in sparse and dense chunks.
+    """
+
+    def test_set_operations(self):
+        # A dense chunk, a sparse chunk and a chunk on one side only
+        dense = set(range(0, 3 * SPARSE_MAX, 2))
+        left = dense | {70000, 70001, 200000}
+        right = set(range(1, SPARSE_MAX, 3)) | set(range(0, 100, 4)) | {70001, 140000}
+
+        self.assertEqual(list(Bitmap(left) & Bitmap(right)), sorted(left & right))
+        self.assertEqual(list(Bitmap(left) | Bitmap(right)), sorted(left | right))
+        self.assertEqual(len(Bitmap(left)), len(left))
+        self.assertIn(200000, Bitmap(left))
+        self.assertNotIn(3, Bitmap(left))
+
+    def test_discard_empties_chunks(self):
+        bitmap = Bitmap(range(SPARSE_MAX + 1))
+        self.assertIsInstance(bitmap.chunks[0], int)
+        for value in range(SPARSE_MAX + 1):
+            bitmap.discard(value)
+
+        self.assertFalse(bitmap)
+        self.assertEqual(bitmap.chunks, {})
+
+
+class FacetTests(TestCase):
+    """
+    Facet selections and counts match the posts in the database.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.python = Tag.objects.create(name='Python')
+        cls.django = Tag.objects.create(name='Django')
+        cls.programming = Category.objects.create(name='Programming')
+        cls.web = Category.objects.create(name='Web', parent=cls.programming)
+        cls.author = User.objects.create_user('author', 'author@example.com', 'password')
+        start = timezone.now() - timezone.timedelta(days=1)
+        cls.posts = []
+        for n, (category, tags) in enumerate([
+            (cls.programming, [cls.python]),
+            (cls.web, [cls.python, cls.django]),
+            (cls.web, [cls.django]),
+            (None, [cls.python, cls.django]),
+        ]):
+            post = Post.objects.create(
+                title=f'Post {n}', content='Content', author=cls.author, status='published', category=category
+            )
+            Post.objects.filter(pk=post.pk).update(created_at=start + timezone.timedelta(hours=n))
+            post.tags.set(tags)
+            cls.posts.append(post)
+        Post.objects.create(title='Draft', content='Content', author=cls.author, category=cls.web).tags.add(cls.python)
+
+    def setUp(self):
+        self.index = FacetIndex()
+
+    def query(self, tags, **params):
+        selection = FacetSelection(tags, params)
+        post_ids, counts = self.index.query(selection.groups(), ('tag', 'category'))
+        return post_ids, counts['tag'], roll_up_category_counts(counts['category'])
+
+    def test_tags_newest_first(self):
+        post_ids, tags, categories = self.query('python+django')
+
+        self.assertEqual(post_ids, [self.posts[3].pk, self.posts[1].pk])
+        self.assertEqual(tags, {self.python.pk: 2, self.django.pk: 2})
+        self.assertEqual(categories, {self.programming.pk: 1, self.web.pk: 1})
+
+    def test_category_includes_subcategories(self):
+        post_ids, tags, categories = self.query('python', category='programming')
+
+        self.assertEqual(post_ids, [self.posts[1].pk, self.posts[0].pk])
+        self.assertEqual(tags, {self.python.pk: 2, self.django.pk: 1})
+        self.assertEqual(categories, {self.programming.pk: 2, self.web.pk: 1})
+
+    def test_subcategory(self):
+        post_ids, _, categories = self.query('django', category='web')
+
+        self.assertEqual(post_ids, [self.posts[2].pk, self.posts[1].pk])
+        self.assertEqual(categories, {self.programming.pk: 2, self.web.pk: 2})
+
+    def test_order_follows_changes(self):
+        self.index.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.filter(pk=self.posts[0].pk).update(created_at=timezone.now())
+            self.posts[0].title = 'Edited'
+            self.posts[0].save()
+            self.posts[3].delete()
+        self.index.checked_at = 0
+
+        self.assertEqual(self.query('python')[0], [self.posts[0].pk, self.posts[1].pk])
+        # Both ways of ordering: filtering the kept order and sorting a small selection
+        self.assertEqual(self.index.ordered_ids(self.index.published), [self.posts[n].pk for n in (0, 2, 1)])
+        self.assertEqual(self.index.ordered_ids(Bitmap([self.posts[1].pk])), [self.posts[1].pk])
+
+    def test_facet_page(self):
+        with mock.patch('blog.views.facet_index', self.index):
+            response = self.client.get('/tag/python/', {'category': 'programming'})
+
+        self.assertEqual([post.pk for post in response.context['posts']], [self.posts[1].pk, self.posts[0].pk])
+
+
+class ContentTransferTests(TestCase):
+    """
+    Exported content imports back unchanged, also when the import is resumed
+    from a checkpoint.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', 'author@example.com', 'password')
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        # The child is exported before the parent it was later moved under
+        child = Category.objects.create(name='Web')
+        parent = Category.objects.create(name='Programming')
+        child.parent = parent
+        child.save()
+        Category.objects.create(name='Django', parent=child)
+        tag = Tag.objects.create(name='Python')
+        for n in range(3):
+            post = Post.objects.create(
+                title=f'Post {n}', description='Description', content=f'<p>Body {n}</p>',
+                author=self.author, status='published' if n else 'draft', category=child,
+            )
+            post.tags.add(tag)
+            root = Comment.objects.create(post=post, user=reader, content='First')
+            Comment.objects.create(post=post, user=self.author, content='Reply', parent=root)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'content.ndjson.gz')
+        self.checkpoint = f'{self.path}.checkpoint'
+        export_content(self.path)
+        self.exported = self.snapshot()
+        for model in (Comment, Post, Tag, Category):
+            model.objects.all().delete()
+        MonthlyArchive.objects.all().delete()
+
+    def snapshot(self):
+        return {
+            'categories': set(Category.objects.values_list('slug', 'parent__slug', 'created_at')),
+            'closure': set(CategoryClosure.objects.values_list('ancestor__slug', 'descendant__slug', 'depth')),
+            'posts': set(Post.objects.values_list(
+                'slug', 'title', 'content', 'status', 'author__username', 'category__slug', 'created_at', 'updated_at',
+            )),
+            'tags': set(Post.tags.through.objects.values_list('post__slug', 'tag__slug')),
+            'comments': set(Comment.objects.values_list(
+                'post__slug', 'user__username', 'parent__user__username', 'depth', 'child_count', 'created_at',
+            )),
+            'archive': set(MonthlyArchive.objects.values_list('year', 'month', 'published_count')),
+        }
+
+    def test_round_trip(self):
+        importer = import_content(self.path, batch_size=2)
+
+        self.assertEqual(self.snapshot(), self.exported)
+        self.assertEqual(importer.created, {'category': 3, 'tag': 1, 'post': 3, 'comment': 6})
+        self.assertEqual(get_author_stats(self.author.pk)['totals']['posts'], 3)
+
+    def test_resume_after_interruption(self):
+        original = Importer.import_batch
+
+        def interrupted(importer, kind, rows):
+            if kind == 'post':
+                raise KeyboardInterrupt
+            return original(importer, kind, rows)
+
+        with mock.patch.object(Importer, 'import_batch', interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                import_content(self.path, batch_size=1, checkpoint=self.checkpoint)
+        self.assertEqual(Category.objects.count(), 3)
+        self.assertFalse(Post.objects.exists())
+
+        importer = import_content(self.path, batch_size=1, checkpoint=self.checkpoint)
+
+        self.assertEqual(self.snapshot(), self.exported)
+        self.assertEqual(importer.created['category'], 3)
+        self.assertEqual(importer.category_parents, {})
+
+    def test_import_again_skips_everything(self):
+        import_content(self.path)
+
+        importer = import_content(self.path)
+
+        self.assertEqual(+importer.created, {})
+        self.assertEqual(importer.skipped, {'category': 3, 'tag': 1, 'post': 3, 'comment': 6})
+        self.assertEqual(self.snapshot(), self.exported)
+
+
+@override_settings(SITE_URL='http://testserver')
+class SnapshotTests(TestCase):
+    """
+    Static exports write a manifest and only render pages whose rows changed.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author', 'author@example.com', 'password')
+        self.post = Post.objects.create(
+            title='Snapshot post', content='<p>Body.</p>', author=self.author, status='published',
+        )
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        # The export keeps one test client per process, bound to SITE_URL's host,
+        # and stops counting views for the rest of the process
+        for module, name, value in ((snapshots, '_client', None), (pageviews, '_recording', True)):
+            patcher = mock.patch.object(module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.detail_url = f'/post/{self.post.slug}/'
+
+    def export(self, **kwargs):
+        return snapshots.export_site(self.root, **kwargs)
+
+    def manifest(self):
+        with open(os.path.join(self.root, snapshots.MANIFEST_FILE)) as f:
+            return json.load(f)['pages']
+
+    def test_export_writes_pages_and_manifest(self):
+        result = self.export()
+
+        self.assertEqual(result['failed'], [])
+        pages = self.manifest()
+        self.assertEqual(pages, snapshots.plan_pages())
+        self.assertEqual(result['rendered'], len(pages))
+        self.assertIn(self.detail_url, pages)
+        with open(os.path.join(self.root, snapshots.snapshot_file(self.detail_url))) as f:
+            self.assertIn('Snapshot post', f.read())
+
+    def test_unchanged_pages_are_not_rendered(self):
+        self.export()
+
+        result = self.export()
+
+        self.assertEqual(result['rendered'], 0)
+        self.assertEqual(result['unchanged'], len(self.manifest()))
+
+    def test_comment_changes_invalidate_the_detail_page(self):
+        comment = Comment.objects.create(post=self.post, user=self.author, content='Pending', is_approved=False)
+        self.export()
+        before = self.manifest()[self.detail_url]
+
+        # Approved from the admin, which updates without saving the comment
+        Comment.objects.filter(pk=comment.pk).update(is_approved=True)
+        approved = snapshots.plan_pages()[self.detail_url]
+        Comment.objects.filter(pk=comment.pk).update(is_approved=False)
+        hidden = snapshots.plan_pages()[self.detail_url]
+
+        self.assertNotEqual(approved, before)
+        self.assertEqual(hidden, before)
+
+    def test_approving_a_comment_renders_only_its_post(self):
+        comment = Comment.objects.create(post=self.post, user=self.author, content='Now visible', is_approved=False)
+        self.export()
+
+        Comment.objects.filter(pk=comment.pk).update(is_approved=True)
+        result = self.export()
+
+        self.assertEqual(result['rendered'], 1)
+        with open(os.path.join(self.root, snapshots.snapshot_file(self.detail_url))) as f:
+            self.assertIn('Now visible', f.read())
+
+    def test_withdrawn_post_is_removed(self):
+        self.export()
+
+        Post.objects.filter(pk=self.post.pk).update(status='draft')
+        result = self.export()
+
+        self.assertNotIn(self.detail_url, self.manifest())
+        self.assertGreaterEqual(result['removed'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.root, snapshots.snapshot_file(self.detail_url))))
+
+
+class PageViewTests(TestCase):
+    """
+    Views are buffered in memory and each one is written exactly once, however
+    often or concurrently the buffer is flushed.
+    """
+
+    def setUp(self):
+        # No background flusher: the tests flush explicitly
+        for name, value in (('_buffer', Counter()), ('_flusher', object()), ('_recording', True)):
+            patcher = mock.patch.object(pageviews, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.author = User.objects.create_user('author', 'author@example.com', 'password')
+        self.post = Post.objects.create(title='Viewed', content='Body', author=self.author, status='published')
+        self.other = Post.objects.create(title='Also viewed', content='Body', author=self.author, status='published')
+        self.today = timezone.localdate()
+
+    def views(self, post):
+        return PostViewDaily.objects.get(post=post, date=self.today).views
+
+    def test_views_are_buffered(self):
+        with self.assertNumQueries(0):
+            pageviews.record_view(self.post.id)
+            pageviews.record_view(self.post.id)
+
+        self.assertEqual(pageviews._buffer, {(self.post.id, self.today): 2})
+        self.assertFalse(PostViewDaily.objects.exists())
+
+    def test_flush_writes_the_increments(self):
+        for post in (self.post, self.post, self.post, self.other):
+            pageviews.record_view(post.id)
+
+        self.assertEqual(pageviews.flush_views(), 4)
+
+        self.assertEqual(self.views(self.post), 3)
+        self.assertEqual(self.views(self.other), 1)
+        self.assertEqual(get_author_stats(self.author.id)['totals']['views'], 4)
+        self.assertFalse(pageviews._buffer)
+
+    def test_flushing_twice_does_not_count_twice(self):
+        pageviews.record_view(self.post.id)
+        pageviews.flush_views()
+
+        self.assertEqual(pageviews.flush_views(), 0)
+        pageviews.record_view(self.post.id)
+        pageviews.flush_views()
+
+        self.assertEqual(self.views(self.post), 2)
+        self.assertEqual(PostViewDaily.objects.count(), 1)
+
+    def test_views_during_a_flush_wait_for_the_next_one(self):
+        pageviews.record_view(self.post.id)
+
+        def view_while_flushing(pending, authors):
+            pageviews.record_view(self.post.id)
+            record_views(pending, authors)
+
+        with mock.patch('blog.pageviews.record_views', side_effect=view_while_flushing):
+            self.assertEqual(pageviews.flush_views(), 1)
+
+        self.assertEqual(self.views(self.post), 1)
+        self.assertEqual(pageviews.flush_views(), 1)
+        self.assertEqual(self.views(self.post), 2)
+        self.assertEqual(get_author_stats(self.author.id)['totals']['views'], 2)
+
+    def test_failed_flush_keeps_the_views(self):
+        pageviews.record_view(self.post.id)
+
+        with mock.patch('blog.pageviews.record_views', side_effect=DatabaseError('locked')):
+            with self.assertRaises(DatabaseError):
+                pageviews.flush_views()
+
+        self.assertEqual(PostViewDaily.objects.filter(views__gt=0).count(), 0)
+        self.assertEqual(pageviews.flush_views(), 1)
+        self.assertEqual(self.views(self.post), 1)
+
+    def test_views_of_deleted_posts_are_dropped(self):
+        pageviews.record_view(self.other.id)
+        self.other.delete()
+
+        self.assertEqual(pageviews.flush_views(), 0)
+        self.assertFalse(PostViewDaily.objects.exists())
+
+
+class TailwindTests(SimpleTestCase):
+    """
+    The generated stylesheet covers the Tailwind classes the templates use,
+    and pages find the built stylesheet without searching for it each time.
+    """
+    # Icon font, layout hooks and typography classes that are not Tailwind utilities
+    NOT_UTILITIES = {'material-symbols-outlined', 'layout-container', 'layout-content-container', 'light', 'group'}
+    TAILWIND_TEMPLATES = [
+        'base.html', 'includes/navbar.html', 'includes/footer.html', 'includes/trending_posts.html',
+        'blog/post_list.html', 'blog/category_list.html', 'blog/category_posts.html', 'blog/tag_posts.html',
+        'blog/search_results.html', 'accounts/login.html', 'accounts/register.html',
+    ]
+
+    def setUp(self):
+        tailwind.find_manifest.cache_clear()
+        tailwind.read_manifest.cache_clear()
+        self.addCleanup(tailwind.find_manifest.cache_clear)
+        self.addCleanup(tailwind.read_manifest.cache_clear)
+
+    def test_template_classes_are_generated(self):
+        css, classes, _ = tailwind.build_stylesheet()
+        generated = set(classes) | ({'container'} if '.container{' in css else set())
+        templates = {
+            path.relative_to(settings.BASE_DIR / 'templates').as_posix(): path
+            for path in tailwind.source_files()[0]
+        }
+
+        for name in self.TAILWIND_TEMPLATES:
+            text = re.sub(r'{[{%].*?[%}]}', ' ', templates[name].read_text())
+            used = {cls for attribute in tailwind.CLASS_ATTRIBUTE.findall(text) for cls in attribute.split()}
+            with self.subTest(template=name):
+                self.assertTrue(used)
+                self.assertEqual(sorted(used - generated - self.NOT_UTILITIES), [])
+        self.assertIn('.dark .dark\\:hover\\:bg-primary\\/10:hover{', css)
+        self.assertIn('@media (min-width:768px){.md\\:grid-cols-2{', css)
+
+    def write_manifest(self, directory, name):
+        path = os.path.join(directory, 'tailwind.json')
+        with open(path, 'w') as f:
+            json.dump({'css': name}, f)
+        return path
+
+    def test_manifest_is_found_once(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = self.write_manifest(directory, 'css/tailwind.abc.css')
+            with mock.patch('blog.tailwind.finders.find', return_value=path) as find:
+                self.assertEqual(tailwind.built_stylesheet(), 'css/tailwind.abc.css')
+                self.assertEqual(tailwind.built_stylesheet(), 'css/tailwind.abc.css')
+
+        find.assert_called_once_with(tailwind.MANIFEST_NAME)
+
+    @override_settings(DEBUG=True)
+    def test_rebuilt_manifest_is_read_again_in_debug(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch('blog.tailwind.finders.find', return_value=None) as find:
+                self.assertIsNone(tailwind.built_stylesheet())
+                path = self.write_manifest(directory, 'css/tailwind.abc.css')
+                find.return_value = path
+                self.assertEqual(tailwind.built_stylesheet(), 'css/tailwind.abc.css')
+
+                self.write_manifest(directory, 'css/tailwind.def.css')
+                os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+                self.assertEqual(tailwind.built_stylesheet(), 'css/tailwind.def.css')
+
+        self.assertEqual(find.call_count, 2)
+
+
+class RecordingSink(outbox.Sink):
+    name = 'recording'
+    batches = []
+
+    def deliver(self, events):
+        self.batches.append(([e.id for e in events], connection.in_atomic_block))
+
+
+class FailingSink(outbox.Sink):
+    name = 'failing'
+
+    def deliver(self, events):
+        raise RuntimeError('unavailable')
+
+
+class OutboxDispatchTests(TransactionTestCase):
+    """
+    Outbox events are claimed and settled in short transactions and delivered
+    outside of any.
+    """
+
+    def setUp(self):
+        RecordingSink.batches = []
+        outbox.get_sinks.cache_clear()
+        self.addCleanup(outbox.get_sinks.cache_clear)
+
+    def create_events(self, count):
+        return [OutboxEvent.objects.create(event_type=OutboxEvent.EVENT_PUBLISH, post_id=n) for n in range(count)]
+
+    @override_settings(BLOG_OUTBOX_SINKS=['blog.tests.RecordingSink'])
+    def test_sinks_run_outside_a_transaction(self):
+        events = self.create_events(3)
+
+        self.assertEqual(outbox.dispatch_pending(batch_size=2), 3)
+
+        self.assertEqual(RecordingSink.batches, [([events[0].id, events[1].id], False), ([events[2].id], False)])
+        self.assertEqual(OutboxEvent.objects.filter(status=OutboxEvent.STATUS_DELIVERED).count(), 3)
+
+    @override_settings(BLOG_OUTBOX_SINKS=['blog.tests.RecordingSink'])
+    def test_claimed_events_are_skipped_until_claim_timeout(self):
+        self.create_events(2)
+
+        claimed = outbox.claim_batch(10)
+
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(outbox.claim_batch(10), [])
+        self.assertEqual(OutboxEvent.objects.filter(next_attempt_at__gt=timezone.now()).count(), 2)
+
+    @override_settings(BLOG_OUTBOX_SINKS=['blog.tests.RecordingSink', 'blog.tests.FailingSink'])
+    def test_failed_sink_is_retried_alone(self):
+        [event] = self.create_events(1)
+
+        with self.assertLogs('blog.outbox', 'WARNING'):
+            self.assertEqual(outbox.dispatch_pending(), 0)
+
+        event.refresh_from_db()
+        self.assertEqual(event.status, OutboxEvent.STATUS_PENDING)
+        self.assertEqual(event.delivered_sinks, ['recording'])
+        self.assertEqual(event.attempts, 1)
+        self.assertIn('failing: unavailable', event.last_error)
+        self.assertGreater(event.next_attempt_at, timezone.now())
+
+
+@override_settings(RATELIMIT_RATES={'login': '3/m', 'search': '2/m'})
+class RateLimitTests(TestCase):
+    """
+    Rate limits are counted in the shared cache and answered with a 429.
+    """
+
+    def test_login_posts_are_limited_per_ip(self):
+        credentials = {'username': 'nobody', 'password': 'wrong'}
+        statuses = [self.client.post('/accounts/login/', credentials).status_code for _ in range(4)]
+
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        response = self.client.post('/accounts/login/', credentials, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/accounts/login/').status_code, 200)
+
+    def test_limited_response_has_retry_after(self):
+        for _ in range(2):
+            self.client.get('/search/', {'q': 'design'})
+
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.get('/search/', {'q': 'design'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertIn('no-store', response['Cache-Control'])
+
+    @override_settings(RATELIMIT_RATES={'login': '3/m', 'search': None})
+    def test_rules_set_to_none_are_not_limited(self):
+        statuses = {self.client.get('/search/', {'q': 'design'}).status_code for _ in range(5)}
+
+        self.assertEqual(statuses, {200})
+
+    @override_settings(RATELIMIT_RATES={'login': '3/m'})
+    def test_missing_rule_is_an_error(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.client.get('/search/', {'q': 'design'})
+
+    def test_database_cache_increments(self):
+        cache.set('counter', 1, 60)
+
+        self.assertEqual(cache.incr('counter'), 2)
+        self.assertEqual(cache.incr('counter', 5), 7)
+        self.assertEqual(cache.decr('counter'), 6)
+        self.assertEqual(cache.get('counter'), 6)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+
+class BackfillMigrationTests(TransactionTestCase):
+    """
+    Tables of precomputed counts are filled from existing rows when created.
+    """
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('blog', target)])
+        return executor.loader.project_state([('blog', target)]).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('blog')[0][1])
+
+    def test_archive_months_are_counted(self):
+        apps = self.migrate('0008_slughistory')
+        User = apps.get_model('auth', 'User')
+        Post = apps.get_model('blog', 'Post')
+        author = User.objects.create(username='author')
+        for slug, status, created_at in [
+            ('a', 'published', '2024-01-10T12:00:00Z'),
+            ('b', 'published', '2024-01-20T12:00:00Z'),
+            ('c', 'draft', '2024-01-25T12:00:00Z'),
+            ('d', 'published', '2024-03-05T12:00:00Z'),
+        ]:
+            post = Post.objects.create(title=slug, slug=slug, content='', author=author, status=status)
+            Post.objects.filter(pk=post.pk).update(created_at=created_at)
+
+        apps = self.migrate('0009_monthlyarchive_post_status_created_idx')
+
+        MonthlyArchive = apps.get_model('blog', 'MonthlyArchive')
+        self.assertEqual(
+            sorted(MonthlyArchive.objects.values_list('year', 'month', 'published_count')),
+            [(2024, 1, 2), (2024, 3, 1)],
+        )
+
+    def test_author_stats_are_filled(self):
+        apps = self.migrate('0006_popularpost_postviewdaily')
+        User = apps.get_model('auth', 'User')
+        Post = apps.get_model('blog', 'Post')
+        Comment = apps.get_model('blog', 'Comment')
+        PostViewDaily = apps.get_model('blog', 'PostViewDaily')
+        author = User.objects.create(username='author')
+        reader = User.objects.create(username='reader')
+        published = Post.objects.create(title='a', slug='a', content='', author=author, status='published')
+        Post.objects.create(title='b', slug='b', content='', author=author, status='draft')
+        Comment.objects.create(post=published, user=reader, content='Nice')
+        PostViewDaily.objects.create(post=published, date=timezone.localdate(), views=7)
+
+        self.migrate('0007_authordailystats')
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('blog')[0][1])
+
+        totals = get_author_stats(author.pk)['totals']
+        self.assertEqual(totals, {'posts': 2, 'published': 1, 'drafts': 1, 'comments': 1, 'views': 7})
+
+
+class AuthorStatsTests(TestCase):
+    """
+    Dashboard totals follow posts, comments and deletions.
+    """
+
+    def test_totals_and_series(self):
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+        reader = User.objects.create_user('reader', 'reader@example.com', 'password')
+        posts = [
+            Post.objects.create(title=f'Post {n}', content='Content', author=author, status='published')
+            for n in range(3)
+        ]
+        Post.objects.create(title='Draft', content='Content', author=author)
+        posts[0].comments.create(user=reader, content='First')
+        posts[1].delete()
+
+        stats = get_author_stats(author.pk, days=7)
+
+        self.assertEqual(stats['totals'], {'posts': 3, 'published': 2, 'drafts': 1, 'comments': 1, 'views': 0})
+        self.assertEqual(len(stats['series']), 7)
+        self.assertEqual(stats['series'][-1]['date'], timezone.localdate())
+        self.assertEqual(stats['series'][-1]['published'], 3)
+
+    def test_author_without_activity(self):
+        author = User.objects.create_user('author', 'author@example.com', 'password')
+
+        stats = get_author_stats(author.pk)
+
+        self.assertEqual(stats['totals'], {'posts': 0, 'published': 0, 'drafts': 0, 'comments': 0, 'views': 0})
+        self.assertEqual(stats['series'][-1]['views_percent'], 0)
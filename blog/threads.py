@@ -0,0 +1,76 @@
+"""
+Loading threaded comments.
+
+Comments store materialized paths (see ``Comment``), so a post's comments
+sorted by path are its threads in reading order, every reply right after its
+parent. The detail page paginates by top-level thread: one query reads the
+paths of the page's top-level comments from a partial index, and one more
+loads every comment of those threads as a single range of the (post, path)
+index, however deeply they are nested.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.urls import reverse
+
+from .models import Comment
+
+PAGE_PARAM = 'comments_page'
+
+
+def path_bound(path):
+    """
+    Return the smallest path that sorts after ``path`` and all its
+    descendants. Paths are digits only, so incrementing the number compares
+    correctly under any database collation, unlike appending a high character.
+    """
+    return str(int(path) + 1).zfill(len(path))
+
+
+def subtree(queryset, path):
+    """
+    Filter ``queryset`` to the comment at ``path`` and all its replies.
+    """
+    return queryset.filter(path__gte=path, path__lt=path_bound(path))
+
+
+def thread_paths(post):
+    """
+    Return the paths of the post's top-level comments, oldest first.
+    """
+    return Comment.objects.filter(post=post, depth=0).order_by('path').values_list('path', flat=True)
+
+
+def thread_comments(post, paths):
+    """
+    Return every comment in the threads starting at ``paths`` (consecutive
+    top-level paths, in order), in reading order.
+    """
+    if not paths:
+        return Comment.objects.none()
+    return Comment.objects.filter(
+        post=post, path__gte=paths[0], path__lt=path_bound(paths[-1])
+    ).select_related('user').order_by('path')
+
+
+def get_comment_page(post, page_number):
+    """
+    Return the requested page of threads (out of range numbers give the
+    nearest page) and all comments in them, in reading order.
+    """
+    page = Paginator(thread_paths(post), settings.COMMENT_THREADS_PER_PAGE).get_page(page_number)
+    page.object_list = list(page.object_list)
+    return page, list(thread_comments(post, page.object_list))
+
+
+def comment_url(comment):
+    """
+    Return the URL of ``comment`` on its post's detail page, on the page of
+    threads it appears on.
+    """
+    root = comment.path[:Comment.PATH_DIGITS]
+    before = Comment.objects.filter(post_id=comment.post_id, depth=0, path__lt=root).count()
+    page = before // settings.COMMENT_THREADS_PER_PAGE + 1
+    url = reverse('blog:post_detail', args=[comment.post.slug])
+    if page > 1:
+        url = f'{url}?{PAGE_PARAM}={page}'
+    return f'{url}#comment-{comment.pk}'
@@ -0,0 +1,433 @@
+"""
+Streaming content export and bulk import.
+
+``export_content`` writes categories, tags, posts and comments as NDJSON, one
+object per line with a ``type`` key, in that order so every reference points
+backwards. Rows are read with ``iterator(chunk_size=...)`` (server-side
+cursors on PostgreSQL) and written as they arrive, so memory use does not
+grow with the number of posts. References use natural keys: category and tag
+slugs, author and commenter usernames and post slugs; replies name their parent
+comment by its commenter and creation time.
+
+``import_content`` reads the same format in batches. Each batch resolves its
+references with one query per model, inserts with ``bulk_create`` (no model
+``save()`` and no signals) and commits on its own; the number of input lines
+committed so far is saved to a checkpoint file, with what the importer still
+has to finish (categories waiting for a parent later in the file, authors
+whose statistics need rebuilding), so an interrupted import can resume where
+it stopped. Objects whose slug already exists and comments
+already present (same post, user and time) are left alone, and rows
+referencing users missing from this site are skipped.
+
+Files ending in ``.gz`` are gzip compressed and files ending in ``.zst`` are
+zstd compressed (requires the ``zstandard`` package).
+"""
+import gzip
+import io
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+
+from .archive import rebuild_archive
+from .categories import invalidate_category_counts, rebuild_closure
+from .compression import decompress_text
+from .models import Category, Comment, Post, Tag
+from .stats import rebuild_author_stats
+
+FORMAT_VERSION = 1
+KINDS = {'category': 'categories', 'tag': 'tags', 'post': 'posts', 'comment': 'comments'}
+
+CATEGORY_FIELDS = ['name', 'slug', 'description', 'created_at', 'updated_at']
+TAG_FIELDS = ['name', 'slug', 'created_at', 'updated_at']
+POST_FIELDS = [
+    'title', 'slug', 'description', 'content', 'status', 'featured_image', 'created_at', 'updated_at',
+]
+
+
+class ContentEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder that keeps full microsecond precision for datetimes, so
+    imported timestamps match the exported ones.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def open_content_file(path, mode):
+    """
+    Open ``path`` as text for reading ('r') or writing ('w'), compressed
+    according to its extension.
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8', compresslevel=6)
+    if path.endswith('.zst'):
+        import zstandard
+        if mode == 'w':
+            stream = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def chunked(iterable, size):
+    """
+    Yield lists of up to ``size`` items from ``iterable``.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def export_rows(chunk_size=2000):
+    """
+    Yield every exported object as a dict, taxonomy first.
+    """
+    yield {'type': 'header', 'version': FORMAT_VERSION}
+    for row in Category.objects.order_by('id').values(*CATEGORY_FIELDS, 'parent__slug').iterator(chunk_size=chunk_size):
+        yield {'type': 'category', 'parent': row.pop('parent__slug'), **row}
+    for row in Tag.objects.order_by('id').values(*TAG_FIELDS).iterator(chunk_size=chunk_size):
+        yield {'type': 'tag', **row}
+
+    posts = Post.objects.order_by('id').values(
+        'id', 'author__username', 'category__slug', *POST_FIELDS
+    ).iterator(chunk_size=chunk_size)
+    for chunk in chunked(posts, chunk_size):
+        tags = {}
+        for post_id, slug in Post.tags.through.objects.filter(
+            post_id__in=[row['id'] for row in chunk]
+        ).values_list('post_id', 'tag__slug'):
+            tags.setdefault(post_id, []).append(slug)
+        for row in chunk:
+            post_id = row.pop('id')
+            row['content'] = decompress_text(row['content'])
+            yield {
+                'type': 'post',
+                'author': row.pop('author__username'),
+                'category': row.pop('category__slug'),
+                'tags': tags.get(post_id, []),
+                **row,
+            }
+
+    # Replies refer to their parent comment by (user, created_at) on the same
+    # post; ID order puts every parent before its replies
+    comments = Comment.objects.order_by('id').values(
+        'post__slug', 'user__username', 'content', 'is_approved', 'created_at',
+        'parent__user__username', 'parent__created_at',
+    ).iterator(chunk_size=chunk_size)
+    for row in comments:
+        parent = [row.pop('parent__user__username'), row.pop('parent__created_at')]
+        yield {
+            'type': 'comment',
+            'post': row.pop('post__slug'),
+            'user': row.pop('user__username'),
+            'parent': parent if parent[0] else None,
+            **row,
+        }
+
+
+def export_content(path, chunk_size=2000, progress=None):
+    """
+    Write the whole site's content to ``path`` and return the number of
+    objects written per type. ``progress(counts)`` is called every ``chunk_size`` objects.
+    """
+    counts = Counter()
+    encoder = ContentEncoder(ensure_ascii=False, separators=(',', ':'))
+    # One transaction, so the export is a consistent snapshot on PostgreSQL
+    with transaction.atomic(), open_content_file(path, 'w') as f:
+        for row in export_rows(chunk_size):
+            f.write(encoder.encode(row))
+            f.write('\n')
+            counts[row['type']] += 1
+            if progress and sum(counts.values()) % chunk_size == 0:
+                progress(counts)
+    del counts['header']
+    return counts
+
+
+class Importer:
+    """
+    Bulk importer for files written by ``export_content``.
+    Keeps per-type counts of ``created`` and ``skipped`` rows.
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.created = Counter(state.get('created', {}))
+        self.skipped = Counter(state.get('skipped', {}))
+        self.author_ids = set(state.get('author_ids', []))
+        # Slug -> parent slug of created categories whose parent comes later in the file
+        self.category_parents = state.get('category_parents', {})
+        self.handlers = {
+            'category': self.import_categories,
+            'tag': self.import_tags,
+            'post': self.import_posts,
+            'comment': self.import_comments,
+        }
+
+    def state(self):
+        """
+        Return what a resumed import needs to carry on, as JSON-ready data.
+        """
+        return {
+            'created': dict(self.created),
+            'skipped': dict(self.skipped),
+            'author_ids': sorted(self.author_ids),
+            'category_parents': self.category_parents,
+        }
+
+    def import_batch(self, kind, rows):
+        with transaction.atomic():
+            self.handlers[kind](rows)
+
+    def new_objects(self, model, rows, fields):
+        """
+        Build unsaved instances for rows whose slug is not taken yet.
+        """
+        existing = set(model.objects.filter(slug__in=[row['slug'] for row in rows]).values_list('slug', flat=True))
+        objects, seen = [], set()
+        for row in rows:
+            if row['slug'] in existing or row['slug'] in seen:
+                self.skipped[model._meta.model_name] += 1
+                continue
+            seen.add(row['slug'])
+            objects.append(model(**{field: row[field] for field in fields}))
+        return objects
+
+    def create(self, model, objects):
+        """
+        Insert ``objects`` and restore their exported timestamps, which
+        ``auto_now``/``auto_now_add`` overwrite on insert.
+        """
+        timestamps = [field.name for field in model._meta.concrete_fields if field.name in ('created_at', 'updated_at')]
+        exported = [[getattr(obj, name) for name in timestamps] for obj in objects]
+        created = model.objects.bulk_create(objects)
+        for obj, values in zip(created, exported):
+            for name, value in zip(timestamps, values):
+                setattr(obj, name, value)
+        model.objects.bulk_update(created, timestamps)
+        self.created[model._meta.model_name] += len(created)
+        return created
+
+    def import_categories(self, rows):
+        parents = {row['slug']: row.get('parent') for row in rows}
+        created = self.create(Category, self.new_objects(Category, rows, CATEGORY_FIELDS))
+        self.category_parents.update(
+            (category.slug, parents[category.slug]) for category in created if parents[category.slug]
+        )
+        # Parents already imported are linked in this batch's transaction
+        self.set_category_parents()
+
+    def set_category_parents(self):
+        """
+        Set the parent of every category waiting for one that now exists.
+        """
+        ids = dict(Category.objects.filter(
+            slug__in=self.category_parents.keys() | set(self.category_parents.values())
+        ).values_list('slug', 'id'))
+        for slug, parent_slug in list(self.category_parents.items()):
+            if parent_slug in ids:
+                Category.objects.filter(id=ids[slug]).update(parent_id=ids[parent_slug])
+                del self.category_parents[slug]
+
+    def link_categories(self):
+        """
+        Set the parents of the created categories and rebuild the closure
+        table, which ``bulk_create`` left without their rows.
+        """
+        with transaction.atomic():
+            self.set_category_parents()
+            rebuild_closure()
+
+    def import_tags(self, rows):
+        self.create(Tag, self.new_objects(Tag, rows, TAG_FIELDS))
+
+    def import_posts(self, rows):
+        users = dict(User.objects.filter(username__in={row['author'] for row in rows}).values_list('username', 'id'))
+        categories = dict(
+            Category.objects.filter(slug__in={row['category'] for row in rows if row['category']}).values_list('slug', 'id')
+        )
+        tags = dict(Tag.objects.filter(slug__in={slug for row in rows for slug in row['tags']}).values_list('slug', 'id'))
+        known = []
+        for row in rows:
+            if row['author'] in users:
+                known.append(row)
+            else:
+                self.skipped['post'] += 1
+        posts = self.new_objects(Post, known, POST_FIELDS)
+        by_slug = {row['slug']: row for row in known}
+        for post in posts:
+            row = by_slug[post.slug]
+            post.author_id = users[row['author']]
+            post.category_id = categories.get(row['category'])
+        posts = self.create(Post, posts)
+        Post.tags.through.objects.bulk_create(
+            [
+                Post.tags.through(post_id=post.id, tag_id=tags[slug])
+                for post in posts for slug in by_slug[post.slug]['tags'] if slug in tags
+            ],
+            ignore_conflicts=True,
+        )
+        self.author_ids.update(post.author_id for post in posts)
+
+    def import_comments(self, rows):
+        for row in rows:
+            if row.get('parent'):
+                row['parent'] = (row['parent'][0], parse_datetime(row['parent'][1]))
+        users = dict(User.objects.filter(
+            username__in={row['user'] for row in rows} | {row['parent'][0] for row in rows if row.get('parent')}
+        ).values_list('username', 'id'))
+        posts = {
+            slug: (post_id, author_id)
+            for slug, post_id, author_id in Post.objects.filter(
+                slug__in={row['post'] for row in rows}
+            ).values_list('slug', 'id', 'author_id')
+        }
+        # Comments have no natural key; (post, user, created_at) identifies them.
+        # Maps the key of every known comment, including parents of these rows,
+        # to its (id, path, depth)
+        known = {
+            (post_id, user_id, created_at): (comment_id, path, depth)
+            for post_id, user_id, created_at, comment_id, path, depth in Comment.objects.filter(
+                post_id__in=[post_id for post_id, _ in posts.values()],
+                created_at__in={row['created_at'] for row in rows} | {
+                    row['parent'][1] for row in rows if row.get('parent')
+                },
+            ).values_list('post_id', 'user_id', 'created_at', 'id', 'path', 'depth')
+        }
+        pending = {}
+        for row in rows:
+            if row['user'] not in users or row['post'] not in posts:
+                self.skipped['comment'] += 1
+                continue
+            post_id, author_id = posts[row['post']]
+            key = (post_id, users[row['user']], row['created_at'])
+            if key in known or key in pending:
+                self.skipped['comment'] += 1
+                continue
+            parent = None
+            if row.get('parent'):
+                parent_key = (post_id, users.get(row['parent'][0]), row['parent'][1])
+                if parent_key in pending:
+                    # The parent is in this batch: insert it first to learn its path
+                    self.create_comments(pending, known)
+                    pending = {}
+                parent = known.get(parent_key)
+            pending[key] = (Comment(
+                post_id=post_id,
+                user_id=users[row['user']],
+                parent_id=parent[0] if parent else None,
+                content=row['content'],
+                is_approved=row['is_approved'],
+                created_at=row['created_at'],
+                depth=parent[2] + 1 if parent else 0,
+            ), parent)
+            self.author_ids.add(author_id)
+        self.create_comments(pending, known)
+
+    def create_comments(self, pending, known):
+        """
+        Insert the comments in ``pending`` (key -> (comment, parent)), then set
+        their paths and their parents' child counts, which need the new IDs.
+        """
+        created = self.create(Comment, [comment for comment, _ in pending.values()])
+        replies = Counter()
+        for (key, (_, parent)), comment in zip(pending.items(), created):
+            comment.path = f'{parent[1] if parent else ""}{comment.pk:0{Comment.PATH_DIGITS}d}'
+            known[key] = (comment.pk, comment.path, comment.depth)
+            if parent:
+                replies[parent[0]] += 1
+        Comment.objects.bulk_update(created, ['path'])
+        for parent_id, count in replies.items():
+            Comment.objects.filter(pk=parent_id).update(child_count=F('child_count') + count)
+
+
+def read_checkpoint(path):
+    """
+    Return the last committed line and the importer state saved with it.
+    """
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return 0, None
+    return checkpoint['line'], checkpoint.get('importer')
+
+
+def write_checkpoint(path, line, importer):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'line': line, 'importer': importer.state()}, f)
+    os.replace(tmp, path)
+
+
+def import_content(path, batch_size=1000, checkpoint=None, progress=None):
+    """
+    Import the content file at ``path`` in batches of ``batch_size`` rows.
+
+    Args:
+        path: File written by ``export_content``
+        batch_size: Rows per ``bulk_create`` and transaction
+        checkpoint: Optional checkpoint file; lines already committed according
+            to it are skipped, and it is updated after every batch
+        progress: Optional ``progress(line, importer)`` callback run after every batch
+
+    Returns:
+        The Importer, with per-type ``created`` and ``skipped`` counts,
+        including those of the runs a checkpoint resumes
+    """
+    start, state = read_checkpoint(checkpoint) if checkpoint else (0, None)
+    importer = Importer(state)
+    last = start
+    kind, rows = None, []
+
+    def flush():
+        if rows:
+            importer.import_batch(kind, rows)
+            rows.clear()
+        if checkpoint:
+            write_checkpoint(checkpoint, last, importer)
+        if progress:
+            progress(last, importer)
+
+    with open_content_file(path, 'r') as f:
+        for number, text in enumerate(f, start=1):
+            if number <= start:
+                continue
+            row = json.loads(text)
+            row_kind = row.pop('type')
+            if row_kind == 'header':
+                if row['version'] != FORMAT_VERSION:
+                    raise ValueError(f'Unsupported content file version {row["version"]}')
+                last = number
+                continue
+            if rows and (row_kind != kind or len(rows) >= batch_size):
+                flush()
+            kind = row_kind
+            for field in ('created_at', 'updated_at'):
+                if field in row:
+                    row[field] = parse_datetime(row[field])
+            rows.append(row)
+            last = number
+        flush()
+
+    # Derived statistics are maintained by signals, which bulk_create skips
+    if importer.author_ids:
+        rebuild_author_stats(importer.author_ids)
+    if importer.created['post']:
+        rebuild_archive()
+        invalidate_category_counts()
+    if importer.created['category']:
+        importer.link_categories()
+    return importer
@@ -1,16 +1,48 @@
-from django.urls import path
-from . import views
+from django.conf import settings
+from django.urls import path, re_path, register_converter
+from . import views, async_views
+from .feeds import LatestPostsFeed
 
 app_name = 'blog'
 
+
+class MonthConverter:
+    """Two-digit month, 01 to 12."""
+    regex = '0[1-9]|1[0-2]'
+
+    def to_python(self, value):
+        return int(value)
+
+    def to_url(self, value):
+        return f'{int(value):02d}'
+
+
+register_converter(MonthConverter, 'month')
+
+# Read-heavy routes use the async views when running under ASGI
+read_views = async_views if settings.BLOG_ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', views.PostListView.as_view(), name='post_list'),
-    path('search/', views.SearchView.as_view(), name='search'),
-    path('categories/', views.CategoryListView.as_view(), name='category_list'),
+    path('', read_views.PostListView.as_view(), name='post_list'),
+    # Path-based pages (rather than ?page=) can be exported as static files
+    path('page/<int:page>/', read_views.PostListView.as_view(), name='post_list'),
+    path('search/', read_views.SearchView.as_view(), name='search'),
+    path('categories/', read_views.CategoryListView.as_view(), name='category_list'),
     path('post/create/', views.PostCreateView.as_view(), name='post_create'),
-    path('post/<slug:slug>/', views.PostDetailView.as_view(), name='post_detail'),
+    path('post/<slug:slug>/', read_views.PostDetailView.as_view(), name='post_detail'),
     path('post/<slug:slug>/edit/', views.PostUpdateView.as_view(), name='post_update'),
     path('post/<slug:slug>/delete/', views.PostDeleteView.as_view(), name='post_delete'),
-    path('category/<slug:slug>/', views.CategoryPostListView.as_view(), name='category_posts'),
-    path('tag/<slug:slug>/', views.TagPostListView.as_view(), name='tag_posts'),
+    path('category/<slug:slug>/', read_views.CategoryPostListView.as_view(), name='category_posts'),
+    path('category/<slug:slug>/page/<int:page>/', read_views.CategoryPostListView.as_view(), name='category_posts'),
+    path('tag/<slug:slug>/', read_views.TagPostListView.as_view(), name='tag_posts'),
+    path('tag/<slug:slug>/page/<int:page>/', read_views.TagPostListView.as_view(), name='tag_posts'),
+    # Several tags joined with '+' select the posts having all of them
+    re_path(r'^tag/(?P<tags>[-\w]+(?:\+[-\w]+)+)/$', views.FacetPostListView.as_view(), name='facet_posts'),
+    # Archive pages are paginated from precomputed month counts, so they use the sync view
+    path('archive/<int:year>/', views.ArchivePostListView.as_view(), name='archive_year'),
+    path('archive/<int:year>/page/<int:page>/', views.ArchivePostListView.as_view(), name='archive_year'),
+    path('archive/<int:year>/<month:month>/', views.ArchivePostListView.as_view(), name='archive_month'),
+    path('archive/<int:year>/<month:month>/page/<int:page>/', views.ArchivePostListView.as_view(), name='archive_month'),
+    path('feed/', LatestPostsFeed(), name='feed'),
+    path('subscribe/<str:kind>/<str:key>/', views.SubscriptionToggleView.as_view(), name='subscription_toggle'),
 ]
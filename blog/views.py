@@ -1,12 +1,111 @@
+from datetime import date
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import Prefetch, Q
-from django.urls import reverse_lazy
+from django.db.models import Q
+from django.urls import reverse, reverse_lazy
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
+from django.contrib.auth.models import User
+from accounts.models import Role
 from accounts.mixins import RoleRequiredMixin, AuthorRequiredMixin
-from .models import Post, Comment, Category, Tag
+from .archive import ArchivePostList
+from .categories import build_tree, get_ancestors, get_subtree_post_counts, posts_under
+from .models import Post, Category, Tag, Subscription
+from .facets import FACET_PARAMS, FacetPostList, FacetSelection, facet_index, roll_up_category_counts
 from .forms import CommentForm, PostForm
+from .pageviews import record_view
+from .ratelimit import RateLimitMixin
+from .slugs import find_current_slug
+from .threads import PAGE_PARAM, comment_url, get_comment_page
+
+
+class OldSlugRedirectMixin:
+    """
+    Permanently redirect a 404 on a renamed object's old slug to its current URL.
+    The lookup only runs when the slug was not found.
+    
+    Attributes:
+        slug_kind: SlugHistory kind of the object ('post', 'category' or 'tag')
+    """
+    slug_kind = None
+    
+    def get(self, request, *args, **kwargs):
+        try:
+            return super().get(request, *args, **kwargs)
+        except Http404:
+            current_slug = find_current_slug(self.slug_kind, kwargs['slug'])
+            if current_slug is None:
+                raise
+            url = reverse(request.resolver_match.view_name, kwargs={**kwargs, 'slug': current_slug})
+            if request.GET:
+                url = f'{url}?{request.GET.urlencode()}'
+            return redirect(url, permanent=True)
+
+
+def post_queryset(request, queryset=None):
+    """
+    Return ``queryset`` (all posts by default) as a post listing: newest
+    first, authors, categories and tags loaded, and drafts left out unless
+    the user is an admin. The sync and async list views share it.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    queryset = queryset.select_related('author', 'category').prefetch_related('tags')
+    if request.role != Role.ADMIN:
+        queryset = queryset.filter(status='published')
+    return queryset.order_by('-created_at')
+
+
+def hero_context(posts):
+    """
+    Return the first post, displayed as hero, and the remaining posts for the grid.
+    """
+    return {'hero_post': posts[0] if posts else None, 'remaining_posts': posts[1:] if posts else []}
+
+
+def category_context(category, ancestors, subcategories, counts):
+    """
+    Return the category page context, each subcategory with its subtree post count.
+    """
+    for subcategory in subcategories:
+        subcategory.post_count = counts.get(subcategory.id, 0)
+    return {'category': category, 'ancestors': ancestors, 'subcategories': subcategories}
+
+
+def search_context(query):
+    """
+    Return the search query for display and pagination.
+    """
+    return {'query': query, 'search_performed': bool(query)}
+
+
+def related_posts(post):
+    """
+    Return up to three other published posts in the same category.
+    """
+    return Post.objects.filter(
+        category_id=post.category_id,
+        status='published'
+    ).exclude(id=post.id).select_related('author', 'category').prefetch_related('tags')[:3]
+
+
+def post_detail_context(comment_page, comments, comment_count, read_time, related):
+    """
+    Return the detail page context besides the post itself.
+    """
+    return {
+        'comment_form': CommentForm(),
+        'comment_page': comment_page,
+        'comments': comments,
+        'comment_count': comment_count,
+        'read_time': read_time,
+        'related_posts': related,
+    }
 
 
 class PostListView(ListView):
@@ -24,14 +123,7 @@ class PostListView(ListView):
         Return optimized queryset of posts.
         Show only published posts for non-admin users.
         """
-        queryset = Post.objects.select_related('author', 'category').prefetch_related('tags')
-        
-        # Filter to show only published posts for non-admin users
-        user = self.request.user
-        if not user.is_authenticated or not hasattr(user, 'profile') or user.profile.role != 'admin':
-            queryset = queryset.filter(status='published')
-        
-        return queryset.order_by('-created_at')
+        return post_queryset(self.request)
     
     def get_context_data(self, **kwargs):
         """
@@ -39,19 +131,19 @@ class PostListView(ListView):
         The first post is displayed as hero, remaining posts in grid.
         """
         context = super().get_context_data(**kwargs)
-        posts = context['posts']
-        
-        if posts:
-            context['hero_post'] = posts[0]
-            context['remaining_posts'] = posts[1:]
-        else:
-            context['hero_post'] = None
-            context['remaining_posts'] = []
-        
+        context.update(hero_context(context['posts']))
         return context
 
 
-class PostDetailView(DetailView):
+def read_time(post):
+    """
+    Return the minutes it takes to read ``post``, at 200 words per minute.
+    Reading the body may decompress it and query for its zstd dictionary.
+    """
+    return max(1, round(len(post.content.split()) / 200))
+
+
+class PostDetailView(RateLimitMixin, OldSlugRedirectMixin, DetailView):
     """
     Display individual post with comments and comment form.
     Optimized query to fetch related data efficiently.
@@ -59,39 +151,44 @@ class PostDetailView(DetailView):
     model = Post
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
+    slug_kind = 'post'
+    # Comments are posted here; the async view delegates POSTs to this one
+    ratelimit_scope = 'comment'
+    ratelimit_key = 'user'
     
     def get_queryset(self):
         """
         Return optimized queryset with related data.
         """
-        return Post.objects.select_related('author', 'category').prefetch_related(
-            'tags',
-            Prefetch('comments', queryset=Comment.objects.select_related('user').order_by('created_at'))
-        )
+        return Post.objects.select_related('author', 'category').prefetch_related('tags')
     
     def get_context_data(self, **kwargs):
         """
-        Add comment form, comments, read time, and related posts to context.
+        Add comment form, one page of comment threads, read time, and related posts to context.
         """
         context = super().get_context_data(**kwargs)
         post = self.object
         
-        # Add comment form and comments
-        context['comment_form'] = CommentForm()
-        context['comments'] = post.comments.all()
-        
-        # Calculate read time (assuming 200 words per minute)
-        word_count = len(post.content.split())
-        context['read_time'] = max(1, round(word_count / 200))
-        
-        # Get related posts (same category, exclude current, limit 3)
-        context['related_posts'] = Post.objects.filter(
-            category=post.category,
-            status='published'
-        ).exclude(id=post.id).select_related('author', 'category').prefetch_related('tags')[:3]
-        
+        # The requested page of threads, loaded in one range query
+        comment_page, comments = get_comment_page(post, self.request.GET.get(PAGE_PARAM))
+        context.update(post_detail_context(
+            comment_page,
+            comments,
+            post.comments.filter(is_approved=True).count(),
+            read_time(post),
+            related_posts(post),
+        ))
         return context
     
+    def get(self, request, *args, **kwargs):
+        """
+        Render the post and count the view in the buffered page-view counter.
+        """
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200 and self.object.status == 'published':
+            record_view(self.object.id)
+        return response
+    
     def post(self, request, *args, **kwargs):
         """
         Handle comment creation via POST request.
@@ -105,7 +202,7 @@ class PostDetailView(DetailView):
         self.object = self.get_object()
         
         # Create comment form with POST data
-        form = CommentForm(request.POST)
+        form = CommentForm(request.POST, post=self.object)
         
         if form.is_valid():
             # Create comment but don't save yet
@@ -115,7 +212,7 @@ class PostDetailView(DetailView):
             comment.save()
             
             messages.success(request, 'Your comment has been posted successfully!')
-            return redirect('blog:post_detail', slug=self.object.slug)
+            return redirect(comment_url(comment))
         else:
             # Form is invalid, re-render with errors
             messages.error(request, 'There was an error with your comment. Please check and try again.')
@@ -228,14 +325,15 @@ class PostDeleteView(AuthorRequiredMixin, DeleteView):
         return response
 
 
-class CategoryPostListView(ListView):
+class CategoryPostListView(OldSlugRedirectMixin, ListView):
     """
-    Display paginated list of posts filtered by category.
+    Display paginated list of posts in a category and all its subcategories.
     Shows category name in page title and filters by category slug.
     """
     model = Post
     template_name = 'blog/category_posts.html'
     context_object_name = 'posts'
+    slug_kind = 'category'
     paginate_by = 10
     
     def get_queryset(self):
@@ -246,28 +344,24 @@ class CategoryPostListView(ListView):
         # Get the category by slug
         self.category = get_object_or_404(Category, slug=self.kwargs['slug'])
         
-        # Filter posts by category
-        queryset = Post.objects.filter(category=self.category).select_related(
-            'author', 'category'
-        ).prefetch_related('tags')
-        
-        # Filter to show only published posts for non-admin users
-        user = self.request.user
-        if not user.is_authenticated or not hasattr(user, 'profile') or user.profile.role != 'admin':
-            queryset = queryset.filter(status='published')
-        
-        return queryset.order_by('-created_at')
+        # Filter posts by category subtree: one join through the closure table
+        return post_queryset(self.request, posts_under(self.category))
     
     def get_context_data(self, **kwargs):
         """
-        Add category to context for display in template.
+        Add category, its ancestors and its subcategories to context for display in template.
         """
         context = super().get_context_data(**kwargs)
-        context['category'] = self.category
+        context.update(category_context(
+            self.category,
+            list(get_ancestors(self.category)),
+            list(self.category.children.order_by('name')),
+            get_subtree_post_counts(),
+        ))
         return context
 
 
-class TagPostListView(ListView):
+class TagPostListView(OldSlugRedirectMixin, ListView):
     """
     Display paginated list of posts filtered by tag.
     Shows tag name in page title and filters by tag slug.
@@ -275,8 +369,17 @@ class TagPostListView(ListView):
     model = Post
     template_name = 'blog/tag_posts.html'
     context_object_name = 'posts'
+    slug_kind = 'tag'
     paginate_by = 10
     
+    def get(self, request, *args, **kwargs):
+        """
+        Hand requests filtered by category, author or month to the facet view.
+        """
+        if any(name in request.GET for name in FACET_PARAMS):
+            return FacetPostListView.as_view()(request, tags=kwargs['slug'], page=kwargs.get('page'))
+        return super().get(request, *args, **kwargs)
+    
     def get_queryset(self):
         """
         Return optimized queryset of posts filtered by tag.
@@ -285,17 +388,7 @@ class TagPostListView(ListView):
         # Get the tag by slug
         self.tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
         
-        # Filter posts by tag
-        queryset = Post.objects.filter(tags=self.tag).select_related(
-            'author', 'category'
-        ).prefetch_related('tags')
-        
-        # Filter to show only published posts for non-admin users
-        user = self.request.user
-        if not user.is_authenticated or not hasattr(user, 'profile') or user.profile.role != 'admin':
-            queryset = queryset.filter(status='published')
-        
-        return queryset.order_by('-created_at')
+        return post_queryset(self.request, Post.objects.filter(tags=self.tag))
     
     def get_context_data(self, **kwargs):
         """
@@ -306,9 +399,161 @@ class TagPostListView(ListView):
         return context
 
 
+class FacetPostListView(ListView):
+    """
+    Display published posts matching several tags (``/tag/python+django/``),
+    optionally narrowed by ``?category=``, ``?author=`` and ``?month=YYYY-MM``
+    (comma-separated values match any of them), with the number of matching
+    posts for every other facet value. Selections and counts come from the
+    in-memory bitmaps in ``blog.facets``; only the current page is queried.
+    """
+    model = Post
+    template_name = 'blog/facet_posts.html'
+    context_object_name = 'posts'
+    paginate_by = 10
+    facet_kinds = ('tag', 'category', 'author', 'month')
+    facet_limit = 20
+    
+    def get_queryset(self):
+        """
+        Return the matching posts, newest first, as a lazily loaded list.
+        """
+        self.selection = FacetSelection(self.kwargs['tags'], self.request.GET)
+        post_ids, self.facet_counts = facet_index.query(self.selection.groups(), self.facet_kinds)
+        self.facet_counts['category'] = roll_up_category_counts(self.facet_counts['category'])
+        return FacetPostList(post_ids)
+    
+    def facet_url(self, tags, params):
+        """
+        Return the URL for ``tags`` (slugs) filtered by ``params``.
+        """
+        if len(tags) == 1:
+            url = reverse('blog:tag_posts', kwargs={'slug': tags[0]})
+        else:
+            url = reverse('blog:facet_posts', kwargs={'tags': '+'.join(tags)})
+        query = urlencode({name: ','.join(values) for name, values in params.items() if values})
+        return f'{url}?{query}' if query else url
+    
+    def toggle_url(self, kind, value):
+        """
+        Return the URL with facet value ``value`` added or, if selected, removed.
+        Returns None for the last remaining tag, which cannot be removed.
+        """
+        tags = [tag.slug for tag in self.selection.tags]
+        params = {
+            'category': [category.slug for category in self.selection.categories],
+            'author': [author.username for author in self.selection.authors],
+            'month': list(self.selection.months),
+        }
+        values = tags if kind == 'tag' else params[kind]
+        if value in values:
+            if kind == 'tag' and len(tags) == 1:
+                return None
+            values.remove(value)
+        else:
+            values.append(value)
+        return self.facet_url(tags, params)
+    
+    def get_facets(self):
+        """
+        Return the top values of every facet with their counts and toggle URLs.
+        """
+        top = {
+            kind: sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))[:self.facet_limit]
+            for kind, counts in self.facet_counts.items()
+        }
+        labels = {
+            'tag': {tag.id: (tag.slug, tag.name) for tag in Tag.objects.filter(id__in=[key for key, _ in top['tag']])},
+            'category': {
+                category.id: (category.slug, category.name)
+                for category in Category.objects.filter(id__in=[key for key, _ in top['category']])
+            },
+            'author': {
+                user_id: (username, username)
+                for user_id, username in User.objects.filter(
+                    id__in=[key for key, _ in top['author']]
+                ).values_list('id', 'username')
+            },
+            'month': {month: (month, month) for month, _ in top['month']},
+        }
+        selected = {
+            'tag': {tag.slug for tag in self.selection.tags},
+            'category': {category.slug for category in self.selection.categories},
+            'author': {author.username for author in self.selection.authors},
+            'month': set(self.selection.months),
+        }
+        facets = []
+        for kind in self.facet_kinds:
+            values = []
+            for key, count in top[kind]:
+                if key not in labels[kind]:
+                    continue
+                value, label = labels[kind][key]
+                values.append({
+                    'label': label,
+                    'count': count,
+                    'active': value in selected[kind],
+                    'url': self.toggle_url(kind, value),
+                })
+            if kind == 'month':
+                values.sort(key=lambda item: item['label'], reverse=True)
+            facets.append({'kind': kind, 'values': values})
+        return facets
+    
+    def get_context_data(self, **kwargs):
+        """
+        Add the selected facet values and the facet counts to the context.
+        """
+        context = super().get_context_data(**kwargs)
+        context['selected_tags'] = [
+            {'label': tag.name, 'url': self.toggle_url('tag', tag.slug)} for tag in self.selection.tags
+        ]
+        context['selected_filters'] = [
+            {'label': label, 'url': self.toggle_url(kind, value)}
+            for kind, items in (
+                ('category', [(category.slug, category.name) for category in self.selection.categories]),
+                ('author', [(author.username, author.username) for author in self.selection.authors]),
+                ('month', [(month, month) for month in self.selection.months]),
+            )
+            for value, label in items
+        ]
+        context['facets'] = self.get_facets()
+        return context
+
+
+class ArchivePostListView(ListView):
+    """
+    Display paginated published posts of a year (``/archive/2024/``) or a
+    month (``/archive/2024/05/``), newest first.
+    """
+    model = Post
+    template_name = 'blog/archive_posts.html'
+    context_object_name = 'posts'
+    paginate_by = 10
+    
+    def get_queryset(self):
+        """
+        Return the archived posts as a lazily loaded, precounted list.
+        """
+        self.year = self.kwargs['year']
+        self.month = self.kwargs.get('month')
+        if not 1 <= self.year <= 9998:
+            raise Http404('Invalid archive year.')
+        return ArchivePostList(self.year, self.month)
+    
+    def get_context_data(self, **kwargs):
+        """
+        Add the archive year and month (a date, or None) to the context.
+        """
+        context = super().get_context_data(**kwargs)
+        context['year'] = self.year
+        context['month'] = date(self.year, self.month, 1) if self.month else None
+        return context
+
+
 class CategoryListView(ListView):
     """
-    Display list of all categories with post counts.
+    Display the category tree with cached subtree post counts.
     """
     model = Category
     template_name = 'blog/category_list.html'
@@ -319,50 +564,84 @@ class CategoryListView(ListView):
         Return all categories ordered by name.
         """
         return Category.objects.all().order_by('name')
+    
+    def get_context_data(self, **kwargs):
+        """
+        Add the top-level categories, with their subcategories nested, to context.
+        """
+        context = super().get_context_data(**kwargs)
+        context['category_tree'] = build_tree(list(context['categories']), get_subtree_post_counts())
+        return context
+
+
+def search_filter(query):
+    """
+    Return the filter matching posts whose title, description or (with
+    SEARCH_POST_CONTENT) body contains ``query``.
+    """
+    condition = Q(title__icontains=query) | Q(description__icontains=query)
+    if settings.SEARCH_POST_CONTENT:
+        condition |= Q(content__icontains=query)
+    return condition
 
 
-class SearchView(ListView):
+class SearchView(RateLimitMixin, ListView):
     """
     Display paginated search results for posts.
-    Searches in post title and content using Q objects.
+    Searches in post title, description and content using Q objects.
     Shows only published posts for non-admin users.
     """
     model = Post
     template_name = 'blog/search_results.html'
     context_object_name = 'posts'
     paginate_by = 10
+    ratelimit_scope = 'search'
+    ratelimit_methods = ('GET', 'HEAD')
     
     def get_queryset(self):
         """
         Return optimized queryset of posts filtered by search query.
-        Search in title and content fields using Q objects.
+        Search in title, description and content fields (see search_filter).
         Show only published posts for non-admin users.
         """
         # Get the search query from GET parameters
         self.query = self.request.GET.get('q', '').strip()
-        
-        # Start with base queryset
-        queryset = Post.objects.select_related('author', 'category').prefetch_related('tags')
-        
-        # Apply search filter if query exists
-        if self.query:
-            # Use Q objects to search in title or content
-            queryset = queryset.filter(
-                Q(title__icontains=self.query) | Q(content__icontains=self.query)
-            )
-        
-        # Filter to show only published posts for non-admin users
-        user = self.request.user
-        if not user.is_authenticated or not hasattr(user, 'profile') or user.profile.role != 'admin':
-            queryset = queryset.filter(status='published')
-        
-        return queryset.order_by('-created_at')
+        return post_queryset(self.request, Post.objects.filter(search_filter(self.query)) if self.query else None)
     
     def get_context_data(self, **kwargs):
         """
         Add search query to context for display and pagination.
         """
         context = super().get_context_data(**kwargs)
-        context['query'] = self.query
-        context['search_performed'] = bool(self.query)
+        context.update(search_context(self.query))
         return context
+
+
+class SubscriptionToggleView(LoginRequiredMixin, View):
+    """
+    Subscribe the current user to an author, category or tag, or unsubscribe
+    if a subscription already exists. Accepts POST only.
+    """
+    targets = {
+        'author': (User, 'username'),
+        'category': (Category, 'slug'),
+        'tag': (Tag, 'slug'),
+    }
+    
+    def post(self, request, kind, key):
+        if kind not in self.targets:
+            raise Http404('Unknown subscription type')
+        model, lookup = self.targets[kind]
+        target = get_object_or_404(model, **{lookup: key})
+        
+        deleted, _ = Subscription.objects.filter(user=request.user, **{kind: target}).delete()
+        if deleted:
+            messages.success(request, f'You have unsubscribed from {target}.')
+        else:
+            Subscription.objects.create(user=request.user, **{kind: target})
+            messages.success(request, f'You will be notified about new posts from {target}.')
+        
+        next_url = request.POST.get('next')
+        if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+            next_url = reverse_lazy('blog:post_list')
+        return redirect(next_url)
@@ -0,0 +1,152 @@
+"""
+Cache warm-up after a deploy.
+
+After a restart every cache is cold: each worker compiles templates on first
+use, and the in-process caches (category counts, the feed, facet bitmaps, the
+default per-process cache backend) and any shared cache start empty, so the
+first readers get slow responses. ``warm`` requests the pages most readers
+land on first, most visited first: the home page and feed, the popular posts,
+the first listing pages, then every category and tag page.
+
+Pages are requested concurrently, either in this process through the Django
+test client, which warms this process and any shared cache, or over HTTP from
+a running server (``base_url``), which warms the workers that answer. No new
+request is started once the time budget is spent. Warm-up requests are not
+counted as page views when made in-process; over HTTP each popular post gets
+one extra view per run.
+"""
+import math
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q
+from django.urls import reverse
+
+from .categories import get_subtree_post_counts
+from .models import Category, PopularPost, Post, Tag
+from .pageviews import views_not_recorded
+
+USER_AGENT = 'BlogBreeze-warmup'
+
+
+def warmup_urls(listing_pages=None, popular_posts=None):
+    """
+    Return the URLs to warm, most visited first.
+    """
+    from .views import PostListView
+
+    listing_pages = settings.WARMUP_LISTING_PAGES if listing_pages is None else listing_pages
+    popular_posts = settings.WARMUP_POPULAR_POSTS if popular_posts is None else popular_posts
+    published = Post.objects.filter(status='published')
+
+    slugs = list(
+        PopularPost.objects.filter(post__status='published').values_list('post__slug', flat=True)[:popular_posts]
+    )
+    # Without a ranking yet, the newest posts are the likeliest to be read
+    slugs += published.exclude(slug__in=slugs).order_by('-created_at').values_list(
+        'slug', flat=True
+    )[:popular_posts - len(slugs)]
+    page_count = min(listing_pages, math.ceil(published.count() / PostListView.paginate_by))
+
+    counts = get_subtree_post_counts()
+    categories = sorted(
+        Category.objects.values_list('id', 'slug'), key=lambda category: -counts.get(category[0], 0)
+    )
+    tags = Tag.objects.annotate(
+        published_posts=Count('posts', filter=Q(posts__status='published'))
+    ).order_by('-published_posts', 'name').values_list('slug', flat=True)
+
+    return [
+        reverse('blog:post_list'),
+        reverse('blog:feed'),
+        *(reverse('blog:post_detail', kwargs={'slug': slug}) for slug in slugs),
+        *(reverse('blog:post_list', kwargs={'page': number}) for number in range(2, page_count + 1)),
+        reverse('blog:category_list'),
+        *(reverse('blog:category_posts', kwargs={'slug': slug}) for _, slug in categories),
+        *(reverse('blog:tag_posts', kwargs={'slug': slug}) for slug in tags),
+    ]
+
+
+def client_fetcher():
+    """
+    Return a function that requests a URL in this process, as an anonymous
+    reader, through the full middleware stack and returns the status code.
+    """
+    from django.test import Client
+
+    site = urlsplit(settings.SITE_URL)
+    local = threading.local()
+
+    def fetch(url, timeout):
+        if not hasattr(local, 'client'):
+            local.client = Client(HTTP_HOST=site.netloc, HTTP_USER_AGENT=USER_AGENT, raise_request_exception=False)
+        return local.client.get(url, secure=site.scheme == 'https').status_code
+
+    return fetch
+
+
+def http_fetcher(base_url):
+    """
+    Return a function that requests a URL from the server at ``base_url``
+    (with SITE_URL's host name) and returns the status code, or None if the
+    server could not be reached in time.
+    """
+    host = urlsplit(settings.SITE_URL).netloc
+    base_url = base_url.rstrip('/')
+
+    def fetch(url, timeout):
+        request = urllib.request.Request(base_url + url, headers={'Host': host, 'User-Agent': USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=max(timeout, 1)) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except OSError:
+            return None
+
+    return fetch
+
+
+def warm(urls, budget=None, concurrency=None, base_url=None):
+    """
+    Request ``urls`` in order from ``concurrency`` threads until all have been
+    requested or ``budget`` seconds have passed.
+
+    Returns:
+        Tuple of a list of ``(url, status, seconds)`` for the requested URLs
+        (status None if the server could not be reached) and a list of the
+        URLs skipped because the budget ran out
+    """
+    budget = settings.WARMUP_BUDGET if budget is None else budget
+    concurrency = settings.WARMUP_CONCURRENCY if concurrency is None else concurrency
+    fetch = http_fetcher(base_url) if base_url else client_fetcher()
+    deadline = time.monotonic() + budget
+    pending = deque(urls)
+    results = []
+
+    def work():
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    url = pending.popleft()
+                except IndexError:
+                    return
+                started = time.monotonic()
+                status = fetch(url, deadline - started)
+                results.append((url, status, time.monotonic() - started))
+        finally:
+            # Threads of the pool must not leave their connections open
+            connections.close_all()
+
+    with views_not_recorded(), ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='warmup') as pool:
+        for future in [pool.submit(work) for _ in range(concurrency)]:
+            future.result()
+    return results, list(pending)
@@ -0,0 +1,64 @@
+"""
+Gunicorn settings, read from the working directory when gunicorn starts
+(`gunicorn BlogBreeze.wsgi`, see Procfile and render.yaml).
+
+With preload_app (GUNICORN_PRELOAD_APP, on by default) the master loads
+Django, the URLconf and the views once and workers are forked from it, so
+they start without importing anything and share those pages of memory
+copy-on-write. The master's objects are then moved out of the garbage
+collector's reach with gc.freeze(), following the gc module documentation,
+so collections in the workers do not write to (and thereby copy) them.
+Collection is off only while the app loads and is switched back on in the
+master once its objects are frozen; workers inherit that.
+Code changes need a restart rather than a HUP when preloading.
+"""
+import gc
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD_APP', 'True') == 'True'
+
+if preload_app:
+    # Collecting while the app loads would leave freed gaps in the shared pages
+    gc.disable()
+
+
+def when_ready(server):
+    """
+    Finish loading in the master before the first worker is forked.
+    """
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # Import the URLconf and every view module once, for all workers
+    get_resolver().url_patterns
+    # Workers must not share the master's database connections
+    connections.close_all()
+    gc.freeze()
+    # Objects the master creates from here on are collected as usual
+    gc.enable()
+
+
+def post_worker_init(worker):
+    """
+    With WARMUP_ON_WORKER_START=True, render the most visited pages in each new
+    worker once it has loaded Django and before it accepts requests, so its
+    templates and in-process caches are warm for the first readers.
+    """
+    from django.conf import settings
+
+    if not settings.WARMUP_ON_WORKER_START:
+        return
+    from blog.warmup import warm, warmup_urls
+
+    try:
+        results, skipped = warm(warmup_urls(), budget=settings.WARMUP_WORKER_BUDGET)
+    except Exception:
+        # A worker that cannot warm up can still serve requests
+        worker.log.exception('Cache warm-up failed')
+        return
+    failed = sum(1 for _, status, _ in results if status != 200)
+    worker.log.info(
+        'Warmed %d pages (%d failed, %d skipped) in worker %s', len(results) - failed, failed, len(skipped), worker.pid
+    )
@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'queue', 'status', 'attempts', 'run_at', 'wait_ms', 'duration_ms']
+    list_filter = ['status', 'queue']
+    search_fields = ['name']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'locked_by', 'locked_at', 'wait_ms', 'duration_ms']
+    actions = ['retry_tasks']
+    
+    def retry_tasks(self, request, queryset):
+        updated = queryset.exclude(status=Task.STATUS_RUNNING).update(
+            status=Task.STATUS_QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            last_error='',
+        )
+        self.message_user(request, f'{updated} tasks queued for retry.')
+    retry_tasks.short_description = 'Retry selected tasks'
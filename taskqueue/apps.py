@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+
+
+class TaskQueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'taskqueue'
+    verbose_name = 'Task Queue'
+    
+    def ready(self):
+        """
+        Import the ``tasks`` module of every installed app so that all
+        task functions are registered before a worker starts claiming rows.
+        """
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tasks')
@@ -0,0 +1,109 @@
+"""
+Management command to process background tasks from the database queue.
+Usage: python manage.py runworker --concurrency 4 --pool thread --queue default
+
+Runs until interrupted (SIGINT/SIGTERM), finishing in-flight tasks before
+exiting. Use --burst to exit once the queue is empty.
+"""
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from taskqueue.worker import WorkerMetrics, claim_tasks, get_setting, heartbeat, init_process, run_task, worker_id
+
+
+class Command(BaseCommand):
+    help = 'Runs a worker pool that executes queued background tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Number of tasks run in parallel')
+        parser.add_argument(
+            '--pool', choices=['thread', 'process'], default='thread',
+            help='Run tasks in threads (I/O bound work) or processes (CPU bound work)'
+        )
+        parser.add_argument(
+            '--queue', action='append', dest='queues',
+            help='Queue to consume (repeatable). Defaults to "default".'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=get_setting('POLL_INTERVAL', 1.0),
+            help='Seconds to wait between polls when the queue is empty'
+        )
+        parser.add_argument('--burst', action='store_true', help='Exit once no tasks are due')
+        parser.add_argument(
+            '--metrics-interval', type=float, default=60.0,
+            help='Seconds between per-task timing reports'
+        )
+
+    def handle(self, *args, **options):
+        queues = options['queues'] or ['default']
+        concurrency = options['concurrency']
+        owner = worker_id()
+        metrics = WorkerMetrics()
+        self.stopping = False
+
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+        if options['pool'] == 'process':
+            # Children must not inherit the parent's open connections
+            connections.close_all()
+            executor = ProcessPoolExecutor(max_workers=concurrency, initializer=init_process)
+        else:
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='taskqueue')
+
+        self.stdout.write(
+            f'Worker {owner} consuming {", ".join(queues)} with {concurrency} {options["pool"]} workers'
+        )
+        in_flight = {}
+        last_report = last_heartbeat = time.monotonic()
+        heartbeat_interval = get_setting('HEARTBEAT_INTERVAL', 60)
+        with executor:
+            while not self.stopping:
+                for task_id in claim_tasks(queues, concurrency - len(in_flight), owner):
+                    in_flight[executor.submit(run_task, task_id)] = task_id
+
+                if not in_flight:
+                    if options['burst']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                self.collect(done, metrics, in_flight)
+
+                if time.monotonic() - last_heartbeat >= heartbeat_interval:
+                    heartbeat(list(in_flight.values()), owner)
+                    last_heartbeat = time.monotonic()
+
+                if time.monotonic() - last_report >= options['metrics_interval']:
+                    self.report(metrics)
+                    last_report = time.monotonic()
+
+            # Keep the locks fresh while in-flight tasks finish
+            while in_flight:
+                done, _ = wait(in_flight, timeout=heartbeat_interval)
+                self.collect(done, metrics, in_flight)
+                heartbeat(list(in_flight.values()), owner)
+
+        self.report(metrics)
+        self.stdout.write(self.style.SUCCESS('Worker stopped.'))
+
+    def request_stop(self, signum, frame):
+        self.stdout.write('Shutting down after in-flight tasks finish...')
+        self.stopping = True
+
+    def collect(self, futures, metrics, in_flight):
+        for future in futures:
+            del in_flight[future]
+            try:
+                metrics.record(*future.result())
+            except Exception as e:
+                self.stderr.write(f'Task execution error: {e}')
+
+    def report(self, metrics):
+        for line in metrics.report():
+            self.stdout.write(line)
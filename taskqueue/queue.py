@@ -0,0 +1,95 @@
+"""
+Task registration and enqueueing.
+
+Usage:
+    from taskqueue.queue import task
+
+    @task(max_attempts=5)
+    def rebuild_feed(post_id):
+        ...
+
+    rebuild_feed.delay(post.id)
+
+Tasks are written to the database only when the surrounding transaction
+commits, so a worker never picks up work for data that was rolled back.
+Arguments must be JSON serializable.
+"""
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from .models import Task
+
+registry = {}
+
+
+class TaskFunction:
+    """
+    Wrapper returned by the ``task`` decorator.
+    Calling it runs the function inline; ``delay`` queues it for a worker.
+    """
+
+    def __init__(self, func, name, queue, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+        self.__name__ = func.__name__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """
+        Queue the task with the given arguments once the transaction commits.
+        """
+        enqueue(self, args=args, kwargs=kwargs)
+
+
+def task(func=None, *, name=None, queue='default', max_attempts=3):
+    """
+    Register a function as a background task.
+    Can be used bare (``@task``) or with options (``@task(queue='mail')``).
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        wrapped = TaskFunction(func, task_name, queue, max_attempts)
+        registry[task_name] = wrapped
+        return wrapped
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def enqueue(task_func, args=(), kwargs=None, queue=None, delay=None, max_attempts=None,
+            using=DEFAULT_DB_ALIAS):
+    """
+    Create a Task row for ``task_func`` when the current transaction commits.
+    Outside a transaction the row is created immediately.
+
+    Args:
+        task_func: A function decorated with ``task``
+        args: Positional arguments for the task
+        kwargs: Keyword arguments for the task
+        queue: Override the task's default queue
+        delay: Optional number of seconds (or timedelta) before the task is due
+        max_attempts: Override the task's default retry limit
+        using: Database alias whose transaction the enqueue is bound to
+    """
+    if isinstance(delay, (int, float)):
+        delay = timedelta(seconds=delay)
+
+    def create():
+        Task.objects.using(using).create(
+            name=task_func.name,
+            queue=queue or task_func.queue,
+            args=list(args),
+            kwargs=kwargs or {},
+            max_attempts=max_attempts or task_func.max_attempts,
+            run_at=timezone.now() + delay if delay else timezone.now(),
+        )
+
+    transaction.on_commit(create, using=using)
@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Task
+from .queue import task
+from .worker import claim_tasks, heartbeat, run_task
+
+
+@task(name='taskqueue.tests.noop')
+def noop():
+    pass
+
+
+@task(name='taskqueue.tests.reclaimed')
+def reclaimed():
+    # Another worker reclaims the task while this run is still going
+    Task.objects.filter(status=Task.STATUS_RUNNING).update(attempts=F('attempts') + 1, locked_by='worker:2')
+
+
+class ReclaimTests(TestCase):
+    """
+    Only tasks whose worker stopped are reclaimed, and only while they have
+    attempts left.
+    """
+
+    def running(self, age, attempts=1, owner='worker:1'):
+        return Task.objects.create(
+            name='taskqueue.tests.noop', status=Task.STATUS_RUNNING, attempts=attempts,
+            locked_by=owner, locked_at=timezone.now() - timedelta(seconds=age),
+        )
+
+    def test_fresh_lock_is_not_reclaimed(self):
+        self.running(age=60)
+        self.assertEqual(claim_tasks(['default'], 10, 'worker:2'), [])
+
+    def test_stale_lock_is_reclaimed(self):
+        stale = self.running(age=3600)
+        self.assertEqual(claim_tasks(['default'], 10, 'worker:2'), [stale.id])
+        stale.refresh_from_db()
+        self.assertEqual((stale.locked_by, stale.attempts), ('worker:2', 2))
+
+    def test_stale_lock_without_attempts_left_fails(self):
+        stale = self.running(age=3600, attempts=3)
+        with self.assertLogs('taskqueue.worker', 'ERROR'):
+            self.assertEqual(claim_tasks(['default'], 10, 'worker:2'), [])
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Task.STATUS_FAILED)
+        self.assertEqual(stale.attempts, 3)
+
+    def test_heartbeat_keeps_long_task_locked(self):
+        long_running = self.running(age=3600)
+        other = self.running(age=3600, owner='worker:3')
+        self.assertEqual(heartbeat([long_running.id, other.id], 'worker:1'), 1)
+        self.assertEqual(claim_tasks(['default'], 10, 'worker:2'), [other.id])
+
+
+class RunTaskTests(TransactionTestCase):
+    """
+    A worker whose task was reclaimed does not overwrite the new run's state.
+    """
+
+    def test_outcome_of_reclaimed_run_is_dropped(self):
+        Task.objects.create(name='taskqueue.tests.reclaimed')
+        [task_id] = claim_tasks(['default'], 1, 'worker:1')
+
+        with self.assertLogs('taskqueue.worker', 'INFO'):
+            run_task(task_id)
+
+        reclaimed = Task.objects.get(pk=task_id)
+        self.assertEqual((reclaimed.status, reclaimed.locked_by), (Task.STATUS_RUNNING, 'worker:2'))
+
+    def test_outcome_is_recorded(self):
+        Task.objects.create(name='taskqueue.tests.noop')
+        [task_id] = claim_tasks(['default'], 1, 'worker:1')
+        heartbeat([task_id], 'worker:1')
+
+        with self.assertLogs('taskqueue.worker', 'INFO'):
+            run_task(task_id)
+
+        self.assertEqual(Task.objects.get(pk=task_id).status, Task.STATUS_SUCCEEDED)
@@ -0,0 +1,234 @@
+"""
+Claiming and executing queued tasks.
+
+On databases that support ``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL)
+a batch of due rows is locked and marked running in one transaction, so any
+number of workers can poll the same table without blocking each other. Other
+databases (SQLite) fall back to a conditional UPDATE per candidate row: a
+worker only owns a task if its UPDATE changed exactly one row.
+
+While a task runs, its worker refreshes ``locked_at`` every
+TASKQUEUE_HEARTBEAT_INTERVAL seconds (``heartbeat``), so only tasks whose
+worker has stopped for TASKQUEUE_LOCK_TIMEOUT are reclaimed, however long
+they run. An abandoned task that has used up its attempts is marked failed
+instead of being run again.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+from .queue import registry
+
+logger = logging.getLogger(__name__)
+
+
+def get_setting(name, default):
+    return getattr(settings, f'TASKQUEUE_{name}', default)
+
+
+def worker_id():
+    """
+    Identify the current worker process in ``Task.locked_by``.
+    """
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """
+    Exponential backoff with jitter for the given number of failed attempts.
+    """
+    base = get_setting('RETRY_BACKOFF', 5)
+    cap = get_setting('RETRY_BACKOFF_MAX', 3600)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def abandoned(queues, now):
+    """
+    Running rows whose worker stopped sending heartbeats (worker crashed).
+    """
+    stale_before = now - timedelta(seconds=get_setting('LOCK_TIMEOUT', 600))
+    return Q(status=Task.STATUS_RUNNING, locked_at__lt=stale_before, queue__in=queues)
+
+
+def claimable(queues, now):
+    """
+    Rows that are due, plus abandoned rows with attempts left.
+    """
+    return (
+        Q(status=Task.STATUS_QUEUED, run_at__lte=now)
+        | abandoned(queues, now) & Q(attempts__lt=F('max_attempts'))
+    ) & Q(queue__in=queues)
+
+
+def fail_abandoned(queues, now):
+    """
+    Mark abandoned tasks that have used up their attempts as failed.
+    """
+    failed = Task.objects.filter(abandoned(queues, now), attempts__gte=F('max_attempts')).update(
+        status=Task.STATUS_FAILED,
+        locked_by='',
+        finished_at=now,
+        last_error='Worker stopped while running the task',
+    )
+    if failed:
+        logger.error(f'Marked {failed} abandoned tasks as failed after their last attempt')
+    return failed
+
+
+def heartbeat(task_ids, owner):
+    """
+    Refresh the locks ``owner`` holds on the running tasks ``task_ids``.
+    """
+    if not task_ids:
+        return 0
+    return Task.objects.filter(
+        id__in=task_ids, status=Task.STATUS_RUNNING, locked_by=owner
+    ).update(locked_at=timezone.now())
+
+
+def claim_tasks(queues, limit, owner):
+    """
+    Claim up to ``limit`` due tasks for ``owner`` and return their ids.
+    """
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    fail_abandoned(queues, now)
+    condition = claimable(queues, now)
+    claim = dict(
+        status=Task.STATUS_RUNNING,
+        locked_by=owner,
+        locked_at=now,
+        started_at=now,
+        attempts=F('attempts') + 1,
+    )
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(condition)
+                .order_by('run_at')
+                .values_list('id', flat=True)[:limit]
+            )
+            if ids:
+                Task.objects.filter(id__in=ids).update(**claim)
+        return ids
+
+    # SQLite fallback: optimistic claim, one conditional UPDATE per candidate
+    candidates = list(
+        Task.objects.filter(condition).order_by('run_at').values_list('id', flat=True)[:limit]
+    )
+    return [
+        task_id for task_id in candidates
+        if Task.objects.filter(condition, id=task_id).update(**claim) == 1
+    ]
+
+
+def run_task(task_id):
+    """
+    Execute a claimed task and record its outcome and timings.
+    Returns a ``(name, succeeded, duration_ms)`` tuple for worker metrics.
+    """
+    close_old_connections()
+    try:
+        task = Task.objects.get(pk=task_id)
+        started = time.perf_counter()
+        wait_ms = max(0, int((task.started_at - task.run_at).total_seconds() * 1000))
+        try:
+            func = registry[task.name]
+        except KeyError:
+            func = None
+            error = f'No task registered with name "{task.name}"'
+        else:
+            error = None
+            try:
+                func(*task.args, **task.kwargs)
+            except Exception:
+                error = traceback.format_exc()
+        duration_ms = int((time.perf_counter() - started) * 1000)
+
+        updates = dict(wait_ms=wait_ms, duration_ms=duration_ms, finished_at=timezone.now(), locked_by='')
+        if error is None:
+            updates.update(status=Task.STATUS_SUCCEEDED, last_error='')
+            logger.info(f'Task {task.name} (ID: {task.id}) succeeded in {duration_ms} ms after waiting {wait_ms} ms')
+        elif func is not None and task.attempts < task.max_attempts:
+            updates.update(
+                status=Task.STATUS_QUEUED,
+                run_at=timezone.now() + retry_delay(task.attempts),
+                last_error=error,
+            )
+            logger.warning(f'Task {task.name} (ID: {task.id}) failed on attempt {task.attempts}, will retry')
+        else:
+            updates.update(status=Task.STATUS_FAILED, last_error=error)
+            logger.error(f'Task {task.name} (ID: {task.id}) failed permanently after {task.attempts} attempts')
+        # Only record the outcome if the row is still ours (not reclaimed as stale);
+        # every claim increments attempts, so it identifies this run
+        Task.objects.filter(
+            pk=task.pk, status=Task.STATUS_RUNNING, attempts=task.attempts
+        ).update(**updates)
+        return task.name, error is None, duration_ms
+    finally:
+        close_old_connections()
+
+
+def init_process():
+    """
+    Initializer for process pool workers; each child needs its own app registry
+    and database connections.
+    """
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BlogBreeze.settings')
+    django.setup()
+    from django.db import connections
+    for connection in connections.all(initialized_only=True):
+        # Sockets and pools copied from the parent on fork are still in use
+        # there, so drop them without closing and let this process reconnect
+        connection.connection = None
+        pools = getattr(connection, '_connection_pools', None)
+        if pools is not None:
+            pools.clear()
+
+
+class WorkerMetrics:
+    """
+    Per-task-name counters and timings aggregated by a running worker.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = defaultdict(lambda: {'succeeded': 0, 'failed': 0, 'total_ms': 0, 'max_ms': 0})
+
+    def record(self, name, succeeded, duration_ms):
+        with self.lock:
+            entry = self.stats[name]
+            entry['succeeded' if succeeded else 'failed'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+
+    def report(self):
+        """
+        Return one summary line per task name.
+        """
+        with self.lock:
+            lines = []
+            for name, entry in sorted(self.stats.items()):
+                runs = entry['succeeded'] + entry['failed']
+                lines.append(
+                    f'{name}: {runs} runs ({entry["failed"]} failed), '
+                    f'avg {entry["total_ms"] / runs:.1f} ms, max {entry["max_ms"]} ms'
+                )
+            return lines